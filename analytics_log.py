@@ -0,0 +1,119 @@
+"""
+Append-only analytics log, one JSON line per solved answer.
+
+Each record is appended and fsync'd as soon as its answer is solved, so a
+checkpoint costs the same however many answers are done, and a run is resumed
+by scanning the log for answers already solved. If an answer appears more than
+once the last record wins.
+
+    python analytics_log.py import    # analytics.txt -> analytics.jsonl
+    python analytics_log.py export    # analytics.jsonl -> analytics.txt
+    python analytics_log.py compact   # drop duplicate / partial lines from analytics.jsonl
+"""
+import json
+import os
+import sys
+
+LOG_FILE = 'analytics.jsonl'
+ANALYTICS_FILE = 'analytics.txt'  # single JSON dict of {answer: entry}
+
+
+class AnalyticsLog:
+    """
+    Appends records to the log, syncing each one to disk. A partly written
+    last line left by a crash is cut off first so the next record starts on
+    a line of its own.
+    """
+    def __init__(self, filename=LOG_FILE):
+        self.file = open(filename, 'a+b')
+        self._truncate_partial_line()
+
+    def _truncate_partial_line(self):
+        end = self.file.seek(0, os.SEEK_END)
+        if end == 0:
+            return
+        self.file.seek(end - 1)
+        if self.file.read(1) == b'\n':
+            return
+        self.file.seek(0)
+        data = self.file.read()
+        self.file.truncate(data.rfind(b'\n') + 1)
+        self.file.seek(0, os.SEEK_END)
+
+    def append(self, answer, entry):
+        self.file.write((json.dumps({'answer': answer, **entry}) + '\n').encode())
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_log(filename=LOG_FILE):
+    """
+    Yields (answer, entry) for each record in the log without loading it all.
+    A partly written last line, e.g. from a crash mid write, is skipped.
+    """
+    if not os.path.exists(filename):
+        return
+    with open(filename) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            answer = record.pop('answer')
+            yield answer, record
+
+
+def solved_answers(filename=LOG_FILE) -> set:
+    return {answer for answer, _ in read_log(filename)}
+
+
+def load_results(filename=LOG_FILE) -> dict:
+    """ Returns {answer: entry} in the analytics.txt format """
+    return dict(read_log(filename))
+
+
+def compact(filename=LOG_FILE):
+    """ Rewrites the log with one record per answer """
+    results = load_results(filename)
+    tmp = f'{filename}.tmp'
+    with open(tmp, 'w') as f:
+        for answer, entry in results.items():
+            f.write(json.dumps({'answer': answer, **entry}) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, filename)
+
+
+def export_analytics(filename=LOG_FILE, analytics_file=ANALYTICS_FILE):
+    """ Writes the log as the single JSON dict analytics.txt format """
+    tmp = f'{analytics_file}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(load_results(filename), f)
+    os.replace(tmp, analytics_file)
+
+
+def import_analytics(analytics_file=ANALYTICS_FILE, filename=LOG_FILE):
+    """ Appends the entries of an analytics.txt dict to the log """
+    if os.path.getsize(analytics_file) == 0:
+        return
+    with open(analytics_file) as f:
+        results = json.load(f)
+    with AnalyticsLog(filename) as log:
+        for answer, entry in results.items():
+            log.append(answer, entry)
+
+
+if __name__ == '__main__':
+    commands = {'import': import_analytics, 'export': export_analytics, 'compact': compact}
+    if len(sys.argv) != 2 or sys.argv[1] not in commands:
+        sys.exit(f'usage: python analytics_log.py {"|".join(commands)}')
+    commands[sys.argv[1]]()
@@ -0,0 +1,115 @@
+"""
+Answer pools stored as bitsets over a fixed word list.
+
+WordIndex precomputes a mask of the words with each letter in each position,
+and of the words with at least n of each letter, so applying a Feedback to an
+AnswerPool is a handful of AND / ANDNOT operations on Python ints and counting
+the pool is a popcount.
+"""
+
+
+def _mask(indices, size) -> int:
+    bitmap = bytearray((size + 7) // 8)
+    for i in indices:
+        bitmap[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(bitmap, 'little')
+
+
+class WordIndex:
+    """
+    Bit masks over a list of words, where bit i is words[i]
+    """
+    def __init__(self, words):
+        self.words = list(words)
+        self.index = {word: i for i, word in enumerate(self.words)}
+        self.full = (1 << len(self.words)) - 1
+
+        in_position = [{} for _ in range(5)]
+        at_least = {}  # (letter, n) -> words containing letter at least n times
+        for i, word in enumerate(self.words):
+            for pos, let in enumerate(word):
+                in_position[pos].setdefault(let, []).append(i)
+            for let in set(word):
+                for n in range(1, word.count(let) + 1):
+                    at_least.setdefault((let, n), []).append(i)
+
+        size = len(self.words)
+        self.pos_masks = [{let: _mask(idxs, size) for let, idxs in pos.items()}
+                          for pos in in_position]
+        self.count_masks = {key: _mask(idxs, size) for key, idxs in at_least.items()}
+
+    def mask(self, words) -> int:
+        return _mask((self.index[word] for word in words), len(self.words))
+
+    def feedback_mask(self, feedback) -> int:
+        """ Mask of words that are possible answers given the feedback """
+        mask = self.full
+        for i, green in enumerate(feedback.greens):
+            if green:
+                mask &= self.pos_masks[i].get(green, 0)
+        for pos, yellows in enumerate(feedback.yellows):
+            for yel in yellows:
+                mask &= ~self.pos_masks[pos].get(yel[0], 0)
+                mask &= self.count_masks.get((yel[0], len(yel)), 0)
+        for gray in feedback.grays:
+            mask &= ~self.count_masks.get((gray[0], len(gray)), 0)
+        return mask
+
+
+class AnswerPool:
+    """
+    Immutable set of words from a WordIndex, iterated in word list order.
+
+    Behaves like the list of words it holds, so it can be passed anywhere an
+    answer_pool list is expected.
+    """
+    __slots__ = ('word_index', 'bits')
+
+    def __init__(self, word_index, bits=None):
+        self.word_index = word_index
+        self.bits = word_index.full if bits is None else bits
+
+    @classmethod
+    def from_words(cls, word_index, words):
+        return cls(word_index, word_index.mask(words))
+
+    def filter(self, feedback) -> 'AnswerPool':
+        return AnswerPool(self.word_index, self.bits & self.word_index.feedback_mask(feedback))
+
+    def count(self, feedback) -> int:
+        return (self.bits & self.word_index.feedback_mask(feedback)).bit_count()
+
+    def indices(self) -> list:
+        """ Word list indices of the pool, in ascending order """
+        binary = bin(self.bits)[:1:-1]  # least significant bit first
+        idxs = []
+        i = binary.find('1')
+        while i != -1:
+            idxs.append(i)
+            i = binary.find('1', i + 1)
+        return idxs
+
+    def __len__(self):
+        return self.bits.bit_count()
+
+    def __iter__(self):
+        words = self.word_index.words
+        return (words[i] for i in self.indices())
+
+    def __contains__(self, word):
+        i = self.word_index.index.get(word)
+        return i is not None and bool(self.bits >> i & 1)
+
+    def __getitem__(self, i):
+        return self.word_index.words[self.indices()[i]]
+
+    def __eq__(self, other):
+        if isinstance(other, AnswerPool):
+            return self.word_index is other.word_index and self.bits == other.bits
+        return list(self) == other
+
+    def __hash__(self):
+        return hash(self.bits)
+
+    def __repr__(self):
+        return f'AnswerPool({list(self)})'
@@ -0,0 +1,230 @@
+"""
+Benchmarks for the solver's hot paths, with a stored baseline to catch regressions.
+
+    python benchmark_wordle.py run                    # print timings
+    python benchmark_wordle.py save                   # store timings in BASELINE_FILE
+    python benchmark_wordle.py compare --threshold 20 # fail if any benchmark is >20% slower
+
+Each benchmark times a fixed, seeded workload and reports the best of its
+repeats in seconds, which is the least noisy figure on a shared machine.
+Benchmark names can be given after the command to only run those.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+import lib
+
+BASELINE_FILE = 'benchmark_baseline.json'
+DEFAULT_THRESHOLD = 20  # percent slower than baseline that counts as a regression
+SEED = 42
+
+BENCHMARKS = {}
+BUDGETS = {'startup_main': 1.0}  # seconds a benchmark may take whatever the baseline
+
+
+def benchmark(name, repeat=5):
+    """
+    Registers a benchmark. The decorated function does any setup and returns
+    the function to be timed.
+    """
+    def register(setup):
+        BENCHMARKS[name] = (setup, repeat)
+        return setup
+    return register
+
+
+@benchmark('get_guess_feedback')
+def bench_get_guess_feedback():
+    words = lib.get_all_words_list()
+    guesses = random.Random(SEED).sample(words, 5)
+
+    def run():
+        for guess in guesses:
+            for answer in words:
+                lib.get_guess_feedback(guess, answer)
+    return run
+
+
+@benchmark('possible_answer')
+def bench_possible_answer():
+    words = lib.get_all_words_list()
+    f1, f2, f3, f4 = lib.Feedback(), lib.Feedback(), lib.Feedback(), lib.Feedback()
+    f2.greens = ['r', None, None, None, None]
+    f3.yellows[2] = ['ll']
+    f4.grays = set(['z', 'll', 'o'])
+
+    def run():
+        for f in [f1, f2, f3, f4]:
+            for word in words:
+                lib.possible_answer(f, word)
+    return run
+
+
+@benchmark('feedback_merge', repeat=20)
+def bench_feedback_merge():
+    def run():
+        feedbacks = [lib.Feedback(),
+                     lib.get_guess_feedback('azcze', 'abcdd'),  # greens
+                     lib.get_guess_feedback('bcdea', 'abcdd'),  # yellows
+                     lib.get_guess_feedback('dddaa', 'abcdd'),  # multiyels
+                     lib.get_guess_feedback('fghij', 'abcdd')]  # grays
+        for _ in range(20):
+            for fb1 in feedbacks:
+                for fb2 in feedbacks:
+                    fb1.merge(fb2)
+    return run
+
+
+@benchmark('calc_smart_guess_scores')
+def bench_calc_smart_guess_scores():
+    words = lib.get_all_words_list()
+    answers = lib.get_answer_list()[::10]
+    common = lib.CommonLetters(answers)
+    return lambda: common.calc_smart_guess_scores(words)
+
+
+@benchmark('get_approximate_guess_scores', repeat=3)
+def bench_get_approximate_guess_scores():
+    words = lib.get_all_words_list()
+    answers = lib.get_answer_list()[::10]
+    guesses = lib.CommonLetters(answers).get_smart_guesses(words, 20)
+    return lambda: lib.get_approximate_guess_scores(guesses, answers)
+
+
+@benchmark('late_game_scoring')
+def bench_late_game_scoring():
+    """ Smart guesses and full scores for the pools the solver leaves after two guesses """
+    words = lib.get_all_words_list()
+    states = lib.GameStates()
+    for _ in lib.iter_games(random.Random(SEED).sample(lib.get_answer_list(), 100),
+                            states=states):
+        pass
+    pools = [pool for path, (_, pool, _) in states.states.items()
+             if len(path) == 4 and len(pool) >= 3]
+
+    def run():
+        for pool in pools:
+            lib.filter_guess_pool(words, pool, 100)
+            lib.search_best_guess(words, pool, full_scoring=True, exact_cutoff=0)
+    return run
+
+
+@benchmark('find_exact_best_guess', repeat=3)
+def bench_find_exact_best_guess():
+    words = lib.get_all_words_list()
+    answers = ['smile', 'frown', 'catch', 'great', 'throw', 'smash']
+    smart_guesses = lib.filter_guess_pool(words, answers, 20)
+    return lambda: lib.find_exact_best_guess(words, answers, smart_guesses=smart_guesses)
+
+
+@benchmark('solve_sample', repeat=1)
+def bench_solve_sample():
+    answers = random.Random(SEED).sample(lib.get_answer_list(), 10)
+
+    def run():
+        for answer in answers:  # one game at a time, as the old turn loop did
+            lib.solve_games([answer])
+    return run
+
+
+@benchmark('solve_games_batch', repeat=1)
+def bench_solve_games_batch():
+    answers = random.Random(SEED).sample(lib.get_answer_list(), 50)
+    return lambda: lib.solve_games(answers)
+
+
+@benchmark('startup_main')
+def bench_startup_main():
+    """ Time from starting `python main.py <word>` to it logging its first guess """
+    def run():
+        process = subprocess.Popen([sys.executable, 'main.py', 'crane'],
+                                   cwd=os.path.dirname(os.path.abspath(__file__)),
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        for line in process.stderr:
+            if line.startswith('turn 1 guess'):
+                break
+        process.kill()
+        process.wait()
+    return run
+
+
+def run_benchmarks(names=None) -> dict:
+    """ Returns {name: best time in seconds} """
+    results = {}
+    for name, (setup, repeat) in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        fn = setup()
+        fn()  # warm up caches and the pattern matrix
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+        results[name] = min(times)
+        print(f'{name:32} {results[name]:10.4f} sec')
+    return results
+
+
+def load_baseline(filename=BASELINE_FILE) -> dict:
+    with open(filename) as f:
+        return json.load(f)
+
+
+def save_baseline(results, filename=BASELINE_FILE):
+    with open(filename, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def find_regressions(results, baseline, threshold=DEFAULT_THRESHOLD) -> list:
+    """
+    Returns (name, baseline, current) for benchmarks slower than threshold %,
+    or over their budget in BUDGETS
+    """
+    regressions = []
+    for name, current in results.items():
+        if name in baseline and current > baseline[name] * (1 + threshold / 100):
+            regressions.append((name, baseline[name], current))
+        elif name in BUDGETS and current > BUDGETS[name]:
+            regressions.append((name, BUDGETS[name], current))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks lib.py hot paths')
+    parser.add_argument('command', choices=['run', 'save', 'compare'])
+    parser.add_argument('names', nargs='*', help='only run these benchmarks')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='percent slower than baseline that fails compare')
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.names)
+    if args.command == 'save':
+        # saving some benchmarks keeps the rest of the existing baseline
+        baseline = {}
+        if args.names and os.path.exists(args.baseline):
+            baseline = load_baseline(args.baseline)
+        save_baseline({**baseline, **results}, args.baseline)
+    elif args.command == 'compare':
+        baseline = load_baseline(args.baseline)
+        print()
+        for name, current in results.items():
+            if name in baseline:
+                change = (current / baseline[name] - 1) * 100
+                print(f'{name:32} {baseline[name]:10.4f} -> {current:10.4f} sec  {change:+6.1f}%')
+        regressions = find_regressions(results, baseline, args.threshold)
+        if regressions:
+            print(f'\n{len(regressions)} benchmark(s) regressed by more than {args.threshold}%')
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
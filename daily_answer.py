@@ -0,0 +1,196 @@
+"""
+The official daily Wordle answer, fetched from the New York Times' daily JSON
+over plain HTTP and cached on disk by date, so runs on the same day make no
+request at all.
+
+    python daily_answer.py                                # today's answer
+    python daily_answer.py 2024-08-01                     # a given date's answer
+    python daily_answer.py prefetch 2024-08-01 2024-08-31  # cache a range of dates
+
+Requests time out after TIMEOUT seconds and are retried with backoff on
+connection errors and server errors. If plain HTTP fails, e.g. the site
+refuses the request, a headless Chrome is tried when selenium is installed.
+requests and selenium are imported only when a request is made.
+"""
+import datetime
+import json
+import logging
+import os
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+URL = 'https://www.nytimes.com/svc/wordle/v2/{date}.json'
+CACHE_DIR = 'daily_answers'
+TIMEOUT = 5  # seconds per request
+RETRIES = 3
+BACKOFF = 0.5  # seconds before the first retry, doubling after each
+HEADERS = {'User-Agent': 'Mozilla/5.0 (wordle-solver)', 'Accept': 'application/json'}
+
+
+class FetchError(Exception):
+    pass
+
+
+def date_string(date=None) -> str:
+    """ 'YYYY-MM-DD' of date, a datetime.date or string, default today """
+    if date is None:
+        date = datetime.date.today()
+    if isinstance(date, str):
+        date = datetime.date.fromisoformat(date)
+    return date.isoformat()
+
+
+def cache_path(date, cache_dir=CACHE_DIR) -> str:
+    return os.path.join(cache_dir, f'{date_string(date)}.json')
+
+
+def load_cached(date, cache_dir=CACHE_DIR):
+    """ Returns the cached daily JSON for date, or None """
+    try:
+        with open(cache_path(date, cache_dir)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_cached(date, data, cache_dir=CACHE_DIR):
+    """ Writes data through a temporary file, so a crash never leaves half a file """
+    os.makedirs(cache_dir, exist_ok=True)
+    filename = cache_path(date, cache_dir)
+    with open(filename + '.tmp', 'w') as f:
+        json.dump(data, f)
+    os.replace(filename + '.tmp', filename)
+
+
+def fetch_json(date, url=URL, timeout=TIMEOUT, retries=RETRIES, backoff=BACKOFF) -> dict:
+    """
+    Requests the daily JSON for date, retrying connection errors, timeouts and
+    5xx responses. Raises FetchError if every attempt fails or the response
+    isn't a daily answer.
+    """
+    import requests
+
+    url = url.format(date=date_string(date))
+    error = None
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(backoff * 2 ** (attempt - 1))
+        try:
+            response = requests.get(url, headers=HEADERS, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = e
+            logger.info(f'request for {url} failed: {e}')
+            continue
+        if response.status_code >= 500:
+            error = f'HTTP {response.status_code}'
+            logger.info(f'request for {url} failed: {error}')
+            continue
+        if response.status_code != 200:
+            raise FetchError(f'{url} returned HTTP {response.status_code}')
+        try:
+            data = response.json()
+        except ValueError:
+            raise FetchError(f'{url} did not return JSON')
+        return check_daily(data, url)
+    raise FetchError(f'{url} failed after {retries + 1} attempts: {error}')
+
+
+def fetch_with_browser(date, url=URL) -> dict:
+    """ Reads the daily JSON through a headless Chrome """
+    try:
+        from bs4 import BeautifulSoup
+        from selenium import webdriver
+        from selenium.common.exceptions import WebDriverException
+        from selenium.webdriver.chrome.options import Options
+    except ImportError as e:
+        raise FetchError(f'selenium fallback is unavailable: {e}')
+
+    url = url.format(date=date_string(date))
+    options = Options()
+    options.add_argument('--incognito')
+    options.add_argument('disable-popup-blocking')
+    options.add_argument('--headless')  # invisible browser
+    try:
+        driver = webdriver.Chrome(options=options)
+    except WebDriverException as e:
+        raise FetchError(f'headless Chrome failed to start: {e.msg}')
+    try:
+        driver.get(url)
+        soup = BeautifulSoup(driver.page_source, features="html.parser")
+        data = json.loads(soup.find("body").text)
+    except ValueError:
+        raise FetchError(f'{url} did not return JSON')
+    finally:
+        driver.quit()
+    return check_daily(data, url)
+
+
+def check_daily(data, url) -> dict:
+    if not isinstance(data, dict) or 'solution' not in data or 'days_since_launch' not in data:
+        raise FetchError(f'{url} is not a daily answer')
+    return data
+
+
+def get_daily(date=None, cache_dir=CACHE_DIR, url=URL, use_browser=True,
+              **request_options) -> dict:
+    """
+    Returns the daily JSON for date, default today, from the cache or else
+    fetched and cached. request_options are passed on to fetch_json().
+    """
+    data = load_cached(date, cache_dir)
+    if data is not None:
+        return data
+    try:
+        data = fetch_json(date, url, **request_options)
+    except FetchError as e:
+        if not use_browser:
+            raise
+        logger.warning(f'{e}, trying a headless browser')
+        data = fetch_with_browser(date, url)
+    save_cached(date, data, cache_dir)
+    return data
+
+
+def get_answer_and_id(date=None, **options) -> list:
+    """ Returns [answer, wordle id] for date, default today, see get_daily() """
+    data = get_daily(date, **options)
+    return [data['solution'], data['days_since_launch']]
+
+
+def prefetch(start, end, **options) -> dict:
+    """
+    Caches the daily JSON of every date from start to end inclusive.
+    Returns {date: answer, or the FetchError for dates that failed}.
+    """
+    start = datetime.date.fromisoformat(date_string(start))
+    end = datetime.date.fromisoformat(date_string(end))
+    results = {}
+    for days in range((end - start).days + 1):
+        date = date_string(start + datetime.timedelta(days=days))
+        try:
+            results[date] = get_daily(date, **options)['solution']
+        except FetchError as e:
+            results[date] = e
+    return results
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    if argv[:1] == ['prefetch']:
+        if len(argv) != 3:
+            print('usage: python daily_answer.py prefetch START END')
+            return 2
+        results = prefetch(argv[1], argv[2], use_browser=False)
+        for date, answer in results.items():
+            print(f'{date}  {answer}')
+        return 1 if any(isinstance(a, FetchError) for a in results.values()) else 0
+    answer, wordle_id = get_answer_and_id(argv[0] if argv else None)
+    print(f'{answer} (wordle {wordle_id})')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""
+Exact evaluation of the solver's policy over the whole answer list.
+
+Rather than playing each answer as a separate game, the policy is walked as a
+tree (see strategy_book.build_book()): answers that get the same pattern share
+a branch, so the next guess is found once per branch. The per answer guesses
+are the same as get_analytics.py gives. They can be saved as a JSON dict of
+{answer: guesses}, kept apart from analytics.jsonl as there are no solve times.
+
+    python evaluate_policy.py          # mean turns, worst case and histogram
+    python evaluate_policy.py --book   # evaluate the saved strategy book instead
+    python evaluate_policy.py --output policy.json  # also save the guesses
+"""
+import argparse
+import json
+import os
+import time
+from collections import Counter
+
+import lib
+import strategy_book
+
+
+def evaluate(guess_pool=None, answer_pool=None, root=None, **solver_options) -> dict:
+    """
+    Returns {answer: guesses} for every answer in answer_pool, walking root if
+    given, otherwise building the policy tree from guess_pool and answer_pool.
+    solver_options are passed on to find_best_guess().
+    """
+    if guess_pool is None:
+        guess_pool = lib.get_all_words_list()
+    if answer_pool is None:
+        answer_pool = lib.get_answer_list()
+    if root is None:
+        root = strategy_book.build_book(guess_pool, answer_pool, **solver_options)
+    return {answer: strategy_book.follow(root, answer) for answer in answer_pool}
+
+
+def summarise(results) -> dict:
+    """ Mean and worst number of guesses, and a histogram, of solved games """
+    histogram = Counter()
+    failed = []
+    for answer, guesses in results.items():
+        if guesses[-1] == answer:
+            histogram[len(guesses)] += 1
+        else:
+            failed.append(answer)
+    solved = sum(histogram.values())
+    return {
+        'answers': len(results),
+        'mean': sum(k*v for k, v in histogram.items()) / solved if solved else None,
+        'worst': max(histogram, default=None),
+        'histogram': dict(sorted(histogram.items())),
+        'failed': failed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Evaluates the solver over every answer')
+    parser.add_argument('--book', action='store_true',
+                        help=f'evaluate {strategy_book.BOOK_FILE} rather than building the tree')
+    parser.add_argument('--output', help='also save each answer\'s guesses to this JSON file')
+    args = parser.parse_args()
+
+    guess_pool = lib.get_all_words_list()
+    answer_pool = lib.get_answer_list()
+    root = None
+    if args.book:
+        root = strategy_book.load_book(guess_pool, answer_pool)
+        if root is None:
+            parser.error(f'{strategy_book.BOOK_FILE} is missing or out of date')
+
+    start = time.perf_counter()
+    results = evaluate(guess_pool, answer_pool, root)
+    summary = summarise(results)
+    print(f'evaluated {summary["answers"]} answers in {time.perf_counter() - start:.1f} sec')
+    print(f'mean guesses {summary["mean"]:.4f}, worst case {summary["worst"]}')
+    for num_guesses, count in summary['histogram'].items():
+        print(f'{num_guesses:3} {count:6}')
+    if summary['failed']:
+        print(f'failed to solve {summary["failed"]}')
+
+    if args.output:
+        tmp = f'{args.output}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(results, f)
+        os.replace(tmp, args.output)
+
+
+if __name__ == '__main__':
+    main()
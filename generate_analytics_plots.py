@@ -1,15 +1,17 @@
 import matplotlib.pyplot as plt
-import json
 from collections import Counter
 import numpy as np
-
-with open('analytics.txt', 'r') as f:
-    data = json.load(f)
+import os
+import analytics_log
 
 all_times = []
 no_guesses = Counter()
 
-for entry in data.values():
+# a fresh checkout only has the committed analytics.txt
+if not os.path.exists(analytics_log.LOG_FILE):
+    analytics_log.import_analytics()
+
+for _, entry in analytics_log.read_log():  # streamed a line at a time
     all_times.append(entry['time'])
     no_guesses[entry['num_guesses']] += 1
 
@@ -1,60 +1,169 @@
 import lib
+import guess_cache
+import patterns
+import strategy_book
+import analytics_log
+from solver_stats import stats
 import logging
-import json, os
+import os
 import time
+import argparse
+import multiprocessing
+import signal
 
 """
-Solves the wordle for every possible answer and stores to analytics.txt in a giant dict. For performances testing i.e. finding average no. guesses per solve. 
+Solves the wordle for every possible answer and appends each result to analytics.jsonl as it is solved (see analytics_log.py). For performances testing i.e. finding average no. guesses per solve.
 
-Supports safe ctrl+c quitting during runtime, storing work done during execution in analytics.txt
+Supports safe ctrl+c quitting during runtime, as work done is already in analytics.jsonl, and a later run resumes by skipping the answers logged there
+
+Answers are solved with lib.iter_games(), which shares solver work between games
+that reach the same state. With --workers > 1 (default: one per core) answers
+are grouped by their first turn pattern and each group is solved as one batch by
+a worker. Workers are forked after the word lists and pattern matrix are loaded,
+so they share them rather than each loading a copy.
+
+--book follows the precomputed strategy book (see strategy_book.py) when it
+matches the word lists, falling back to live search otherwise.
+
+--metrics stores the solver statistics (see solver_stats.py) of each game in
+its entry under "metrics".
+
+--time-budget caps the seconds each guess is searched for (see
+lib.search_best_guess()), storing the search level each guess reached in its
+entry under "levels".
+
+Best guesses are read from and stored to the guess cache (see guess_cache.py),
+shared by every worker and by later runs, with its hit rate printed at the end.
+--no-cache searches every guess.
 """
 
-guess_pool = lib.get_all_words_list()
-answer_pool = lib.get_answer_list()
+guess_pool = None
+book = None
+solver_options = {}
+cache = None
+
+
+def load_word_data(use_book=False):
+    """ Loads everything the solver reads, before any workers are forked """
+    global guess_pool, book
+    guess_pool = lib.get_all_words_list()
+    lib.get_pattern_matrix()
+    lib.get_letter_index()  # also loads the word store the full scoring slices
+    book = strategy_book.load_book(guess_pool, lib.get_answer_list()) if use_book else None
+
+
+def solve(answers):
+    """
+    Plays a game against each of answers in one lib.solve_games() batch,
+    returns a list of (answer, analytics entry) and the guess cache's hits and
+    misses for the batch
+    """
+    hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+    results = list(lib.iter_games(answers, guess_pool, book=book, cache=cache,
+                                  **solver_options))
+    if cache is not None:
+        hits, misses = cache.hits - hits, cache.misses - misses
+    return results, hits, misses
+
 
-with open('analytics.txt', 'r') as f:
-    answer_guesses = json.load(f)
-solved_answers = set(answer_guesses.keys())
+def group_answers(answers) -> list:
+    """
+    Groups answers by their pattern against the first guess. Answers in a group
+    share every solver state after the first turn, so each group is solved as
+    one batch by one worker.
+    """
+    groups = {}
+    for answer in answers:
+        groups.setdefault(patterns.get_pattern(lib.FIRST_GUESS, answer), []).append(answer)
+    # largest groups first so no worker is left with a big one at the end
+    return sorted(groups.values(), key=len, reverse=True)
 
-not_solved = set(answer_pool) - solved_answers
-i = 0
 
-while not_solved:
+def _ignore_sigint():
+    # ctrl+c is handled by the parent, which checkpoints and stops the pool
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def run(workers, filename=analytics_log.LOG_FILE, answers=None, use_book=False,
+        metrics=False, time_budget=None, cache_file=None):
+    """
+    Solves every answer (or those given) not already in the log at filename,
+    using the guess cache at cache_file if given.
+    Returns the number of answers solved.
+    """
+    global solver_options, cache
+    load_word_data(use_book)
+    solver_options = {'time_budget': time_budget} if time_budget is not None else {}
+    cache = None
+    if cache_file is not None:
+        cache = guess_cache.open_cache(guess_pool, lib.get_answer_list(), cache_file,
+                                       **solver_options)
+    if metrics:
+        stats.enable()  # before forking so the workers collect too
+    if answers is None:
+        answers = lib.get_answer_list()
+    not_solved = sorted(set(answers) - analytics_log.solved_answers(filename))
+
+    pool = None
+    cache_counts = [0, 0]  # guess cache hits and misses in the workers
+
+    def batch_results(batches):
+        for results, hits, misses in batches:
+            cache_counts[0] += hits
+            cache_counts[1] += misses
+            yield from results
+
+    if workers > 1:
+        pool = multiprocessing.get_context('fork').Pool(workers, initializer=_ignore_sigint)
+        results = batch_results(pool.imap_unordered(solve, group_answers(not_solved)))
+    else:
+        results = lib.iter_games(not_solved, guess_pool, book=book, cache=cache,
+                                 **solver_options)
+
     start = time.perf_counter()
-    ANSWER = not_solved.pop()
-    turn = 0
-    solved = False
-    feedback = lib.Feedback()
-    guesses = []
-    answer_pool = lib.get_answer_list()
-    while not solved and turn <= 6:
-        if turn == 0:
-            guess = 'roate'
-        else:
-            guess = lib.find_best_guess(guess_pool, answer_pool, feedback, set(guesses))
-        guesses.append(guess)
-        if guess == ANSWER:
-            solved = True
-        else:
-            new_feedback = lib.get_guess_feedback(guess, ANSWER)
-            feedback.merge(new_feedback)
-            answer_pool = lib.get_possible_answers(feedback, answer_pool)
-        turn += 1
-    end = time.perf_counter()
-    time_taken = end - start
-    print(f'Answer was {ANSWER}, guessed {guesses}, {len(not_solved)} to solve')
-    
-    answer_guesses[ANSWER] = {
-        "guesses": guesses, 
-        "num_guesses": len(guesses),
-        "time": round(time_taken, 3)
-        }
-
-    guesses
-    if i%10 == 0 or not not_solved:
-        print('writing to analytics.txt...')
-        with open('analytics_tmp.txt', 'w') as f:
-            json.dump(answer_guesses, f)
-        os.replace('analytics_tmp.txt', 'analytics.txt')
-    i += 1
+    i = 0
+    log = analytics_log.AnalyticsLog(filename)
+    try:
+        for ANSWER, entry in results:
+            log.append(ANSWER, entry)
+            i += 1
+            rate = i / (time.perf_counter() - start)
+            print(f'Answer was {ANSWER}, guessed {entry["guesses"]}, '
+                  f'{len(not_solved) - i} to solve, {rate:.2f} answers/sec')
+    except KeyboardInterrupt:
+        print('stopping...')
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+        log.close()
+        if metrics:
+            stats.disable()
+        if cache is not None:
+            cache.hits += cache_counts[0]
+            cache.misses += cache_counts[1]
+            print(cache.report())
+    return i
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Solves every answer into analytics.jsonl')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='processes to solve answers with, 1 solves serially')
+    parser.add_argument('--book', action='store_true',
+                        help=f'follow {strategy_book.BOOK_FILE} instead of searching live')
+    parser.add_argument('--metrics', action='store_true',
+                        help='store solver statistics with each answer')
+    parser.add_argument('--time-budget', type=float, metavar='SECONDS',
+                        help='most seconds to search for each guess')
+    parser.add_argument('--no-cache', action='store_true',
+                        help=f'search every guess rather than using {guess_cache.CACHE_FILE}')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format='%(message)s')
+    run(args.workers, use_book=args.book, metrics=args.metrics,
+        time_budget=args.time_budget,
+        cache_file=None if args.no_cache else guess_cache.CACHE_FILE)
+
 
+if __name__ == '__main__':
+    main()
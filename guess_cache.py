@@ -0,0 +1,148 @@
+"""
+Persistent cache of the solver's best guess for each game state, shared
+between runs and between processes.
+
+A state is the answer pool left, the feedback so far and the guesses tried,
+which is everything find_best_guess() reads. Each entry is also keyed by a hash
+of the word lists, solver settings and lib.SOLVER_VERSION, so entries from
+other lists, settings or versions of the solver are ignored rather than
+returned.
+
+The cache is a SQLite database in WAL mode, so analytics workers can read and
+write it at once. Each process opens its own connection on first use, so a
+GuessCache made before forking workers is safe to use in them.
+
+    python guess_cache.py stats   # entries for the current word lists and others
+    python guess_cache.py clear   # delete every entry
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+
+import lib
+
+CACHE_FILE = 'guess_cache.sqlite'
+BUSY_TIMEOUT = 30  # seconds to wait for another process's write to finish
+IGNORED_OPTIONS = {'workers'}  # solver options that don't change the guess
+
+
+def settings_key(guess_pool, answer_pool, **solver_options) -> str:
+    """ Hash of the word lists, solver settings and solver version a guess depends on """
+    options = {k: v for k, v in solver_options.items()
+               if v is not None and k not in IGNORED_OPTIONS}
+    sha = hashlib.sha256()
+    sha.update('\n'.join(guess_pool).encode())
+    sha.update(b'|')
+    sha.update('\n'.join(answer_pool).encode())
+    sha.update(json.dumps(sorted(options.items())).encode())
+    sha.update(f'|{lib.SOLVER_VERSION}'.encode())
+    return sha.hexdigest()
+
+
+def state_key(answer_pool, feedback, guesses_tried) -> str:
+    """ Canonical key of a solver state, whatever order it was reached in """
+    sha = hashlib.sha256()
+    sha.update('\n'.join(sorted(answer_pool)).encode())
+    sha.update(f'|{lib.PackedFeedback.from_feedback(feedback).key:x}|'.encode())
+    sha.update(','.join(sorted(guesses_tried)).encode())
+    return sha.hexdigest()
+
+
+class GuessCache:
+    """
+    Best guesses by state for one settings_key(). hits and misses count this
+    process's lookups.
+    """
+    def __init__(self, filename=CACHE_FILE, settings=''):
+        self.filename = filename
+        self.settings = settings
+        self.hits = 0
+        self.misses = 0
+        self._connection = None
+        self._pid = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._pid != os.getpid():  # never share a connection with a forked parent
+            self._connection = connect(self.filename)
+            self._pid = os.getpid()
+        return self._connection
+
+    def get(self, answer_pool, feedback, guesses_tried):
+        """ Returns (guess, level) stored for the state, or None """
+        row = self.connection.execute(
+            'SELECT guess, level FROM guesses WHERE settings = ? AND state = ?',
+            (self.settings, state_key(answer_pool, feedback, guesses_tried))).fetchone()
+        if row is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return row
+
+    def put(self, answer_pool, feedback, guesses_tried, guess, level):
+        with self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO guesses VALUES (?, ?, ?, ?)',
+                (self.settings, state_key(answer_pool, feedback, guesses_tried),
+                 guess, level))
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else None
+
+    def report(self) -> str:
+        if self.hit_rate is None:
+            return 'guess cache: no lookups'
+        return (f'guess cache: {self.hits} hits, {self.misses} misses, '
+                f'{self.hit_rate:.1%} hit rate')
+
+    def close(self):
+        if self._connection is not None and self._pid == os.getpid():
+            self._connection.close()
+        self._connection = None
+        self._pid = None
+
+
+def connect(filename=CACHE_FILE) -> sqlite3.Connection:
+    connection = sqlite3.connect(filename, timeout=BUSY_TIMEOUT)
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('PRAGMA synchronous=NORMAL')
+    connection.execute('CREATE TABLE IF NOT EXISTS guesses ('
+                       'settings TEXT, state TEXT, guess TEXT, level TEXT, '
+                       'PRIMARY KEY (settings, state))')
+    return connection
+
+
+def delete_settings(settings, filename=CACHE_FILE) -> int:
+    """ Deletes the entries of a settings_key(), returning how many there were """
+    connection = connect(filename)
+    try:
+        with connection:
+            return connection.execute('DELETE FROM guesses WHERE settings = ?',
+                                      (settings,)).rowcount
+    finally:
+        connection.close()
+
+
+def open_cache(guess_pool, answer_pool, filename=CACHE_FILE, **solver_options) -> GuessCache:
+    """ The GuessCache for the word lists and solver settings given """
+    return GuessCache(filename, settings_key(guess_pool, answer_pool, **solver_options))
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'stats'
+    connection = connect()
+    if command == 'clear':
+        with connection:
+            connection.execute('DELETE FROM guesses')
+        print(f'cleared {CACHE_FILE}')
+    else:
+        current = settings_key(lib.get_all_words_list(), lib.get_answer_list())
+        for settings, count in connection.execute(
+                'SELECT settings, COUNT(*) FROM guesses GROUP BY settings'):
+            label = 'current word lists, default settings' if settings == current else 'other'
+            print(f'{settings[:12]}  {count:8} entries  ({label})')
+    connection.close()
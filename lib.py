@@ -1,9 +1,9 @@
-import requests
 import logging
 import math
-from collections import Counter
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
+import os
+from collections import Counter, OrderedDict
+# requests, selenium and bs4 are slow to import and only needed to go online,
+# so they're imported in the functions that use them
 # from selenium.webdriver.common.keys import Keys
 # from selenium.webdriver.support.ui import WebDriverWait
 # from selenium.webdriver.common.by import By
@@ -11,9 +11,17 @@ from selenium.webdriver.chrome.options import Options
 # from selenium.common.exceptions import TimeoutException
 # from selenium.webdriver import ActionChains
 # from datetime import datetime
-from bs4 import BeautifulSoup
-import json
+import concurrent.futures
+import functools
+import multiprocessing
+import signal
 import time
+import numpy as np
+import daily_answer
+import patterns
+from answer_pool import AnswerPool, WordIndex
+import word_store
+from solver_stats import stats
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +35,7 @@ LOCAL_ANSWERS = 'answers.txt'  # possible answers
 
 
 def fetch_remote_word_list():
+    import requests
     try:
         response = requests.get(URL, timeout=1)
         return response
@@ -41,19 +50,24 @@ def write_remote_word_list(response):
 
 
 def check_remote_local_words_match():
-    with open(REMOTE_WORDS) as f:
-        remote = f.readlines()
-    with open(LOCAL_WORDS) as f:
-        local = f.readlines()
-    return local == remote
+    return patterns.files_hash(REMOTE_WORDS) == patterns.files_hash(LOCAL_WORDS)
+
+
+_word_lists = {}  # filename -> (mtime, size, words)
 
 
 def get_word_list(filename):
-    with open(filename) as f:
-        words = f.readlines()
-    for i, x in enumerate(words):
-        words[i] = x.strip()
-    return words
+    """
+    Returns the words in filename, parsed once per process and parsed again
+    only if the file has changed since
+    """
+    stat = os.stat(filename)
+    cached = _word_lists.get(filename)
+    if cached is None or cached[:2] != (stat.st_mtime_ns, stat.st_size):
+        with open(filename) as f:
+            words = f.read().split()
+        cached = _word_lists[filename] = (stat.st_mtime_ns, stat.st_size, words)
+    return list(cached[2])  # a copy, as callers may change their list
 
 def get_answer_list():  # noqa
     return get_word_list(LOCAL_ANSWERS)
@@ -65,6 +79,110 @@ def get_all_words_list():  # noqa
     return get_word_list(LOCAL_WORDS)
 
 
+_pattern_matrix = None
+
+
+def get_pattern_matrix():
+    """
+    Returns the memory-mapped words x answers pattern matrix, loaded once per
+    process and rebuilt first if words.txt or answers.txt have changed
+    """
+    global _pattern_matrix
+    if _pattern_matrix is None:
+        _pattern_matrix = patterns.load_pattern_matrix(LOCAL_WORDS, LOCAL_ANSWERS)
+    return _pattern_matrix
+
+
+_word_store = None
+
+
+def get_word_store():
+    """
+    Returns the memory-mapped word store of words.txt, loaded once per process
+    and rebuilt first if words.txt has changed
+    """
+    global _word_store
+    if _word_store is None:
+        _word_store = word_store.load_word_store(LOCAL_WORDS, get_answer_list())
+    return _word_store
+
+
+def is_index_pool(pool) -> bool:
+    """ True for pools of word store indices rather than words """
+    return isinstance(pool, np.ndarray)
+
+
+_word_index = None
+
+
+def get_word_index():
+    """ Returns bitset masks over words.txt, built once per process """
+    global _word_index
+    if _word_index is None:
+        _word_index = WordIndex(get_all_words_list())
+    return _word_index
+
+
+_letter_index = None
+
+
+def get_letter_index() -> word_store.LetterIndex:
+    """ Returns the inverted letter index of the word store, built once per process """
+    global _letter_index
+    if _letter_index is None:
+        _letter_index = word_store.LetterIndex(get_word_store().letters)
+    return _letter_index
+
+
+def get_store_indices(words) -> np.ndarray:
+    """ Returns the word store index of each of words, -1 for words not in the store """
+    index = get_word_store().index
+    return np.fromiter((index.get(word, -1) for word in words),
+                       dtype=word_store.INDEX_DTYPE, count=len(words))
+
+
+_pool_indices = (None, None)  # (last list given to get_guess_pool_indices(), its indices)
+
+
+def get_guess_pool_indices(guess_pool) -> np.ndarray:
+    """
+    get_store_indices() of a guess pool. The indices of the last list are
+    kept, as the guess pool is the same list every turn.
+    """
+    global _pool_indices
+    cached, indices = _pool_indices
+    if cached is guess_pool and len(indices) == len(guess_pool):
+        return indices
+    indices = get_store_indices(guess_pool)
+    if isinstance(guess_pool, list):
+        _pool_indices = (guess_pool, indices)
+    return indices
+
+
+def reload_word_data():
+    """
+    Drops the word data loaded in this process, so it is loaded again from the
+    files on next use, e.g. after word_sync.py has changed words.txt
+    """
+    global _pattern_matrix, _word_store, _word_index, _letter_index, _pool_indices
+    global _store_letter_arrays, _store_letter_counts
+    _word_lists.clear()
+    _pattern_matrix = _word_store = _word_index = _letter_index = None
+    _pool_indices = (None, None)
+    _store_letter_arrays = _store_letter_counts = None
+    _common_letters.clear()
+
+
+def get_answer_pool(words=None) -> AnswerPool:
+    """
+    Returns a bitset AnswerPool of words, or of every possible answer.
+    Words must be in words.txt.
+    """
+    if words is None:
+        words = get_answer_list()
+    return AnswerPool.from_words(get_word_index(), words)
+
+
 class Feedback:
     """
     Manages information gained from wordle guesses
@@ -115,8 +233,205 @@ class Feedback:
         ))
 
 
+_YELLOW_SHIFT = 25  # 5 bits per green position
+_GRAY_SHIFT = _YELLOW_SHIFT + 3*26*5  # 3 bits per letter per yellow position
+
+
+class PackedFeedback:
+    """
+    Immutable integer form of a Feedback, so hashing and equality are
+    single integer operations.
+
+    The key packs greens (5 bits per position), yellows (3 bits per letter per
+    position holding the longest repeat, as merge() keeps) and grays (a bit per
+    letter per repeat length).
+    """
+    __slots__ = ('key',)
+
+    def __init__(self, key):
+        object.__setattr__(self, 'key', key)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('PackedFeedback is immutable')
+
+    @classmethod
+    def from_feedback(cls, feedback):
+        key = 0
+        for i, green in enumerate(feedback.greens):
+            if green:
+                key |= (ord(green) - 96) << (5*i)
+        for pos, yellows in enumerate(feedback.yellows):
+            for yel in yellows:
+                shift = _YELLOW_SHIFT + 3*(26*pos + ord(yel[0]) - 97)
+                if len(yel) > (key >> shift) & 7:
+                    key = (key & ~(7 << shift)) | (len(yel) << shift)
+        for gray in feedback.grays:
+            key |= 1 << (_GRAY_SHIFT + 5*(ord(gray[0]) - 97) + len(gray) - 1)
+        return cls(key)
+
+    @classmethod
+    def from_pattern(cls, guess, pattern, existing_feedback=None):
+        """ Packs the feedback of a single guess's pattern code """
+        feedback = feedback_from_pattern(guess, pattern)
+        if existing_feedback:
+            feedback.merge(existing_feedback)
+        return cls.from_feedback(feedback)
+
+    def to_feedback(self) -> 'Feedback':
+        feedback = Feedback()
+        for i in range(5):
+            green = (self.key >> (5*i)) & 31
+            if green:
+                feedback.greens[i] = chr(green + 96)
+        yellows = self.key >> _YELLOW_SHIFT
+        for field in range(26*5):
+            length = (yellows >> (3*field)) & 7
+            if length:
+                pos, let = divmod(field, 26)
+                feedback.yellows[pos].append(chr(let + 97) * length)
+        grays = self.key >> _GRAY_SHIFT
+        for field in range(26*5):
+            if (grays >> field) & 1:
+                let, length = divmod(field, 5)
+                feedback.grays.add(chr(let + 97) * (length + 1))
+        return feedback
+
+    def __eq__(self, other):
+        return isinstance(other, PackedFeedback) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __repr__(self):
+        return f'PackedFeedback({self.key:#x})'
+
+
+_ALL_LETTERS = (1 << 26) - 1
+
+
+@functools.lru_cache(maxsize=None)
+def encode_word(word) -> tuple:
+    """ Returns (letter numbers 0-25 by position, count of each of the 26 letters) """
+    codes = tuple(ord(let) - 97 for let in word)
+    counts = [0] * 26
+    for code in codes:
+        counts[code] += 1
+    return codes, tuple(counts)
+
+
+class Constraints:
+    """
+    Feedback as constraint vectors: the green letter number of each position
+    (-1 if unknown), the minimum count of each letter yellow in each position,
+    and the maximum count of each letter from grays.
+
+    From those come a bitmask of allowed letters for each position and min / max
+    counts of each letter, so checking a word encoded by encode_word() is a few
+    integer comparisons and whole pools are filtered with numpy.
+    Converts to and from Feedback, keeping every gray that still constrains.
+    """
+    __slots__ = ('greens', 'yellows', 'max_counts', 'allowed', 'min_counts', 'bounds')
+
+    def __init__(self, greens=None, yellows=None, max_counts=None):
+        self.greens = np.full(5, -1, dtype=np.int8) if greens is None else greens
+        self.yellows = np.zeros((5, 26), dtype=np.int8) if yellows is None else yellows
+        self.max_counts = np.full(26, 5, dtype=np.int8) if max_counts is None else max_counts
+        self._derive()
+
+    def _derive(self):
+        self.min_counts = self.yellows.max(axis=0)
+        self.allowed = []
+        for pos in range(5):
+            if self.greens[pos] >= 0:
+                self.allowed.append(1 << int(self.greens[pos]))
+            else:
+                excluded = sum(1 << int(let) for let in np.flatnonzero(self.yellows[pos]))
+                self.allowed.append(_ALL_LETTERS & ~excluded)
+        # (letter, min, max) of each letter with a count constraint
+        self.bounds = [(let, int(self.min_counts[let]), int(self.max_counts[let]))
+                       for let in np.flatnonzero((self.min_counts > 0) | (self.max_counts < 5))]
+
+    @classmethod
+    def from_feedback(cls, feedback):
+        constraints = cls()
+        for i, green in enumerate(feedback.greens):
+            if green:
+                constraints.greens[i] = ord(green) - 97
+        for pos, yellows in enumerate(feedback.yellows):
+            for yel in yellows:
+                let = ord(yel[0]) - 97
+                constraints.yellows[pos, let] = max(constraints.yellows[pos, let], len(yel))
+        for gray in feedback.grays:
+            let = ord(gray[0]) - 97
+            constraints.max_counts[let] = min(constraints.max_counts[let], len(gray) - 1)
+        constraints._derive()
+        return constraints
+
+    def to_feedback(self) -> Feedback:
+        feedback = Feedback()
+        for i, green in enumerate(self.greens):
+            if green >= 0:
+                feedback.greens[i] = chr(green + 97)
+        for pos, let in zip(*np.nonzero(self.yellows)):
+            feedback.yellows[pos].append(chr(let + 97) * int(self.yellows[pos, let]))
+        for let in np.flatnonzero(self.max_counts < 5):
+            feedback.grays.add(chr(let + 97) * (int(self.max_counts[let]) + 1))
+        return feedback
+
+    def merge(self, other):
+        """ Add other's constraints to self, like Feedback.merge() """
+        known = (self.greens >= 0) & (other.greens >= 0)
+        if (self.greens[known] != other.greens[known]).any():
+            raise ValueError('Unmatching green lets during feedback merge')
+        self.greens = np.maximum(self.greens, other.greens)
+        self.yellows = np.maximum(self.yellows, other.yellows)
+        self.max_counts = np.minimum(self.max_counts, other.max_counts)
+        self._derive()
+
+    def allows(self, word) -> bool:
+        """ Same as possible_answer() for the Feedback these constraints came from """
+        codes, counts = encode_word(word)
+        allowed = self.allowed
+        if not (allowed[0] >> codes[0] & allowed[1] >> codes[1] & allowed[2] >> codes[2]
+                & allowed[3] >> codes[3] & allowed[4] >> codes[4] & 1):
+            return False
+        for let, low, high in self.bounds:
+            if not low <= counts[let] <= high:
+                return False
+        return True
+
+    def filter_mask(self, pool) -> np.ndarray:
+        """ Boolean array of the words of a pool (or index pool) that are allowed """
+        codes, counts = get_letter_counts(pool)
+        allowed = np.array([[(mask >> let) & 1 for let in range(26)] for mask in self.allowed],
+                           dtype=bool)
+        keep = allowed[np.arange(5), codes].all(axis=1)
+        if self.bounds:
+            lets, lows, highs = (np.array(column) for column in zip(*self.bounds))
+            lets_counts = counts[:, lets]
+            keep &= ((lets_counts >= lows) & (lets_counts <= highs)).all(axis=1)
+        return keep
+
+    def filter(self, pool):
+        """ The allowed words of a pool, as an index pool for index pools """
+        keep = self.filter_mask(pool)
+        if is_index_pool(pool):
+            return pool[keep]
+        return [word for word, kept in zip(pool, keep) if kept]
+
+    def __eq__(self, other):
+        return (isinstance(other, Constraints) and (self.greens == other.greens).all()
+                and (self.yellows == other.yellows).all()
+                and (self.max_counts == other.max_counts).all())
+
+    def __hash__(self):
+        return hash((self.greens.tobytes(), self.yellows.tobytes(), self.max_counts.tobytes()))
+
+
 def get_guess_feedback(guess, answer) -> Feedback:
     """ Compares guess to answer and returns feedback """
+    if stats.enabled:
+        stats.count('get_guess_feedback')
     feedback = Feedback()
 
     def yellow_or_gray():
@@ -125,7 +440,7 @@ def get_guess_feedback(guess, answer) -> Feedback:
         guess contains more repeats of letter than answer. In a Wordle,
         yellows are assigned in order i.e. first come first served.
         """
-        greens_count = sum(1 for j in range(5) if guess[j] == answer[j])
+        greens_count = sum(1 for j in range(5) if guess[j] == answer[j] == g_let)
         yellows_remaining = answer_count - greens_count
 
         for j in range(5):
@@ -150,11 +465,74 @@ def get_guess_feedback(guess, answer) -> Feedback:
     return feedback
 
 
+def feedback_from_pattern(guess, pattern) -> Feedback:
+    """
+    Rebuilds the feedback get_guess_feedback() gives for a guess from its
+    pattern code. A gray copy of a letter means the answer holds exactly as
+    many of that letter as there are green and yellow copies.
+    """
+    feedback = Feedback()
+    colours = patterns.pattern_colours(pattern)
+    for let in set(guess):
+        positions = [i for i in range(5) if guess[i] == let]
+        found = sum(1 for i in positions if colours[i] != patterns.GRAY)
+        has_gray = found < len(positions)
+        for i in positions:
+            if colours[i] == patterns.GREEN:
+                feedback.greens[i] = let
+            elif colours[i] == patterns.YELLOW:
+                feedback.yellows[i].append(let * (found if has_gray else len(positions)))
+        if has_gray:
+            feedback.grays.add(let * (found + 1))
+    return feedback
+
+
+def get_patterns(guess, answer_pool) -> list:
+    """
+    Returns the pattern code of guess against each answer in answer_pool,
+    read from the pattern matrix when every word is in it
+    """
+    matrix = get_pattern_matrix()
+    guess_idx = matrix.word_index.get(guess)
+    if guess_idx is not None:
+        try:
+            answer_idxs = [matrix.answer_index[answer] for answer in answer_pool]
+        except KeyError:
+            pass
+        else:
+            return matrix.row(guess_idx)[answer_idxs].tolist()
+    return [patterns.get_pattern(guess, answer) for answer in answer_pool]
+
+
+def get_feedback_counts(guess, answer_pool, existing_feedback=None) -> list:
+    """
+    Returns [feedback, count] pairs for the feedback guess gets against each
+    answer in answer_pool, merged with existing_feedback.
+
+    Answers are counted by pattern code in one pass, so each distinct feedback
+    is built once, then grouped by PackedFeedback in case merging makes two
+    patterns' feedback equal.
+    """
+    feedback_counts = {}
+    for pattern, count in Counter(get_patterns(guess, answer_pool)).items():
+        f = feedback_from_pattern(guess, pattern)
+        if existing_feedback:
+            f.merge(existing_feedback)
+        key = PackedFeedback.from_feedback(f)
+        if key in feedback_counts:
+            feedback_counts[key][1] += count
+        else:
+            feedback_counts[key] = [f, count]
+    return list(feedback_counts.values())
+
+
 def possible_answer(feedback, word) -> bool:
     """
     Returns True or False depending on if a word is a possible answer
     based on previously gathered feedback
     """
+    if stats.enabled:
+        stats.count('possible_answer')
     # check greens
     for i, green in enumerate(feedback.greens):
         if green and green != word[i]:
@@ -182,6 +560,14 @@ def possible_answer(feedback, word) -> bool:
 
 
 def get_possible_answers(feedback, answer_pool) -> list:
+    if isinstance(answer_pool, AnswerPool):
+        if stats.enabled:
+            stats.count('pool_filter')
+        return answer_pool.filter(feedback)
+    if is_index_pool(answer_pool):
+        if stats.enabled:
+            stats.count('pool_filter')
+        return Constraints.from_feedback(feedback).filter(answer_pool)
     l = []  # noqa
     for answer in answer_pool:
         if possible_answer(feedback, answer):
@@ -190,6 +576,14 @@ def get_possible_answers(feedback, answer_pool) -> list:
 
 
 def count_possible_answers(feedback, answer_pool) -> int:
+    if isinstance(answer_pool, AnswerPool):
+        if stats.enabled:
+            stats.count('pool_filter')
+        return answer_pool.count(feedback)
+    if is_index_pool(answer_pool):
+        if stats.enabled:
+            stats.count('pool_filter')
+        return int(Constraints.from_feedback(feedback).filter_mask(answer_pool).sum())
     count = 0
     for answer in answer_pool:
         if possible_answer(feedback, answer):
@@ -197,28 +591,114 @@ def count_possible_answers(feedback, answer_pool) -> int:
     return count
 
 
+_store_letter_arrays = None
+
+
+def get_letter_arrays(words):
+    """
+    Returns (codes, first) (words, 5) arrays of each word's letters numbered
+    0-25, and whether each letter is its first occurrence in the word.
+    Precomputed once for the word store, so index pools are a slice.
+    """
+    global _store_letter_arrays
+    if is_index_pool(words):
+        if _store_letter_arrays is None:
+            _store_letter_arrays = get_letter_arrays(get_word_store().words)
+        codes, first = _store_letter_arrays
+        return codes[words], first[words]
+    codes = patterns.encode_words(words).astype(np.intp) - ord('a')
+    first = np.ones(codes.shape, dtype=bool)
+    for i in range(1, 5):
+        for j in range(i):
+            first[:, i] &= codes[:, i] != codes[:, j]
+    return codes, first
+
+
+_store_letter_counts = None
+
+
+def get_letter_counts(words):
+    """
+    Returns (codes, counts), the (words, 5) letter numbers of get_letter_arrays()
+    and a (words, 26) count of each letter in each word. Precomputed once for
+    the word store, so index pools are a slice.
+    """
+    global _store_letter_counts
+    if is_index_pool(words):
+        if _store_letter_counts is None:
+            _store_letter_counts = get_letter_counts(get_word_store().words)
+        codes, counts = _store_letter_counts
+        return codes[words], counts[words]
+    codes, _ = get_letter_arrays(_as_words(words))
+    counts = np.zeros((len(codes), 26), dtype=np.int8)
+    for i in range(5):
+        counts[np.arange(len(codes)), codes[:, i]] += 1
+    return codes, counts
+
+
 class CommonLetters:
     """
     Calculates information regarding letter distribution in a given answerpool,
     to find guesses likely to be most relevant
+
+    pos_counts holds the raw (5, 26) count of each letter in each position, so a
+    child pool's statistics can be found from its parent's with child().
     """
-    def __init__(self, answer_pool):
+    def __init__(self, answer_pool, pos_counts=None):
         self.answer_pool = answer_pool
-        self.common_letters = Counter()
-        self.let_position = [Counter() for _ in range(5)]
-        self.pos_relevance = 5  # scales score gained from correct letter position
-                                # down if some let positions already known  # noqa
-
-        for ans in answer_pool:
-            for i, let in enumerate(ans):
-                self.let_position[i][let] += 1
-                self.common_letters[let] += 1
-
-        for pos in self.let_position:
-            if len(pos) == 1:  # greens, no new information, not good to guess
-                let = next(iter(pos.keys()))
-                self.common_letters[let] -= pos[let]
-                self.pos_relevance -= 1
+        if pos_counts is None:
+            codes, _ = get_letter_arrays(_as_words(answer_pool))
+            pos_counts = np.array([np.bincount(codes[:, i], minlength=26) for i in range(5)])
+        self.pos_counts = pos_counts
+
+        # a position with one possible letter is a green, no new information,
+        # not good to guess
+        greens = np.count_nonzero(pos_counts, axis=1) == 1
+        self.pos_relevance = 5 - int(greens.sum())  # scales score gained from correct
+                                                     # letter position down if some
+                                                     # let positions already known
+        self.pos_weights = np.where(greens, 0, self.pos_relevance)
+        self.letter_counts = (pos_counts * ~greens[:, None]).sum(axis=0)
+
+    @property
+    def common_letters(self) -> Counter:
+        return Counter({chr(ord('a') + i): int(n) for i, n in enumerate(self.letter_counts) if n})
+
+    @property
+    def let_position(self) -> list:
+        return [Counter({chr(ord('a') + i): int(n) for i, n in enumerate(pos) if n})
+                for pos in self.pos_counts]
+
+    def child(self, answer_pool):
+        """
+        Returns the CommonLetters of answer_pool, a subset of this pool, by
+        subtracting the answers removed when there are fewer of those than
+        there are left
+        """
+        if is_index_pool(answer_pool) and is_index_pool(self.answer_pool):
+            removed = self.answer_pool[~get_word_store().mask(answer_pool)[self.answer_pool]]
+        elif 2 * len(answer_pool) > len(self.answer_pool):
+            kept = set(answer_pool)
+            removed = [ans for ans in self.answer_pool if ans not in kept]
+        else:
+            return CommonLetters(answer_pool)
+        if len(removed) >= len(answer_pool):
+            return CommonLetters(answer_pool)
+        codes, _ = get_letter_arrays(removed)
+        removed_counts = np.array([np.bincount(codes[:, i], minlength=26) for i in range(5)])
+        return CommonLetters(answer_pool, self.pos_counts - removed_counts)
+
+    def get_guess_score_array(self, guess_pool) -> np.ndarray:
+        """
+        Scores every guess at once, see calc_smart_guess_scores().
+        Index pools (see word_store.py) use the word store's precomputed letters.
+        """
+        codes, first = get_letter_arrays(guess_pool)
+        # relevance of letter in position
+        scores = (self.pos_counts[np.arange(5), codes] * self.pos_weights).sum(axis=1)
+        # relevance of letter not in position, *5 scales in relation to pos_relevance
+        scores += 5 * (self.letter_counts[codes] * first).sum(axis=1)
+        return scores
 
     def calc_smart_guess_scores(self, guess_pool):
         """
@@ -231,26 +711,18 @@ class CommonLetters:
         which is computationally expensive as it utilises recursive function
         turns_until_solved() # O(n!) time
         """
-        guess_scores = Counter()
-        for guess in guess_pool:
-            score = 0
-            for i, guess_let in enumerate(guess):
-
-                # relevance of letter in position
-                if len(self.let_position[i]) != 1:  # greens, so no new info
-                    score += self.let_position[i][guess_let] * self.pos_relevance
-
-                # relevance of letter not in position
-                if guess_let not in set(guess[0:i]):
-                    score += self.common_letters[guess_let] * 5
-                    # *5 scales in relation to self.pos_relevance above
-
-            guess_scores[guess] = score
-        return guess_scores
+        words = _as_words(guess_pool)
+        return Counter(dict(zip(words, self.get_guess_score_array(guess_pool).tolist())))
 
     def get_smart_guesses(self, guess_pool, size):
-        guess_scores = self.calc_smart_guess_scores(guess_pool)
-        return [guess for guess, _ in guess_scores.most_common(size)]
+        """ The size best scoring guesses, ties in guess_pool order like Counter.most_common() """
+        if not is_index_pool(guess_pool):
+            guess_pool = _as_words(guess_pool)
+        scores = self.get_guess_score_array(guess_pool)
+        order = np.argsort(-scores, kind='stable')[:size]
+        if is_index_pool(guess_pool):
+            return get_word_store().words_of(guess_pool[order])
+        return [guess_pool[i] for i in order]
 
     def print_smart_guesses(self, guess_scores, size=None):
         logging.debug('')
@@ -268,61 +740,345 @@ class CommonLetters:
             logging.debug(f'{g_score}')
 
 
+def _as_words(pool):
+    """ Words of a pool as a list, or the store words of an index pool """
+    if is_index_pool(pool):
+        return get_word_store().words_of(pool)
+    return pool if isinstance(pool, list) else list(pool)
+
+
+def _word_pools(guess_pool, answer_pool):
+    """
+    The pools as words if either is an index pool, as the searches built on
+    feedback keep their candidates and answers as words throughout. Only the
+    entry points convert: the pools they recurse with are already words.
+    """
+    if is_index_pool(guess_pool) or is_index_pool(answer_pool):
+        return _as_words(guess_pool), _as_words(answer_pool)
+    return guess_pool, answer_pool
+
+
+COMMON_LETTERS_CACHE_SIZE = 4096
+_common_letters = OrderedDict()  # pool_fingerprint -> CommonLetters, least recent first
+
+
+def get_common_letters(answer_pool, parent=None) -> CommonLetters:
+    """
+    Returns the CommonLetters of answer_pool, cached by pool fingerprint.
+    parent is the CommonLetters of a pool answer_pool was filtered from,
+    which it is derived from if not cached.
+    """
+    key = pool_fingerprint(answer_pool)
+    common = _common_letters.get(key)
+    if common is not None:
+        _common_letters.move_to_end(key)
+        return common
+    if parent is not None:
+        common = parent.child(answer_pool)
+    else:
+        common = CommonLetters(answer_pool)
+    _common_letters[key] = common
+    if len(_common_letters) > COMMON_LETTERS_CACHE_SIZE:
+        _common_letters.popitem(last=False)
+    return common
+
+
+# bump whenever a change to the search can change the guess it returns, so
+# guesses cached by older code (see guess_cache.py and strategy_book.py) aren't used
+SOLVER_VERSION = 1
+SMART_EXACT_CUTOFF = 5  # answer pools smaller than this are solved exactly
+BOUND_TOLERANCE = 1e-9  # slack so float rounding never prunes a tie with the bound
+
+
+class TranspositionTable:
+    """
+    Bounded memo of exact search results, keyed by the state of the answer
+    pool, so find_exact_best_guess() and turns_until_solved() don't re-solve a
+    pool reached through a different guess / feedback path.
+
+    Least recently used entries are evicted past max_size. Entries depend on
+    guess_pool, so the table is cleared if used with a different guess_pool.
+    """
+    def __init__(self, max_size=200_000):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.guess_pool = None
+
+    def use_guess_pool(self, guess_pool):
+        if guess_pool is self.guess_pool:
+            return
+        if self.guess_pool is None or list(self.guess_pool) != list(guess_pool):
+            self.entries.clear()
+        self.guess_pool = guess_pool
+
+    def get(self, key, default=None):
+        """ Returns the stored value, or default if key isn't stored """
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        if stats.enabled:
+            stats.count('memo_misses' if value is None else 'memo_hits')
+        return default if value is None else value
+
+    def put(self, key, value):
+        if self.max_size <= 0:
+            return
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+
+_shared_table = None
+
+
+def get_shared_table():
+    """ Returns a TranspositionTable shared by every caller in this process """
+    global _shared_table
+    if _shared_table is None:
+        _shared_table = TranspositionTable()
+    return _shared_table
+
+
+def pool_fingerprint(answer_pool):
+    """
+    Hashable key for the words in an answer pool. Pools in a search are always
+    filtered from the same ordered pool, so the words identify it.
+    """
+    if isinstance(answer_pool, AnswerPool):
+        return answer_pool.bits
+    if is_index_pool(answer_pool):
+        return answer_pool.tobytes()
+    return tuple(answer_pool)
+
+
+SEARCH_LEVELS = ('letters', 'approximate', 'partial_full', 'full', 'partial_exact', 'exact')
+
+
+class SearchTimeout(Exception):
+    """ Raised inside a search once its deadline has passed """
+    def __init__(self, best_guess=None):
+        super().__init__(best_guess)
+        self.best_guess = best_guess  # the best guess found before the deadline
+
+
+class Deadline:
+    """
+    When a search must stop: once time.perf_counter() passes time, or once
+    cancelled (a multiprocessing.Event) is set by another process, e.g. an
+    ExactSearchPool stopping one of its tasks
+    """
+    def __init__(self, time=math.inf, cancelled=None):
+        self.time = time
+        self.cancelled = cancelled
+
+    @classmethod
+    def after(cls, seconds):
+        return cls(time.perf_counter() + seconds)
+
+    def passed(self) -> bool:
+        return time.perf_counter() > self.time or \
+            (self.cancelled is not None and self.cancelled.is_set())
+
+
 def find_best_guess(guess_pool, answer_pool, feedback=None,
-                    guesses_tried=set()):
+                    guesses_tried=set(), full_scoring=False,
+                    exact_cutoff=SMART_EXACT_CUTOFF, memo=None, time_budget=None,
+                    workers=None):
     """
     Returns the guess in either guess_pool or answer_pool that will result in
     the least amount of turns to solve the remainder of the wordle puzzle.
 
+    full_scoring scores every guess that could split answer_pool (see
+    find_full_best_guess()) instead of approximately scoring 100 smart
+    guesses, when not solving exactly.
+
+    Pools smaller than exact_cutoff are solved exactly, memoised in memo
+    (see TranspositionTable) which can be shared between calls.
+
+    time_budget is the seconds the search may take, see search_best_guess().
+    workers > 1 solves exactly in parallel, see find_exact_best_guess().
+
+    Either pool may be an index pool (see word_store.py). Searches that filter
+    answers by feedback work on words, so index pools are converted to words
+    here, as they are by find_exact_best_guess() and turns_until_solved().
+    """
+    return search_best_guess(guess_pool, answer_pool, feedback, guesses_tried,
+                             full_scoring, exact_cutoff, memo, time_budget, workers)[0]
+
+
+def search_best_guess(guess_pool, answer_pool, feedback=None,
+                      guesses_tried=set(), full_scoring=False,
+                      exact_cutoff=SMART_EXACT_CUTOFF, memo=None, time_budget=None,
+                      workers=None):
+    """
+    find_best_guess(), returning (guess, level) where level is the one of
+    SEARCH_LEVELS the guess was scored at.
+
+    Without a time_budget the level is picked by pool size. With one the search
+    is anytime: a guess is picked by letter frequency straight away, then
+    refined by vectorised scores of every guess, then an exact search for pools
+    smaller than exact_cutoff, until the budget runs out. Approximate scoring is
+    skipped as it is slower than vectorised scoring. Vectorised scoring cut
+    short returns the best of the guesses it scored, as level 'partial_full',
+    and an exact search cut short returns the best guess it has fully solved,
+    as level 'partial_exact'.
+    As the exact search stops at the deadline, exact_cutoff can be raised along
+    with a time_budget without risking long turns.
     """
-    SMART_EXACT_CUTOFF = 5
-    NUM_EXACT_SMART_GUESSES = 50 + (SMART_EXACT_CUTOFF - len(answer_pool))
+    NUM_EXACT_SMART_GUESSES = 50 + max(exact_cutoff - len(answer_pool), 0)
     NUM_APPROX_SMART_GUESSES = 100
+    guess_pool, answer_pool = _word_pools(guess_pool, answer_pool)
 
     if len(answer_pool) <= 2:
-        return answer_pool[0]  # any potential answer will be best guess
+        return answer_pool[0], 'exact'  # any potential answer will be best guess
+
+    # refine from letter scores up to an exact search until the deadline
+    elif time_budget is not None:
+        return _anytime_best_guess(guess_pool, answer_pool, feedback, guesses_tried,
+                                   exact_cutoff, memo, Deadline.after(time_budget), workers)
 
     # solve exactly with smart guesses guesses
-    elif len(answer_pool) < SMART_EXACT_CUTOFF:
-        logging.debug(f'solving exactly with {NUM_EXACT_SMART_GUESSES} smart guesses')
+    elif len(answer_pool) < exact_cutoff:
+        stats.debug('solving exactly with %s smart guesses', NUM_EXACT_SMART_GUESSES)
         smart_guesses = filter_guess_pool(guess_pool, answer_pool, NUM_EXACT_SMART_GUESSES)
         best_guess = find_exact_best_guess(guess_pool, answer_pool, feedback,
-                                           guesses_tried, smart_guesses)
+                                           guesses_tried, smart_guesses, memo,
+                                           workers=workers)
+        return best_guess, 'exact'
+
+    # score every guess by expected pool size
+    elif full_scoring:
+        best_guess, _ = find_full_best_guess(guess_pool, answer_pool)
+        return best_guess, 'full'
 
     # solve approximately for 100 optimised guesses
     else:
         smart_guesses = filter_guess_pool(guess_pool, answer_pool, NUM_APPROX_SMART_GUESSES)
         smart_guesses = smart_guesses[0] + smart_guesses[1]  # answers + non_answers
-        logging.debug(f'{smart_guesses}')
+        stats.debug('%s', smart_guesses)
         best_guess = find_approximate_best_guess(smart_guesses, answer_pool, feedback)
-
-    return best_guess
+        return best_guess, 'approximate'
+
+
+def _anytime_best_guess(guess_pool, answer_pool, feedback, guesses_tried,
+                        exact_cutoff, memo, deadline, workers):
+    """ The levels of search_best_guess() in turn until deadline """
+    # the possible answer with the most common letters, so it may win outright
+    best_guess = get_common_letters(answer_pool).get_smart_guesses(answer_pool, 1)[0]
+    level = 'letters'
+    if deadline.passed():
+        return best_guess, level
+
+    guess, complete = find_full_best_guess(guess_pool, answer_pool, deadline)
+    if guess is not None:
+        best_guess, level = guess, 'full' if complete else 'partial_full'
+    if not complete or len(answer_pool) >= exact_cutoff or deadline.passed():
+        return best_guess, level
+
+    num_smart_guesses = 50 + max(exact_cutoff - len(answer_pool), 0)
+    smart_guesses = filter_guess_pool(guess_pool, answer_pool, num_smart_guesses)
+    try:
+        return find_exact_best_guess(guess_pool, answer_pool, feedback, guesses_tried,
+                                     smart_guesses, memo, deadline, workers), 'exact'
+    except SearchTimeout as timeout:
+        stats.debug('exact search stopped at the deadline with %s', timeout.best_guess)
+        if timeout.best_guess is not None:
+            return timeout.best_guess, 'partial_exact'
+    return best_guess, level
 
 
 def remove_possible_answers_and_previous_guesses(guess_pool, answer_pool, guesses_tried):
     """ remove previous guesses to prevent infinite recursion of attempting the same guess"""
-    filtered = []
-    for guess in guess_pool:
-        if guess not in guesses_tried and guess not in answer_pool:
-            filtered.append(guess)
-    return filtered
-
-
-def filter_guess_pool(guess_pool, answer_pool, size):
+    if is_index_pool(guess_pool):
+        store = get_word_store()
+        if not is_index_pool(answer_pool):
+            answer_pool = get_store_indices(answer_pool)
+            answer_pool = answer_pool[answer_pool >= 0]  # words not in the store aren't guesses
+        keep = ~store.mask(answer_pool)
+        keep[[store.index[guess] for guess in guesses_tried if guess in store.index]] = False
+        return guess_pool[keep[guess_pool]]
+    excluded = set(guesses_tried).union(answer_pool)
+    return [guess for guess in guess_pool if guess not in excluded]
+
+
+def filter_guess_pool(guess_pool, answer_pool, size, parent=None):
     """
     Filters list of potential guesses to a given size based off
     common letters in the answerpool to optimise find_best_guess.
 
     format of smart guesses [[answers], [non_answers]]
     half answers and half non_answer guesses
+
+    parent is the CommonLetters of the pool answer_pool was filtered from, if known
     """
-    common = CommonLetters(answer_pool)
+    common = get_common_letters(answer_pool, parent)
     smart_guesses = []
     smart_guesses.append(common.get_smart_guesses(answer_pool, size//2))
-    smart_guesses.append(common.get_smart_guesses(guess_pool, size//2))
+    smart_guesses.append(common.get_smart_guesses(
+        get_informative_guesses(guess_pool, answer_pool), size//2))
     return smart_guesses
 
 
+def get_informative_mask(answer_pool) -> np.ndarray:
+    """
+    Boolean array over the word store, True for words that could split a
+    non empty answer_pool.
+
+    The pattern of a guess only depends on, for each of its letters, whether
+    the answer has that letter in that position and how many of that letter it
+    has. So a guess is only informative if it has a letter whose count varies
+    across the pool, or a letter in a position that only some of the pool have
+    it in, and the words with either are looked up in get_letter_index().
+    """
+    codes, counts = get_letter_counts(answer_pool)
+    varies = np.flatnonzero(counts.min(axis=0) != counts.max(axis=0))
+    in_position = np.bincount((codes + 26 * np.arange(5)).ravel(),
+                              minlength=5 * 26).reshape(5, 26)
+    partial = np.argwhere((in_position > 0) & (in_position < len(codes)))
+    return get_letter_index().mask(varies.tolist(), partial.tolist())
+
+
+def get_informative_guesses(guess_pool, answer_pool):
+    """
+    Returns the guesses of guess_pool that could split answer_pool, in order
+    (see get_informative_mask()). Every other guess gets the same pattern from
+    every answer, so scoring it is wasted. Words not in the word store are kept,
+    and guess_pool itself is returned if every guess is kept.
+    """
+    mask = get_informative_mask(answer_pool)
+    if is_index_pool(guess_pool):
+        keep = mask[guess_pool]
+    else:
+        keep = np.append(mask, True)[get_guess_pool_indices(guess_pool)]
+    kept = np.flatnonzero(keep)
+    if stats.enabled:
+        stats.count('guesses_uninformative', len(keep) - len(kept))
+    if len(kept) == len(keep):
+        return guess_pool
+    if is_index_pool(guess_pool):
+        return guess_pool[kept]
+    words = _as_words(guess_pool)
+    return [words[i] for i in kept.tolist()]
+
+
 def get_approximate_guess_scores(guess_pool, answer_pool, old_feedback=None):
     """
     Returns a dict of guess scores, where score is defined as
@@ -334,30 +1090,205 @@ def get_approximate_guess_scores(guess_pool, answer_pool, old_feedback=None):
     guess_scores = {}
     for guess in guess_pool:
         total_score = 0
-        feedbacks = Counter()
-        for answer in answer_pool:
-            f = get_guess_feedback(guess, answer)
-            if old_feedback:
-                f.merge(old_feedback)
-            feedbacks[f] += 1
-        for f in feedbacks:
-            total_score += count_possible_answers(f, answer_pool) * feedbacks[f]
+        for f, count in get_feedback_counts(guess, answer_pool, old_feedback):
+            total_score += count_possible_answers(f, answer_pool) * count
         score = total_score / len(answer_pool)
         if guess in answers:  # approx bonus score given to potential answers
             score -= 1
-        logging.debug(f'{guess} {score}')
+        stats.debug('%s %s', guess, score)
         guess_scores[guess] = score
     guess_scores = sorted(guess_scores.items(), key=lambda item: item[1])
     return guess_scores
 
 
+def get_pattern_block(guess_pool, answer_pool) -> np.ndarray:
+    """
+    Returns a (guesses, answers) uint8 array of pattern codes, sliced from the
+    pattern matrix when every word is in it and computed otherwise.
+    Index pools (see word_store.py) are sliced directly, and an index pool
+    given with a list pool is looked up as words.
+    """
+    matrix = get_pattern_matrix()
+    if is_index_pool(guess_pool) and is_index_pool(answer_pool):
+        columns = get_word_store().answer_column[answer_pool]
+        if len(columns) == len(matrix.answers) and (np.diff(columns) == 1).all():
+            return matrix.matrix[guess_pool]  # every answer, in order
+        return matrix.matrix[np.ix_(guess_pool, columns)]
+    guess_pool, answer_pool = _word_pools(guess_pool, answer_pool)
+    try:
+        rows = [matrix.word_index[guess] for guess in guess_pool]
+        cols = [matrix.answer_index[answer] for answer in answer_pool]
+    except KeyError:
+        return patterns.compute_patterns(list(guess_pool), list(answer_pool))
+    block = matrix.matrix
+    if cols != list(range(len(matrix.answers))):
+        block = block[:, cols]
+    if rows != list(range(len(matrix.words))):
+        block = block[rows]
+    return block
+
+
+def get_partition_scores(block) -> np.ndarray:
+    """
+    Returns the sum of squared partition sizes for each row of a pattern block.
+
+    Each row is radix sorted, so every partition becomes a run of equal codes,
+    and the squared run lengths are summed per row.
+    """
+    ROWS_PER_BLOCK = 2048
+    num_rows, num_answers = block.shape
+    scores = np.zeros(num_rows)
+    for start in range(0, num_rows, ROWS_PER_BLOCK):
+        codes = np.sort(block[start:start + ROWS_PER_BLOCK], axis=1, kind='stable')
+        n = len(codes)
+        run_starts = np.empty(codes.shape, dtype=bool)
+        run_starts[:, 0] = True
+        np.not_equal(codes[:, 1:], codes[:, :-1], out=run_starts[:, 1:])
+        idxs = np.flatnonzero(run_starts)
+        run_lengths = np.diff(idxs, append=n * num_answers)
+        scores[start:start + n] = np.bincount(idxs // num_answers,
+                                              weights=run_lengths * run_lengths,
+                                              minlength=n)
+    return scores
+
+
+def get_partition_labels(block) -> np.ndarray:
+    """
+    Relabels each row of a pattern block by the first answer with each pattern,
+    so rows that split the answers into the same groups are equal
+    """
+    num_rows, num_answers = block.shape
+    rows = np.arange(num_rows)
+    first = np.empty((num_rows, patterns.NUM_PATTERNS), dtype=np.intp)
+    for j in range(num_answers - 1, -1, -1):
+        first[rows, block[:, j]] = j
+    return first[rows[:, None], block]
+
+
+def get_partition_representatives(block, is_answer) -> np.ndarray:
+    """
+    Returns the ascending row indices of a pattern block with one row per
+    distinct partition of the answers: a possible answer (is_answer) if any
+    splits them that way, as it may also win outright, else the first row.
+    Candidates left out are counted as candidates_collapsed.
+    """
+    labels = get_partition_labels(block)
+    representatives = {}
+    for i in np.argsort(~np.asarray(is_answer, dtype=bool), kind='stable').tolist():
+        representatives.setdefault(labels[i].tobytes(), i)
+    if stats.enabled:
+        stats.count('candidates_collapsed', len(block) - len(representatives))
+    return np.sort(np.fromiter(representatives.values(), dtype=np.intp,
+                               count=len(representatives)))
+
+
+def get_vectorised_guess_scores(guess_pool, answer_pool) -> list:
+    """
+    Scores every guess in guess_pool and answer_pool at once with numpy,
+    returning a sorted list of (guess, score) like get_approximate_guess_scores().
+
+    score is the expected size of the answer pool next turn, i.e. the sum of
+    squared partition sizes over len(answer_pool).
+    score -= 1 for possible answers as they may win outright.
+    """
+    if is_index_pool(guess_pool) and is_index_pool(answer_pool):
+        return get_indexed_guess_scores(guess_pool, answer_pool)
+    guess_pool, answer_pool = _word_pools(guess_pool, answer_pool)
+    guesses = list(guess_pool)
+    in_guesses = set(guesses)
+    guesses += [answer for answer in answer_pool if answer not in in_guesses]
+    block = get_pattern_block(guesses, answer_pool)
+
+    scores = get_partition_scores(block) / len(answer_pool)
+    answers = set(answer_pool)
+    scores -= np.fromiter((guess in answers for guess in guesses), dtype=bool, count=len(guesses))
+
+    order = np.argsort(scores, kind='stable')
+    return [(guesses[i], float(scores[i])) for i in order]
+
+
+FULL_SCORING_CHUNK = 2 ** 18  # pattern codes scored between deadline checks
+
+
+def find_full_best_guess(guess_pool, answer_pool, deadline=None):
+    """
+    Returns (guess, complete), the best guess by get_vectorised_guess_scores(),
+    scored a chunk of guesses at a time without sorting them all. Only the
+    guesses that could split answer_pool are scored, with the possible answers.
+
+    With a deadline (a Deadline) it is checked between chunks, and once it has
+    passed the best of the chunks scored is returned with complete False, or
+    None if none were. Possible answers are scored first, as late in a game
+    one is usually best. Ties go to the earliest guess, as when sorted.
+    """
+    guess_pool, answer_pool = _word_pools(guess_pool, answer_pool)
+    guesses = _as_words(guess_pool)
+    in_guesses = set(guesses)
+    extra = [answer for answer in answer_pool if answer not in in_guesses]
+    guesses = guesses + extra
+    answers = set(answer_pool)
+    is_answer = np.fromiter((guess in answers for guess in guesses), dtype=bool,
+                            count=len(guesses))
+
+    # as index pools, each chunk's pattern block is one slice of the matrix
+    guess_idxs = np.concatenate([get_guess_pool_indices(guess_pool), get_store_indices(extra)])
+    answer_idxs = get_store_indices(answer_pool)
+    indexed = guess_idxs.min(initial=0) >= 0 and answer_idxs.min(initial=0) >= 0
+
+    # a guess that can't split the pool is never best, see get_informative_mask()
+    informative = np.append(get_informative_mask(answer_pool), True)[guess_idxs]
+    order = np.concatenate([np.flatnonzero(is_answer),
+                            np.flatnonzero(~is_answer & informative)])
+    rows = max(1, FULL_SCORING_CHUNK // len(answer_pool))
+    best = None  # (score, position in guesses)
+    for start in range(0, len(order), rows):
+        if deadline is not None and deadline.passed():
+            return (guesses[best[1]] if best else None), False
+        chunk = order[start:start + rows]
+        if indexed:
+            block = get_pattern_block(guess_idxs[chunk], answer_idxs)
+        else:
+            block = get_pattern_block([guesses[i] for i in chunk], answer_pool)
+        scores = get_partition_scores(block) / len(answer_pool)
+        scores -= is_answer[chunk]
+        i = np.lexsort((chunk, scores))[0]
+        if best is None or (scores[i], chunk[i]) < best:
+            best = (float(scores[i]), int(chunk[i]))
+    return guesses[best[1]], True
+
+
+def get_indexed_guess_scores(guess_pool, answer_pool) -> list:
+    """ get_vectorised_guess_scores() for pools of word store indices """
+    store = get_word_store()
+    in_answers = store.mask(answer_pool)
+    extra = answer_pool[~store.mask(guess_pool)[answer_pool]]
+    guesses = np.concatenate([guess_pool, extra])
+    block = get_pattern_block(guesses, answer_pool)
+
+    scores = get_partition_scores(block) / len(answer_pool)
+    scores -= in_answers[guesses]
+
+    order = np.argsort(scores, kind='stable')
+    return [(store.words[guesses[i]], float(scores[i])) for i in order]
+
+
 def find_approximate_best_guess(guess_pool, answer_pool, old_feedback=None):
-    guess_scores = get_approximate_guess_scores(guess_pool, answer_pool, old_feedback)
+    """
+    Returns the best of guess_pool by get_approximate_guess_scores(), scoring one
+    guess per distinct partition of answer_pool
+    """
+    guess_pool = list(guess_pool)
+    answers = set(answer_pool)
+    keep = get_partition_representatives(get_pattern_block(guess_pool, answer_pool),
+                                         [guess in answers for guess in guess_pool])
+    guess_scores = get_approximate_guess_scores([guess_pool[i] for i in keep], answer_pool,
+                                                old_feedback)
     return guess_scores[0][0]
 
 
 def find_exact_best_guess(guess_pool, answer_pool, existing_feedback=None,
-                          guesses_tried=set(), smart_guesses=None):
+                          guesses_tried=set(), smart_guesses=None, memo=None,
+                          deadline=None, workers=None):
     """
     Returns the exact best guess and its expected turns until solved based on
     the complete probability tree of scenarios.
@@ -371,12 +1302,27 @@ def find_exact_best_guess(guess_pool, answer_pool, existing_feedback=None,
 
     find_exact_best_guess() was found to be largely unpractical through testing, with too
     many likely, and diverse, worst case scenarios for even len(answer_pool) < 5, where
-    calc time > 60 sec.
+    calc time > 60 sec. Sub-problems are now memoised in memo, a TranspositionTable
+    made for this call unless one is passed in to share.
+
+    Candidates are searched branch and bound: best approximate score first, and
+    each subtree is abandoned once its lower bound can't beat the best guess so
+    far. The guess returned is the one the full search would return.
+
+    deadline is a Deadline at which the search raises SearchTimeout, carrying
+    the best guess fully solved so far if any.
+
+    workers > 1 evaluates candidates in that many forked processes (see
+    ExactSearchPool), each with its own memo, for the latency of one search.
+    The guess returned is the same as the serial search's.
     """
     ANSWERPOOL_SIZE_WARNING = 100
+    guess_pool, answer_pool = _word_pools(guess_pool, answer_pool)
     if len(answer_pool) > ANSWERPOOL_SIZE_WARNING:
         raise ValueError("answer pool is too large to solve exactly, \
                          this will take too long")
+    if memo is None:
+        memo = TranspositionTable()
     if smart_guesses:
         answer_guesses = smart_guesses[0]
         non_answer_guesses = smart_guesses[1]
@@ -386,29 +1332,108 @@ def find_exact_best_guess(guess_pool, answer_pool, existing_feedback=None,
     non_answer_guesses = remove_possible_answers_and_previous_guesses(
                          non_answer_guesses, answer_pool, guesses_tried)
 
-    guess_turns = {}
-
     best_case_turns = ((2*len(answer_pool))-1) / len(answer_pool)
-    for guess in answer_guesses:
-        turns = turns_until_solved(guess, guess_pool, answer_pool,
-                                   existing_feedback, guesses_tried.copy())
-        if math.isclose(turns, best_case_turns, abs_tol=0.0001):
-            return guess
+    candidates = [(guess, True) for guess in answer_guesses]
+    candidates += [(guess, False) for guess in non_answer_guesses]
+    # guesses that split the pool the same way solve it in the same turns, so
+    # only one of each is searched
+    block = get_pattern_block([guess for guess, _ in candidates], answer_pool)
+    keep = get_partition_representatives(block, [is_answer for _, is_answer in candidates])
+    candidates = [candidates[i] for i in keep]
+
+    # Branch and bound: candidates are tried best approximate score first, and
+    # each is abandoned once it can't be selected over the best so far. The
+    # selection key keeps the unpruned search's choice: the first answer at
+    # best case, else the first non answer at 2.0 turns, else the first
+    # minimum, with "first" meaning in the order the candidates are given.
+    order = get_candidate_order(candidates, answer_pool, block[keep])
+    if workers is not None and workers > 1:
+        search = get_exact_search_pool(workers, guess_pool)
+        return search.find_best_guess(candidates, order, answer_pool, existing_feedback,
+                                      guesses_tried, best_case_turns, deadline)
+
+    best_key = None
+    best_guess = None
+    guess_turns = {}
+    for i in order:
+        guess, is_answer = candidates[i]
+        bound = _selection_bound(best_key, i, is_answer, best_case_turns)
+        if bound is None:
+            if stats.enabled:
+                stats.count('candidates_pruned')
+            continue
+        try:
+            turns = turns_until_solved(guess, guess_pool, answer_pool, existing_feedback,
+                                       guesses_tried.copy(), memo=memo, bound=bound,
+                                       deadline=deadline)
+        except SearchTimeout:
+            raise SearchTimeout(best_guess) from None
+        if turns > bound:
+            if stats.enabled:
+                stats.count('candidates_pruned')
+            continue
         guess_turns[guess] = turns
+        key = _selection_key(i, is_answer, turns, best_case_turns)
+        if best_key is None or key < best_key:
+            best_key, best_guess = key, guess
+    stats.debug('all guess scores are %s', guess_turns)
+    return best_guess
+
+
+def _selection_key(i, is_answer, turns, best_case_turns):
+    """ find_exact_best_guess() selects the candidate with the least key """
+    if is_answer and math.isclose(turns, best_case_turns, abs_tol=0.0001):
+        return (0, i)
+    elif not is_answer and turns == 2.0:  # best case for non answer_pool guess
+        return (1, i)
+    return (2, turns, i)
 
-    best_case_turns = 2.0  # best case for non answer_pool guess
-    for guess in non_answer_guesses:
-        turns = turns_until_solved(guess, guess_pool, answer_pool,
-                                   existing_feedback, guesses_tried.copy())
-        if turns == best_case_turns:
-            return guess
-        guess_turns[guess] = turns
-    logging.debug(f'all guess scores are {guess_turns}')
-    return min(guess_turns, key=guess_turns.get)
+
+def get_candidate_order(candidates, answer_pool, block=None) -> list:
+    """
+    Indices of (guess, is_answer) candidates, best first by expected pool size
+    next turn, less one for possible answers. block is their pattern block,
+    if already found.
+    """
+    if block is None:
+        block = get_pattern_block([guess for guess, _ in candidates], answer_pool)
+    scores = get_partition_scores(block) / len(answer_pool)
+    scores -= np.fromiter((is_answer for _, is_answer in candidates), dtype=bool,
+                          count=len(candidates))
+    return np.argsort(scores, kind='stable').tolist()
+
+
+def _selection_bound(best_key, i, is_answer, best_case_turns):
+    """
+    Most expected turns with which candidate i could still be selected over
+    best_key (see find_exact_best_guess()), or None if it can't be
+    """
+    answer_bound = best_case_turns + 0.0001
+    if best_key is None:
+        return math.inf
+    if best_key[0] == 0:  # an answer at best case, only an earlier one can win
+        return answer_bound if is_answer and i < best_key[1] else None
+    if best_key[0] == 1:  # a non answer at 2.0, any answer at best case wins
+        if is_answer:
+            return answer_bound
+        return 2.0 if i < best_key[1] else None
+    turns = best_key[1]
+    if is_answer:
+        return max(turns, answer_bound)
+    return max(turns, 2.0)
+
+
+def subtree_lower_bound(pool_size, turn) -> float:
+    """
+    Fewest expected turns to solve a pool of pool_size answers guessing from
+    turn: one answer at best is found on turn, the rest no sooner than turn + 1
+    """
+    return turn + (pool_size - 1) / pool_size
 
 
 def turns_until_solved(guess, guess_pool, answer_pool,
-                       existing_feedback=None, guesses_tried=set(), turn=1):
+                       existing_feedback=None, guesses_tried=set(), turn=1, memo=None,
+                       bound=math.inf, deadline=None):
     """
     Solves and returns exactly the average turns taken to reach the answer,
     by iterating through all scenarios as a probability tree.
@@ -421,8 +1446,20 @@ def turns_until_solved(guess, guess_pool, answer_pool,
     guess_pool passed should generally be all available words,
     smart_guesses are found within the function.
     However, answer_pool will be considered for guesses as well
+
+    Results are memoised in memo by answer pool, guess, turn and guesses tried,
+    and smart guesses by answer pool alone.
+    answer_pool is assumed consistent with existing_feedback, as it always is
+    within the solver, so the feedback path taken to reach it isn't keyed.
+
+    Returns math.inf as soon as the turns are certain to be more than bound,
+    from the lower bound of each unsolved feedback's subtree. An exact result
+    may still be above bound.
+
+    Raises SearchTimeout once deadline (a Deadline) has passed, if given.
     """
     ANSWERPOOL_SIZE_WARNING = 300
+    guess_pool, answer_pool = _word_pools(guess_pool, answer_pool)
 
     # BASE CASES
     if len(answer_pool) == 1:
@@ -438,121 +1475,380 @@ def turns_until_solved(guess, guess_pool, answer_pool,
         logging.warning(f'turns_until_solved() is trying to solve for '
                         f'{len(answer_pool)} answers. > 300 is likely too large')
 
-    feedbacks = {}
+    # CHECK MEMO
+    if memo is None:
+        memo = TranspositionTable()
+    memo.use_guess_pool(guess_pool)
+    memo_key = ('turns', pool_fingerprint(answer_pool), guess, turn, frozenset(guesses_tried))
+    average_turns = memo.get(memo_key)
+    if average_turns is not None:
+        return average_turns
+    lower_key = ('lower',) + memo_key[1:]  # turns are known to be more than this
+    if bound < math.inf and memo.get(lower_key, -math.inf) >= bound:
+        return math.inf
+
+    if deadline is not None and deadline.passed():
+        raise SearchTimeout()
+
+    if stats.enabled:
+        stats.node(turn)
     expected_turns = {}
     guesses_tried.add(guess)
 
     # GET FEEDBACK
-    for potential_answer in answer_pool:
-        if guess == potential_answer:
-            expected_turns[turn] = 1
-        else:
-            new_feedback = get_guess_feedback(guess, potential_answer)
-            if existing_feedback:
-                new_feedback.merge(existing_feedback)
-
-            # APPEND TO FEEDBACK COUNTER
-            for f in feedbacks:
-                if f == new_feedback:
-                    feedbacks[f] += 1
-                    break
-            else:
-                feedbacks[new_feedback] = 1
-
-    logging.debug(f'FEEDBACKS SET {guess} {turn}')
-    for f in feedbacks:
-        possible_answers = get_possible_answers(f, answer_pool)
-        logging.debug(f'count {feedbacks[f]}  {possible_answers}')
-        logging.debug(f'{f.greens}, {f.yellows}, {f.grays}')
+    in_pool = guess in answer_pool
+    if in_pool:
+        expected_turns[turn] = 1
+    feedbacks = get_feedback_counts(guess, [ans for ans in answer_pool if ans != guess],
+                                    existing_feedback)
+    branches = [(f, count, get_possible_answers(f, answer_pool)) for f, count in feedbacks]
+
+    # BOUND
+    # total turns over every answer must stay within bound * answers
+    max_total = bound * (sum(count for _, count, _ in branches) + in_pool) + BOUND_TOLERANCE
+    total = turn if in_pool else 0
+    unsolved = sum(count * subtree_lower_bound(len(possible_answers), turn + 1)
+                   for _, count, possible_answers in branches if possible_answers)
+    if total + unsolved > max_total:
+        return _exceeds_bound(memo, lower_key, bound)
+
+    stats.debug('FEEDBACKS SET %s %s', guess, turn)
+    for f, count, possible_answers in branches:
+        stats.debug('count %s  %s', count, possible_answers)
+        stats.debug('%s, %s, %s', f.greens, f.yellows, f.grays)
         if len(possible_answers) == 0:
             raise IndexError('No possible answers with this set of feedback')
-        smart_guesses = filter_guess_pool(guess_pool, possible_answers, 100)
-        best_guess = find_exact_best_guess(guess_pool, possible_answers, f,
-                                           guesses_tried, smart_guesses)
-        logging.debug(f'for feedback {f.greens}, {f.yellows}, {f.grays}, '
-                      f'best guess next turn is {best_guess}')
+        best_key = ('best', pool_fingerprint(possible_answers), frozenset(guesses_tried))
+        best_guess = memo.get(best_key)
+        if best_guess is None:
+            smart_key = ('smart', pool_fingerprint(possible_answers))
+            smart_guesses = memo.get(smart_key)
+            if smart_guesses is None:
+                smart_guesses = filter_guess_pool(guess_pool, possible_answers, 100,
+                                                  get_common_letters(answer_pool))
+                memo.put(smart_key, smart_guesses)
+            best_guess = find_exact_best_guess(guess_pool, possible_answers, f,
+                                               guesses_tried, smart_guesses, memo,
+                                               deadline)
+            memo.put(best_key, best_guess)
+        stats.debug('for feedback %s, %s, %s, best guess next turn is %s',
+                    f.greens, f.yellows, f.grays, best_guess)
+        unsolved -= count * subtree_lower_bound(len(possible_answers), turn + 1)
         turns = turns_until_solved(best_guess, guess_pool, possible_answers,
-                                   f, guesses_tried.copy(), turn+1)
-        expected_turns[turns] = expected_turns.get(turns, 0) + feedbacks[f]
+                                   f, guesses_tried.copy(), turn+1, memo,
+                                   (max_total - total - unsolved) / count, deadline)
+        total += count * turns
+        if total + unsolved > max_total:
+            return _exceeds_bound(memo, lower_key, bound)
+        expected_turns[turns] = expected_turns.get(turns, 0) + count
 
     average_turns = (sum(k*v for k, v in expected_turns.items())
                      / sum(expected_turns.values()))
+    memo.put(memo_key, average_turns)
 
-    logging.debug(f'{expected_turns} {average_turns}\n\n')
+    stats.debug('%s %s\n\n', expected_turns, average_turns)
     return average_turns
 
 
-def get_guess_scores_dict(guess):
-    # TODO just store the dict as a json file
-    pass
+def _exceeds_bound(memo, lower_key, bound):
+    if stats.enabled:
+        stats.count('subtrees_pruned')
+    if bound > memo.get(lower_key, -math.inf):
+        memo.put(lower_key, bound)
+    return math.inf
 
 
-def is_in_list(guess, filename):
-    """
-        format of file:
+_search_guess_pool = None  # an ExactSearchPool worker's guess pool
+_search_memo = None
+_search_stops = None
 
-    guess 100.1234
-    roate 476.2341234
-    slink 98.23412341234
-    ...
-    """
 
-    with open(filename) as f:
-        guesses = f.readlines()
-    word_scores = {}
-    for x in guesses:
-        x = x.strip()
-        x = x.split(' ')
+def _init_search_worker(guess_pool, stops):
+    global _search_guess_pool, _search_memo, _search_stops
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent shuts the pool down
+    _search_guess_pool = guess_pool
+    _search_memo = TranspositionTable()
+    _search_stops = stops
 
 
-def store_guess_score(new_guess, new_score, filename):
-    """
-        format of file:
+def _candidate_turns(guess, answer_pool, existing_feedback, guesses_tried, bound,
+                     deadline_time, slot):
+    return turns_until_solved(guess, _search_guess_pool, answer_pool, existing_feedback,
+                              set(guesses_tried), memo=_search_memo, bound=bound,
+                              deadline=Deadline(deadline_time, _search_stops[slot]))
 
-    guess 100.1234
-    roate 476.2341234
-    slink 98.23412341234
-    ...
 
+class ExactSearchPool:
+    """
+    Worker processes that evaluate find_exact_best_guess() candidates in
+    parallel. Workers are forked with the guess pool and pattern matrix already
+    loaded, so only the candidate and answer pool are sent with each task, and
+    keep their memo between searches.
+
+    Candidates are handed out best first, one per idle worker, with the bound
+    from the best guess so far, so pruning works as in the serial search. At
+    most one task per worker is out at once, each in a slot with its own stop
+    event, so a candidate that can no longer be selected is stopped at its
+    next node even if it is already running. On return, or SearchTimeout,
+    every task left is stopped and waited for, so the workers are idle.
     """
-    with open(filename) as f:
-        guesses = f.readlines()
-    word_scores = {}
-    for x in guesses:
-        x = x.strip()
-        x = x.split(' ')
-        guess, score = str(x[0]), float(x[1])
-        word_scores[guess] = score
+    def __init__(self, workers, guess_pool):
+        get_pattern_matrix()  # loaded before forking so workers share it
+        context = multiprocessing.get_context('fork')
+        self.workers = workers
+        self.guess_pool = guess_pool
+        self.stops = [context.Event() for _ in range(workers)]
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            workers, mp_context=context, initializer=_init_search_worker,
+            initargs=(guess_pool, self.stops))
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+    def find_best_guess(self, candidates, order, answer_pool, existing_feedback,
+                        guesses_tried, best_case_turns, deadline=None):
+        """ The parallel loop of find_exact_best_guess() over candidates in order """
+        deadline_time = deadline.time if deadline is not None else math.inf
+        order = iter(order)
+        free_slots = list(range(self.workers))
+        pending = {}  # future -> (candidate index, bound, slot)
+        stopping = {}  # future -> slot, of tasks told to stop
+        best_key = None
+        best_guess = None
+
+        def submit() -> bool:
+            """ Submits the next selectable candidate, False if none are left """
+            for i in order:
+                guess, is_answer = candidates[i]
+                bound = _selection_bound(best_key, i, is_answer, best_case_turns)
+                if bound is None:
+                    if stats.enabled:
+                        stats.count('candidates_pruned')
+                    continue
+                slot = free_slots.pop()
+                self.stops[slot].clear()
+                future = self.executor.submit(_candidate_turns, guess, answer_pool,
+                                              existing_feedback, guesses_tried, bound,
+                                              deadline_time, slot)
+                pending[future] = (i, bound, slot)
+                return True
+            return False
 
-    if new_guess not in word_scores:
-        print(f'adding!! {new_guess}')
-        word_scores[new_guess] = new_score
-    word_scores = {k: v for k, v in sorted(word_scores.items(), key=lambda item: item[1])}
+        try:
+            exhausted = False
+            while True:
+                while free_slots and not exhausted:
+                    exhausted = not submit()
+                if not pending and exhausted:
+                    break
+                done, _ = concurrent.futures.wait(
+                    [*pending, *stopping], return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    if future in stopping:
+                        free_slots.append(stopping.pop(future))
+                        continue
+                    i, bound, slot = pending.pop(future)
+                    free_slots.append(slot)
+                    try:
+                        turns = future.result()
+                    except SearchTimeout:
+                        raise SearchTimeout(best_guess) from None
+                    guess, is_answer = candidates[i]
+                    if turns > bound:
+                        if stats.enabled:
+                            stats.count('candidates_pruned')
+                    else:
+                        key = _selection_key(i, is_answer, turns, best_case_turns)
+                        if best_key is None or key < best_key:
+                            best_key, best_guess = key, guess
+                # outstanding candidates that can no longer be selected
+                for future, (i, _, slot) in list(pending.items()):
+                    if _selection_bound(best_key, i, candidates[i][1], best_case_turns) is None:
+                        del pending[future]
+                        self.stop(future, slot, stopping, free_slots)
+                        if stats.enabled:
+                            stats.count('candidates_pruned')
+        finally:
+            for future, (_, _, slot) in pending.items():
+                self.stop(future, slot, stopping, free_slots)
+            concurrent.futures.wait(stopping)
+        return best_guess
+
+    def stop(self, future, slot, stopping, free_slots):
+        """ Cancels a task not yet started, or else tells it to stop and adds it to stopping """
+        if future.cancel():
+            free_slots.append(slot)
+        else:
+            self.stops[slot].set()
+            stopping[future] = slot
 
-    for k, v in word_scores.items():
-        print(k, v)
 
+_exact_search_pool = None
 
 
-def fetch_official_answer_and_id():
+def get_exact_search_pool(workers, guess_pool) -> ExactSearchPool:
+    """ The ExactSearchPool for workers and guess_pool, replacing any other """
+    global _exact_search_pool
+    search = _exact_search_pool
+    if search is None or search.workers != workers or search.guess_pool is not guess_pool:
+        if search is not None:
+            search.close()
+        _exact_search_pool = search = ExactSearchPool(workers, guess_pool)
+    return search
+
+
+FIRST_GUESS = 'roate'
+MAX_GUESSES = 7
+
+
+class GameStates:
     """
-    Opens a chrome browser to get the current dates wordle answer as set by the New York Times
+    Solver states reachable from the start of a game. A state only depends on
+    the guesses and patterns so far, so states are cached by that path
+    (guess, pattern, guess, pattern, ...), and each feedback merge, pool filter
+    and find_best_guess() call is made once per distinct state however many
+    games pass through it. memo is shared between all exact solves.
+
+    book is an optional strategy_book.BookNode to follow while it has the path.
+    solver_options are passed on to search_best_guess(), and levels keeps the
+    level each guess was found at ('book' and 'first_guess' when not searched).
+
+    cache is an optional guess_cache.GuessCache, made for the same word lists
+    and solver_options, consulted before searching and stored to after.
+    Index pools are converted to words, see find_best_guess().
     """
-    options = Options()
-    options.add_argument('--incognito')
-    options.add_argument('disable-popup-blocking')
-    options.add_argument('--headless')  # invisible browser
+    def __init__(self, guess_pool=None, answer_pool=None, book=None,
+                 first_guess=FIRST_GUESS, memo=None, cache=None, **solver_options):
+        self.guess_pool = guess_pool if guess_pool is not None else get_all_words_list()
+        answer_pool = answer_pool if answer_pool is not None else get_answer_list()
+        self.guess_pool, answer_pool = _word_pools(self.guess_pool, answer_pool)
+        self.first_guess = first_guess
+        self.memo = memo if memo is not None else TranspositionTable()
+        self.cache = cache
+        self.solver_options = solver_options
+        # path -> (feedback, answer pool, book node)
+        self.states = {(): (Feedback(), answer_pool, book)}
+        self.next_guesses = {}  # path -> guess played from that state
+        self.levels = {}  # path -> level the guess was found at
+
+    def get(self, path):
+        """ Returns (feedback, answer pool) after path, building any missing states """
+        if path not in self.states:
+            *parent, guess, pattern = path
+            feedback, pool, book_node = self.get(tuple(parent))
+            new_feedback = Feedback()
+            new_feedback.merge(feedback)
+            new_feedback.merge(feedback_from_pattern(guess, pattern))
+            if book_node is not None:
+                book_node = book_node.child(pattern)
+            self.states[path] = (new_feedback, get_possible_answers(new_feedback, pool),
+                                 book_node)
+        return self.states[path]
+
+    def next_guess(self, path) -> str:
+        """ Returns the solver's guess after path """
+        guess = self.next_guesses.get(path)
+        if guess is None:
+            feedback, pool, book_node = self.get(path)
+            if not pool:
+                raise ValueError('no possible answers match the feedback')
+            if book_node is not None:
+                guess, level = book_node.guess, 'book'
+            elif not path:
+                guess, level = self.first_guess, 'first_guess'
+            else:
+                guess, level = self.search(pool, feedback, set(path[::2]))
+            self.next_guesses[path] = guess
+            self.levels[path] = level
+        return guess
+
+    def search(self, pool, feedback, guesses_tried):
+        """ search_best_guess() through the cache, if there is one """
+        if self.cache is None:
+            return search_best_guess(self.guess_pool, pool, feedback, guesses_tried,
+                                     memo=self.memo, **self.solver_options)
+        found = self.cache.get(pool, feedback, guesses_tried)
+        if found is not None:
+            return found
+        guess, level = search_best_guess(self.guess_pool, pool, feedback, guesses_tried,
+                                         memo=self.memo, **self.solver_options)
+        # a guess cut short by a time budget depends on the machine, so isn't kept
+        if level == 'exact' or self.solver_options.get('time_budget') is None:
+            self.cache.put(pool, feedback, guesses_tried, guess, level)
+        return guess, level
+
+
+def iter_games(answers=None, guess_pool=None, answer_pool=None, book=None,
+               first_guess=FIRST_GUESS, memo=None, states=None, cache=None,
+               **solver_options):
+    """
+    Plays a game against each of answers (default every answer), yielding
+    (answer, {"guesses", "num_guesses", "time"}) as each game is solved.
+
+    Games share one GameStates, so solver work for a state is done once per
+    batch rather than once per game. Pass states to keep it between batches,
+    and cache (see guess_cache.py) to keep best guesses between runs.
+
+    With a time_budget solver option, entries also have the search level each
+    guess reached under "levels" (see search_best_guess()).
+    """
+    if answers is None:
+        answers = answer_pool if answer_pool is not None else get_answer_list()
+    answers = _as_words(answers)
+    if states is None:
+        states = GameStates(guess_pool, answer_pool, book, first_guess, memo, cache,
+                            **solver_options)
+
+    for answer in answers:
+        start = time.perf_counter()
+        if stats.enabled:
+            stats.reset()
+        path = ()
+        guesses = []
+        levels = []
+        while len(guesses) < MAX_GUESSES:
+            if stats.enabled:
+                stats.start_turn()
+            pool_size = len(states.get(path)[1])
+            guess = states.next_guess(path)
+            level = states.levels[path]
+            guesses.append(guess)
+            levels.append(level)
+            logger.info('turn %s guess %s from %s possible answers',
+                        len(guesses), guess, pool_size)
+            if guess != answer:
+                path += (guess, patterns.get_pattern(guess, answer))
+                states.get(path)
+            if stats.enabled:
+                stats.end_turn(guess=guess, pool_size=pool_size, level=level)
+            if guess == answer:
+                break
+
+        entry = {
+            "guesses": guesses,
+            "num_guesses": len(guesses),
+            "time": round(time.perf_counter() - start, 3)
+            }
+        if states.solver_options.get('time_budget') is not None:
+            entry["levels"] = levels
+        if stats.enabled:
+            entry["metrics"] = stats.to_dict()
+        yield answer, entry
+
+
+def solve_games(answers=None, guess_pool=None, answer_pool=None, book=None,
+                first_guess=FIRST_GUESS, memo=None, cache=None, **solver_options) -> dict:
+    """ Returns {answer: entry} for every game of iter_games() """
+    return dict(iter_games(answers, guess_pool, answer_pool, book, first_guess,
+                           memo, cache=cache, **solver_options))
 
-    date = datetime.today().strftime('%Y-%m-%d')
-    driver = webdriver.Chrome(options=options)
-    driver.get('https://www.nytimes.com/svc/wordle/v2/{}.json' .format(date))
-    soup = BeautifulSoup(driver.page_source, features="html.parser")
-    json_data = json.loads(soup.find("body").text)
-    ANSWER = json_data['solution']
-    wordle_iter = json_data['days_since_launch']
-    driver.quit()
 
-    return [ANSWER, wordle_iter]
+def fetch_official_answer_and_id():
+    """
+    Returns today's wordle answer and id as set by the New York Times, cached by
+    date in daily_answer.CACHE_DIR
+    """
+    return daily_answer.get_answer_and_id()
 
 
 def get_attempt_text(guesses, answer, wordle_id=''):
@@ -570,12 +1866,12 @@ def get_attempt_text(guesses, answer, wordle_id=''):
     text = f'WordleBot{wordle_id} {score}/6'
 
     for guess in guesses:
-        f = get_guess_feedback(guess, answer)
+        colours = patterns.pattern_colours(patterns.get_pattern(guess, answer))
         text += '\n'
-        for pos in range(0, 5):
-            if f.greens[pos]:
+        for colour in colours:
+            if colour == patterns.GREEN:
                 text += green_square
-            elif f.yellows[pos]:
+            elif colour == patterns.YELLOW:
                 text += yellow_square
             else:
                 text += gray_square
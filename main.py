@@ -1,7 +1,11 @@
 import lib
+import guess_cache
+import strategy_book
+from solver_stats import stats
 import random
 import logging
 import sys
+import json
 
 def main(): 
 
@@ -11,43 +15,52 @@ def main():
     guess_pool = lib.get_all_words_list()
     answer_pool = lib.get_answer_list()
 
-    if any(arg in {'random', 'r'} for arg in sys.argv):
+    # --metrics prints per turn solver statistics as JSON after the game
+    metrics = '--metrics' in sys.argv
+    # --time-budget=SECONDS caps each turn's search, see lib.search_best_guess()
+    budgets = [arg.partition('=')[2] for arg in sys.argv if arg.startswith('--time-budget=')]
+    time_budget = float(budgets[-1]) if budgets else None
+    # --workers=N solves exactly with N processes, see lib.find_exact_best_guess()
+    workers = [arg.partition('=')[2] for arg in sys.argv if arg.startswith('--workers=')]
+    workers = int(workers[-1]) if workers else None
+    # --no-cache searches every guess rather than reading guess_cache.CACHE_FILE
+    use_cache = '--no-cache' not in sys.argv
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    if metrics:
+        stats.enable()
+
+    if any(arg in {'random', 'r'} for arg in args):
         ANSWER = random.choice(answer_pool)
         wordle_id = ''
-    elif len(sys.argv) > 1:
-        if sys.argv[1] in answer_pool:
-            ANSWER = sys.argv[1]
+    elif args:
+        if args[0] in answer_pool:
+            ANSWER = args[0]
             wordle_id = ''
         else:
             raise ValueError('Please provide a valid 5 letter word to solve. '
-                             f'{sys.argv[1]} is not a valid word.')
+                             f'{args[0]} is not a valid word.')
     else:
         ANSWER, wordle_id = lib.fetch_official_answer_and_id()
     logging.info(f'ANSWER IS {ANSWER}')
 
-    turn = 0
-    solved = False
-    feedback = lib.Feedback()
-    guesses = []
-    while not solved and turn <= 6:
-        if turn == 0:
-            guess = 'roate'
-        else:
-            guess = lib.find_best_guess(guess_pool, answer_pool, feedback, set(guesses))
-        logging.info(f'turn {turn+1} guess {guess}')
-        guesses.append(guess)
-        if guess == ANSWER:
-            solved = True
-        else:
-            new_feedback = lib.get_guess_feedback(guess, ANSWER)
-            feedback.merge(new_feedback)
-            answer_pool = lib.get_possible_answers(feedback, answer_pool)
-        turn += 1
-        logging.info(f'{vars(feedback)}')
-        logging.info(f'possible answers {answer_pool}')
-        logging.info(f'guesses {guesses}\n')
+    # follow the precomputed strategy book if it matches the word lists, unless
+    # search options are given as the book was built without them
+    solver_options = {'time_budget': time_budget, 'workers': workers}
+    book = None
+    if all(value is None for value in solver_options.values()):
+        book = strategy_book.load_book(guess_pool, answer_pool)
+    cache = guess_cache.open_cache(guess_pool, answer_pool, **solver_options) if use_cache else None
+    entry = lib.solve_games([ANSWER], guess_pool, answer_pool, book, cache=cache,
+                            **solver_options)[ANSWER]
+    guesses = entry['guesses']
     text = lib.get_attempt_text(guesses, ANSWER, wordle_id)
     print(f'{text}\nAnswer was {ANSWER}, guessed {guesses}\n')
+    if time_budget is not None:
+        print(f'search levels {entry["levels"]}')
+    if cache is not None:
+        logging.info(cache.report())
+    if metrics:
+        print(json.dumps(entry['metrics'], indent=2))
 
 if __name__ == '__main__':
     main()
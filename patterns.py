@@ -0,0 +1,243 @@
+"""
+Precomputed guess x answer feedback patterns.
+
+A pattern is the colouring of a guess against an answer stored as a base-3
+number, one digit per position (gray=0, yellow=1, green=2, position 0 is the
+least significant digit), so every pair fits in a uint8 between 0 and 242.
+
+The pattern of every (word in words.txt, answer in answers.txt) pair is built
+once into PATTERNS_FILE and memory-mapped on load. PATTERNS_META records a hash
+of the word lists the matrix was built from, so it is rebuilt automatically
+when either list changes.
+
+    python patterns.py            # build (or rebuild if stale)
+    python patterns.py --verify   # check every pair against get_guess_feedback
+"""
+import hashlib
+import json
+import logging
+import os
+import sys
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PATTERNS_FILE = 'patterns.npy'
+PATTERNS_META = 'patterns.json'
+
+GRAY, YELLOW, GREEN = 0, 1, 2
+NUM_PATTERNS = 3**5
+ALL_GREEN = NUM_PATTERNS - 1
+_POWERS = (1, 3, 9, 27, 81)
+PATTERN_CHARS = 'byg'  # gray, yellow, green as written by pattern_text()
+_CHUNK_SIZE = 256  # guesses per vectorised block when building
+
+
+def get_pattern(guess, answer) -> int:
+    """ Compares guess to answer and returns the base-3 pattern code """
+    code = 0
+    unmatched = []  # answer letters not matched by a green
+    for g_let, a_let in zip(guess, answer):
+        if g_let != a_let:
+            unmatched.append(a_let)
+    for i, (g_let, a_let) in enumerate(zip(guess, answer)):
+        if g_let == a_let:
+            code += GREEN * _POWERS[i]
+        elif g_let in unmatched:
+            unmatched.remove(g_let)
+            code += YELLOW * _POWERS[i]
+    return code
+
+
+def pattern_colours(code) -> list:
+    """ Decodes a pattern code to a list of 5 colours """
+    colours = []
+    for _ in range(5):
+        code, colour = divmod(code, 3)
+        colours.append(colour)
+    return colours
+
+
+def parse_pattern(text) -> int:
+    """ Returns the code of a pattern written like 'bbygb' (b=gray, y=yellow, g=green) """
+    text = text.lower()
+    if len(text) != 5 or any(c not in PATTERN_CHARS for c in text):
+        raise ValueError(f'{text!r} is not a pattern of 5 b/y/g letters')
+    return sum(PATTERN_CHARS.index(c) * power for c, power in zip(text, _POWERS))
+
+
+def pattern_text(code) -> str:
+    """ Writes a pattern code like 'bbygb', the inverse of parse_pattern() """
+    return ''.join(PATTERN_CHARS[colour] for colour in pattern_colours(code))
+
+
+def encode_words(words) -> np.ndarray:
+    """ Returns an (n, 5) uint8 array of the letters of each word """
+    data = ''.join(words).encode('ascii')
+    return np.frombuffer(data, dtype=np.uint8).reshape(len(words), 5)
+
+
+def compute_patterns(guesses, answers) -> np.ndarray:
+    """
+    Returns a (len(guesses), len(answers)) uint8 array of pattern codes,
+    computed with numpy a block of guesses at a time
+    """
+    g_lets = encode_words(guesses)
+    a_lets = encode_words(answers)
+    patterns = np.empty((len(guesses), len(answers)), dtype=np.uint8)
+
+    for start in range(0, len(guesses), _CHUNK_SIZE):
+        g = g_lets[start:start + _CHUNK_SIZE, None, :]  # (chunk, 1, 5)
+        a = a_lets[None, :, :]                           # (1, answers, 5)
+        greens = g == a
+        codes = np.zeros(greens.shape[:2], dtype=np.uint8)
+        for i in range(5):
+            # answer letters still available for a yellow, once greens are used
+            available = np.zeros(codes.shape, dtype=np.int8)
+            for k in range(5):
+                available += (a[:, :, k] == g[:, :, i]) & ~greens[:, :, k]
+            # earlier non-green copies of the same letter in the guess claim first
+            for j in range(i):
+                available -= (g[:, :, j] == g[:, :, i]) & ~greens[:, :, j]
+            yellows = ~greens[:, :, i] & (available > 0)
+            codes += greens[:, :, i] * np.uint8(GREEN * _POWERS[i])
+            codes += yellows * np.uint8(YELLOW * _POWERS[i])
+        patterns[start:start + _CHUNK_SIZE] = codes
+    return patterns
+
+
+def files_hash(*filenames) -> str:
+    """ sha256 of the contents of filenames, used to tell if built files are stale """
+    sha = hashlib.sha256()
+    for filename in filenames:
+        with open(filename, 'rb') as f:
+            sha.update(f.read())
+    return sha.hexdigest()
+
+
+def _read_words(filename):
+    with open(filename) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+class PatternMatrix:
+    """
+    Read-only guess x answer pattern lookup, indexed by position of the
+    word in words.txt and of the answer in answers.txt
+    """
+    def __init__(self, words, answers, matrix):
+        self.words = words
+        self.answers = answers
+        self.matrix = matrix
+        self.word_index = {word: i for i, word in enumerate(words)}
+        self.answer_index = {answer: i for i, answer in enumerate(answers)}
+
+    def lookup(self, word_idx, answer_idx) -> int:
+        return int(self.matrix[word_idx, answer_idx])
+
+    def row(self, word_idx) -> np.ndarray:
+        """ Patterns of a word against every answer """
+        return self.matrix[word_idx]
+
+    def pattern(self, guess, answer) -> int:
+        """ Pattern by word, falling back to computing it for unknown words """
+        i = self.word_index.get(guess)
+        j = self.answer_index.get(answer)
+        if i is None or j is None:
+            return get_pattern(guess, answer)
+        return int(self.matrix[i, j])
+
+
+def build_pattern_matrix(words_file, answers_file,
+                         patterns_file=PATTERNS_FILE, meta_file=PATTERNS_META):
+    words = _read_words(words_file)
+    answers = _read_words(answers_file)
+    logger.info(f'building {len(words)} x {len(answers)} pattern matrix...')
+    matrix = compute_patterns(words, answers)
+    np.save(patterns_file, matrix)
+    with open(meta_file, 'w') as f:
+        json.dump({'hash': files_hash(words_file, answers_file),
+                   'shape': list(matrix.shape)}, f)
+
+
+def update_pattern_matrix(old_words_data, words_file, answers_file,
+                          patterns_file=PATTERNS_FILE, meta_file=PATTERNS_META) -> int:
+    """
+    Rewrites the matrix after words_file has changed from old_words_data (its
+    previous contents, as bytes). Rows of words that were in the old list are
+    copied and only the rows of added words are computed. Builds from scratch
+    if the matrix wasn't built from the old list and the current answers.
+    Returns the number of rows computed.
+    """
+    words = _read_words(words_file)
+    answers = _read_words(answers_file)
+    with open(answers_file, 'rb') as f:
+        old_hash = hashlib.sha256(old_words_data + f.read()).hexdigest()
+    try:
+        with open(meta_file) as f:
+            meta = json.load(f)
+        old = np.load(patterns_file, mmap_mode='r')
+    except (OSError, ValueError):
+        meta, old = {}, None
+    if meta.get('hash') != old_hash:
+        build_pattern_matrix(words_file, answers_file, patterns_file, meta_file)
+        return len(words)
+
+    old_index = {word: i for i, word in enumerate(old_words_data.decode().split())}
+    kept = [i for i, word in enumerate(words) if word in old_index]
+    added = [i for i, word in enumerate(words) if word not in old_index]
+    logger.info(f'updating pattern matrix: {len(kept)} rows kept, {len(added)} computed')
+    matrix = np.empty((len(words), len(answers)), dtype=np.uint8)
+    matrix[kept] = old[[old_index[words[i]] for i in kept]]
+    if added:
+        matrix[added] = compute_patterns([words[i] for i in added], answers)
+    # the old matrix may be memory-mapped, so the new one replaces it whole
+    with open(patterns_file + '.tmp', 'wb') as f:
+        np.save(f, matrix)
+    os.replace(patterns_file + '.tmp', patterns_file)
+    with open(meta_file, 'w') as f:
+        json.dump({'hash': files_hash(words_file, answers_file),
+                   'shape': list(matrix.shape)}, f)
+    return len(added)
+
+
+def is_stale(words_file, answers_file,
+             patterns_file=PATTERNS_FILE, meta_file=PATTERNS_META) -> bool:
+    if not (os.path.exists(patterns_file) and os.path.exists(meta_file)):
+        return True
+    with open(meta_file) as f:
+        meta = json.load(f)
+    return meta.get('hash') != files_hash(words_file, answers_file)
+
+
+def load_pattern_matrix(words_file, answers_file,
+                        patterns_file=PATTERNS_FILE, meta_file=PATTERNS_META):
+    """ Memory-maps the pattern matrix, rebuilding it first if it is stale """
+    if is_stale(words_file, answers_file, patterns_file, meta_file):
+        build_pattern_matrix(words_file, answers_file, patterns_file, meta_file)
+    matrix = np.load(patterns_file, mmap_mode='r')
+    return PatternMatrix(_read_words(words_file), _read_words(answers_file), matrix)
+
+
+def verify_pattern_matrix(patterns, feedback_fn, decode_fn, words=None) -> list:
+    """
+    Returns the (guess, answer) pairs where decode_fn(guess, pattern) is not
+    equal to feedback_fn(guess, answer), checking every word unless given
+    """
+    mismatches = []
+    for guess in words if words is not None else patterns.words:
+        row = patterns.row(patterns.word_index[guess])
+        for j, answer in enumerate(patterns.answers):
+            if decode_fn(guess, int(row[j])) != feedback_fn(guess, answer):
+                mismatches.append((guess, answer))
+    return mismatches
+
+
+if __name__ == '__main__':
+    import lib
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    matrix = lib.get_pattern_matrix()
+    if '--verify' in sys.argv:
+        bad = verify_pattern_matrix(matrix, lib.get_guess_feedback, lib.feedback_from_pattern)
+        print(f'{len(bad)} mismatched pairs {bad[:10]}')
@@ -0,0 +1,287 @@
+"""
+Local solver service that keeps the word lists, pattern matrix, strategy book
+and solver caches warm between requests.
+
+    python solver_service.py serve [--port 8765] [--workers N]
+    python solver_service.py guess roate:bbyyy sated:bgggg   # best next guess
+    python solver_service.py solve mated                     # play a game
+    python solver_service.py stats                           # request latencies
+
+Requests are JSON over HTTP on localhost, patterns are written b/y/g for
+gray/yellow/green:
+
+    POST /guess  {"guesses": ["roate", "sated"], "patterns": ["bbyyy", "bgggg"]}
+                 -> {"guess": "baghs", "possible_answers": 6}
+    POST /solve  {"answer": "mated"} -> {"guesses": [...], "num_guesses": 5, "time": 0.01}
+    GET  /stats  -> {"requests": n, "latency": {path: {"count", "p50", "p90", "p99", "max"}}}
+
+The event loop only parses requests and replies. Solving runs in a pool of
+worker processes, forked once the word data is loaded, so a slow search doesn't
+hold up other requests. Each worker keeps its own lib.GameStates between
+requests, so repeated states are answered from cache. Once it holds more than
+MAX_STATES states it is started afresh, keeping only its bounded memo, so
+clients sending many distinct paths can't grow a worker without limit.
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import http.client
+import json
+import logging
+import multiprocessing
+import signal
+import sys
+import time
+from collections import deque
+
+import lib
+import patterns
+import strategy_book
+
+logger = logging.getLogger(__name__)
+
+HOST = '127.0.0.1'
+PORT = 8765
+LATENCY_WINDOW = 10_000  # latencies kept per path for percentiles
+MAX_BODY = 64 * 1024
+MAX_STATES = 20_000  # game states a worker keeps before starting afresh
+
+_states = None  # the worker process's lib.GameStates
+_states_args = None  # (guess_pool, answer_pool, book, max_states) it is made with
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _init_worker(guess_pool, answer_pool, book, max_states=MAX_STATES):
+    global _states_args
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the server shuts the pool down
+    _states_args = (guess_pool, answer_pool, book, max_states)
+    _get_states()
+
+
+def _get_states() -> lib.GameStates:
+    """ The worker's GameStates, started afresh once it has more than max_states """
+    global _states
+    guess_pool, answer_pool, book, max_states = _states_args
+    if _states is None or len(_states.states) > max_states:
+        memo = _states.memo if _states is not None else None
+        _states = lib.GameStates(guess_pool, answer_pool, book, memo=memo)
+    return _states
+
+
+def _ping():
+    return True
+
+
+def _best_guess(path) -> dict:
+    states = _get_states()
+    guess = states.next_guess(path)
+    return {'guess': guess, 'possible_answers': len(states.get(path)[1])}
+
+
+def _solve(answer) -> dict:
+    return next(lib.iter_games([answer], states=_get_states()))[1]
+
+
+def percentiles(latencies) -> dict:
+    """ Nearest rank percentiles of latencies, in milliseconds """
+    ordered = sorted(latencies)
+
+    def rank(p):
+        return round(ordered[max(0, -(-len(ordered) * p // 100) - 1)] * 1000, 3)
+    return {'count': len(ordered), 'p50': rank(50), 'p90': rank(90),
+            'p99': rank(99), 'max': round(ordered[-1] * 1000, 3)}
+
+
+class SolverService:
+    """
+    Serves /guess, /solve and /stats. start() loads the worker pool, so the
+    word data must be loaded (or passed in) before it is called.
+    """
+    def __init__(self, workers=1, guess_pool=None, answer_pool=None, book=None,
+                 max_states=MAX_STATES):
+        self.workers = workers
+        self.max_states = max_states
+        self.guess_pool = guess_pool if guess_pool is not None else lib.get_all_words_list()
+        self.answer_pool = answer_pool if answer_pool is not None else lib.get_answer_list()
+        self.book = book
+        self.guess_set = set(self.guess_pool)
+        self.answer_set = set(self.answer_pool)
+        self.executor = None
+        self.requests = 0
+        self.latencies = {}
+
+    async def start(self, host=HOST, port=PORT) -> asyncio.AbstractServer:
+        lib.get_pattern_matrix()  # loaded before forking so workers share it
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            self.workers, mp_context=multiprocessing.get_context('fork'),
+            initializer=_init_worker,
+            initargs=(self.guess_pool, self.answer_pool, self.book, self.max_states))
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, _ping)
+                               for _ in range(self.workers)))
+        return await asyncio.start_server(self.handle, host, port)
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+
+    async def handle(self, reader, writer):
+        start = time.perf_counter()
+        path = None
+        try:
+            method, path, body = await read_request(reader)
+            status, reply = await self.dispatch(method, path, body)
+        except BadRequest as e:
+            status, reply = 400, {'error': str(e)}
+        except Exception:
+            logger.exception('request to %s failed', path)
+            status, reply = 500, {'error': 'internal error'}
+        data = json.dumps(reply).encode()
+        writer.write(f'HTTP/1.1 {status} {http.client.responses[status]}\r\n'
+                     'Content-Type: application/json\r\n'
+                     f'Content-Length: {len(data)}\r\n'
+                     'Connection: close\r\n\r\n'.encode() + data)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+        self.requests += 1
+        if path is not None:
+            latencies = self.latencies.setdefault(path, deque(maxlen=LATENCY_WINDOW))
+            latencies.append(time.perf_counter() - start)
+
+    async def dispatch(self, method, path, body):
+        loop = asyncio.get_running_loop()
+        if method == 'POST' and path == '/guess':
+            guess_path = self.parse_guesses(body)
+            try:
+                return 200, await loop.run_in_executor(self.executor, _best_guess, guess_path)
+            except ValueError as e:  # feedback that no answer matches
+                raise BadRequest(str(e))
+        if method == 'POST' and path == '/solve':
+            answer = body.get('answer')
+            if answer not in self.answer_set:
+                raise BadRequest(f'{answer!r} is not a possible answer')
+            return 200, await loop.run_in_executor(self.executor, _solve, answer)
+        if method == 'GET' and path == '/stats':
+            return 200, self.stats()
+        return 404, {'error': f'no such endpoint {method} {path}'}
+
+    def parse_guesses(self, body) -> tuple:
+        """ Returns the lib.GameStates path of the guesses and patterns in body """
+        guesses = body.get('guesses', [])
+        texts = body.get('patterns', [])
+        if not isinstance(guesses, list) or not isinstance(texts, list) \
+                or len(guesses) != len(texts):
+            raise BadRequest('guesses and patterns must be lists of the same length')
+        path = ()
+        for guess, text in zip(guesses, texts):
+            if guess not in self.guess_set:
+                raise BadRequest(f'{guess!r} is not a valid guess')
+            try:
+                path += (guess, patterns.parse_pattern(str(text)))
+            except ValueError as e:
+                raise BadRequest(str(e))
+        return path
+
+    def stats(self) -> dict:
+        return {'requests': self.requests,
+                'latency': {path: percentiles(latencies)
+                            for path, latencies in self.latencies.items()}}
+
+
+async def read_request(reader):
+    """ Returns (method, path, JSON body) of an HTTP request """
+    try:
+        request_line = await reader.readline()
+        method, path, _ = request_line.decode('ascii').split()
+        length = 0
+        while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.strip().lower() == 'content-length':
+                length = int(value)
+    except ValueError:
+        raise BadRequest('malformed request')
+    if length > MAX_BODY:
+        raise BadRequest('request body too large')
+    body = await reader.readexactly(length) if length else b'{}'
+    try:
+        body = json.loads(body)
+    except ValueError:
+        raise BadRequest('request body is not JSON')
+    if not isinstance(body, dict):
+        raise BadRequest('request body must be a JSON object')
+    return method, path, body
+
+
+def request(method, path, body=None, host=HOST, port=PORT, timeout=60):
+    """ Sends a request to the service, returns (status, reply) """
+    connection = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        data = json.dumps(body).encode() if body is not None else None
+        connection.request(method, path, data, {'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+async def serve(host, port, workers, use_book=True):
+    guess_pool = lib.get_all_words_list()
+    answer_pool = lib.get_answer_list()
+    book = strategy_book.load_book(guess_pool, answer_pool) if use_book else None
+    service = SolverService(workers, guess_pool, answer_pool, book)
+    server = await service.start(host, port)
+    print(f'serving on http://{host}:{port} with {workers} worker(s)')
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        async with server:
+            await stop.wait()
+    finally:
+        service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Local solver service and client')
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve_parser = commands.add_parser('serve', help='run the service')
+    serve_parser.add_argument('--workers', type=int, default=2)
+    serve_parser.add_argument('--no-book', action='store_true',
+                              help=f'search live even if {strategy_book.BOOK_FILE} is present')
+    guess_parser = commands.add_parser('guess', help='best next guess')
+    guess_parser.add_argument('turns', nargs='*', metavar='GUESS:PATTERN')
+    solve_parser = commands.add_parser('solve', help='play a game against an answer')
+    solve_parser.add_argument('answer')
+    commands.add_parser('stats', help='request latency percentiles')
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        logging.basicConfig(level=logging.WARNING, format='%(message)s')
+        asyncio.run(serve(args.host, args.port, args.workers, not args.no_book))
+        print('stopped')
+        return 0
+
+    if args.command == 'guess':
+        turns = [turn.partition(':') for turn in args.turns]
+        body = {'guesses': [guess for guess, _, _ in turns],
+                'patterns': [pattern for _, _, pattern in turns]}
+        status, reply = request('POST', '/guess', body, args.host, args.port)
+    elif args.command == 'solve':
+        status, reply = request('POST', '/solve', {'answer': args.answer}, args.host, args.port)
+    else:
+        status, reply = request('GET', '/stats', None, args.host, args.port)
+    print(json.dumps(reply, indent=2))
+    return 0 if status == 200 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""
+Lightweight statistics on what the solver does each turn.
+
+The solver checks stats.enabled before recording anything, so collecting
+costs one attribute lookup per call site when switched off. Debug messages from
+the solver's hot loops go through stats.debug() with lazy %-style arguments,
+so nothing is formatted unless debug logging is on.
+"""
+import json
+import logging
+import time
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+
+class SolverStats:
+    """
+    Counts solver calls, recursion nodes expanded, max search depth and memo
+    hit rate, overall and for each turn between start_turn() and end_turn()
+    """
+    def __init__(self):
+        self.enabled = False
+        self.reset()
+
+    def reset(self):
+        self.counters = Counter()
+        self.max_depth = 0
+        self.turns = []
+        self._turn_start = None
+        self._turn_counters = None
+        self._turn_max_depth = 0
+
+    def enable(self):
+        self.reset()
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def node(self, depth):
+        """ Records a recursion node expanded at the given search depth """
+        self.counters['nodes_expanded'] += 1
+        if depth > self._turn_max_depth:
+            self._turn_max_depth = depth
+            self.max_depth = max(self.max_depth, depth)
+
+    def start_turn(self):
+        self._turn_start = time.perf_counter()
+        self._turn_counters = self.counters.copy()
+        self._turn_max_depth = 0
+
+    def end_turn(self, **info):
+        """ Stores the turn's time and counts, along with any info given """
+        turn = dict(info)
+        turn['time'] = round(time.perf_counter() - self._turn_start, 6)
+        turn['max_depth'] = self._turn_max_depth
+        counters = self.counters - self._turn_counters
+        turn.update(counters)
+        turn['memo_hit_rate'] = _hit_rate(counters)
+        self.turns.append(turn)
+
+    def debug(self, msg, *args):
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(msg, *args)
+
+    def to_dict(self) -> dict:
+        return {
+            'counters': dict(self.counters),
+            'max_depth': self.max_depth,
+            'memo_hit_rate': _hit_rate(self.counters),
+            'turns': self.turns,
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+
+def _hit_rate(counters):
+    lookups = counters['memo_hits'] + counters['memo_misses']
+    return round(counters['memo_hits'] / lookups, 4) if lookups else None
+
+
+stats = SolverStats()
@@ -0,0 +1,143 @@
+"""
+Precomputed decision tree ("strategy book") of the solver's guesses.
+
+The builder plays the solver's policy from the first guess down every branch of
+feedback, so every game against the answer list is a walk down the tree with one
+dict lookup per turn. The book records a hash of the word lists, solver
+settings and solver version it was built with and is ignored by load_book()
+if they differ.
+
+    python strategy_book.py      # build BOOK_FILE from words.txt / answers.txt
+"""
+import gzip
+import hashlib
+import json
+import logging
+import time
+
+import lib
+import patterns
+
+logger = logging.getLogger(__name__)
+
+BOOK_FILE = 'strategy_book.json.gz'
+FIRST_GUESS = lib.FIRST_GUESS
+MAX_GUESSES = lib.MAX_GUESSES
+
+
+class BookNode:
+    """ A guess and the node to follow for each pattern it can get """
+    __slots__ = ('guess', 'children')
+
+    def __init__(self, guess, children=None):
+        self.guess = guess
+        self.children = children if children is not None else {}
+
+    def child(self, pattern):
+        """ Returns the next node, or None if the pattern isn't in the book """
+        return self.children.get(pattern)
+
+    def to_json(self):
+        if not self.children:
+            return self.guess
+        return [self.guess, {str(p): c.to_json() for p, c in self.children.items()}]
+
+    @classmethod
+    def from_json(cls, data):
+        if isinstance(data, str):
+            return cls(data)
+        guess, children = data
+        return cls(guess, {int(p): cls.from_json(c) for p, c in children.items()})
+
+    def __len__(self):
+        return 1 + sum(len(c) for c in self.children.values())
+
+
+def book_key(guess_pool, answer_pool, first_guess=FIRST_GUESS, **solver_options):
+    """ Hash of everything the solver's policy depends on, including its version """
+    sha = hashlib.sha256()
+    sha.update('\n'.join(guess_pool).encode())
+    sha.update(b'|')
+    sha.update('\n'.join(answer_pool).encode())
+    sha.update(json.dumps([first_guess, sorted(solver_options.items())]).encode())
+    sha.update(f'|{lib.SOLVER_VERSION}'.encode())
+    return sha.hexdigest()
+
+
+def build_book(guess_pool, answer_pool, first_guess=FIRST_GUESS, **solver_options) -> BookNode:
+    """
+    Walks the solver's policy over every answer, grouping answers that get the
+    same pattern so find_best_guess() is called once per node, with one memo
+    shared between every exact solve. solver_options are passed on to
+    find_best_guess().
+    """
+    memo = lib.TranspositionTable()
+
+    def walk(guess, feedback, pool, guesses):
+        node = BookNode(guess)
+        if len(guesses) == MAX_GUESSES:
+            return node
+        branches = {}
+        for answer in pool:
+            if answer != guess:
+                branches.setdefault(patterns.get_pattern(guess, answer), answer)
+        for pattern, answer in branches.items():
+            new_feedback = lib.Feedback()
+            new_feedback.merge(feedback)
+            new_feedback.merge(lib.get_guess_feedback(guess, answer))
+            new_pool = lib.get_possible_answers(new_feedback, pool)
+            next_guess = lib.find_best_guess(guess_pool, new_pool, new_feedback,
+                                             set(guesses), memo=memo, **solver_options)
+            node.children[pattern] = walk(next_guess, new_feedback, new_pool,
+                                          guesses + [next_guess])
+        return node
+
+    return walk(first_guess, lib.Feedback(), answer_pool, [first_guess])
+
+
+def follow(root, answer) -> list:
+    """
+    Returns the guesses the book plays against answer. They end before answer
+    if the book runs out, i.e. the game was lost.
+    """
+    node = root
+    guesses = [node.guess]
+    while guesses[-1] != answer:
+        node = node.child(patterns.get_pattern(node.guess, answer))
+        if node is None:
+            break
+        guesses.append(node.guess)
+    return guesses
+
+
+def save_book(root, key, filename=BOOK_FILE):
+    with gzip.open(filename, 'wt') as f:
+        json.dump({'key': key, 'tree': root.to_json()}, f, separators=(',', ':'))
+
+
+def load_book(guess_pool, answer_pool, filename=BOOK_FILE,
+              first_guess=FIRST_GUESS, **solver_options):
+    """
+    Returns the root BookNode, or None if there is no book or it was built
+    from different word lists or settings
+    """
+    try:
+        with gzip.open(filename, 'rt') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get('key') != book_key(guess_pool, answer_pool, first_guess, **solver_options):
+        logger.info(f'{filename} is out of date, searching live')
+        return None
+    return BookNode.from_json(data['tree'])
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    guess_pool = lib.get_all_words_list()
+    answer_pool = lib.get_answer_list()
+    start = time.perf_counter()
+    root = build_book(guess_pool, answer_pool)
+    save_book(root, book_key(guess_pool, answer_pool))
+    print(f'built {len(root)} node strategy book in '
+          f'{time.perf_counter() - start:.1f} sec')
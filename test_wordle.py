@@ -1,7 +1,17 @@
 import lib
+import analytics_log
+import benchmark_wordle
+import patterns
+import strategy_book
 import pytest
 import warnings
 import random
+import json
+import math
+import numpy as np
+import os
+import time
+from collections import Counter
 
 
 class TestRemoteWords:
@@ -24,6 +34,228 @@ def test_python_version():
         common = lib.CommonLetters(answers)
         smart_guesses = common.get_smart_guesses(guesses, 3)
         assert smart_guesses == ['aaaaa', 'bbbbb', 'ccccc']
+
+
+class TestWordLists:
+    def test_parsed_once_until_changed(self, tmp_path):
+        filename = tmp_path / 'words.txt'
+        filename.write_text('crane\nslink\n')
+        words = lib.get_word_list(filename)
+        assert words == ['crane', 'slink']
+        words.append('mated')  # callers get their own copy
+        assert lib.get_word_list(filename) == ['crane', 'slink']
+        filename.write_text('crane\nslink\nmated\n')
+        assert lib.get_word_list(filename) == ['crane', 'slink', 'mated']
+
+    def test_no_network_imports(self):
+        import subprocess
+        import sys
+        code = 'import sys, lib; print(sorted({"requests", "selenium", "bs4"} & set(sys.modules)))'
+        out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True)
+        assert out.stdout.strip() == '[]'
+
+
+@pytest.fixture
+def stub_server():
+    """
+    Local HTTP server replying to each path with the (status, body[, headers])
+    responses queued in server.responses[path], the last one repeating.
+    server.requests lists the paths requested and server.headers their headers.
+    """
+    import http.server
+    import threading
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            server.requests.append(self.path)
+            server.headers.append(dict(self.headers))
+            queue = server.responses.get(self.path, [(404, b'')])
+            status, body, *headers = queue.pop(0) if len(queue) > 1 else queue[0]
+            self.send_response(status)
+            for name, value in (headers[0] if headers else {}).items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.responses = {}
+    server.requests = []
+    server.headers = []
+    server.url = f'http://127.0.0.1:{server.server_address[1]}'
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestDailyAnswer:
+    def daily(self, answer, wordle_id):
+        return (200, json.dumps({'solution': answer, 'days_since_launch': wordle_id,
+                                 'print_date': '2024-08-01'}).encode())
+
+    def options(self, stub_server, tmp_path):
+        return {'url': stub_server.url + '/{date}.json', 'cache_dir': tmp_path,
+                'use_browser': False, 'backoff': 0}
+
+    def test_fetch_then_cached(self, stub_server, tmp_path):
+        import daily_answer
+        stub_server.responses['/2024-08-01.json'] = [self.daily('crane', 1138)]
+        options = self.options(stub_server, tmp_path)
+        assert daily_answer.get_answer_and_id('2024-08-01', **options) == ['crane', 1138]
+        assert daily_answer.get_answer_and_id('2024-08-01', **options) == ['crane', 1138]
+        assert stub_server.requests == ['/2024-08-01.json']  # second from the cache
+
+    def test_retries_server_errors(self, stub_server, tmp_path):
+        import daily_answer
+        stub_server.responses['/2024-08-01.json'] = [(503, b''), (500, b''),
+                                                     self.daily('crane', 1138)]
+        options = self.options(stub_server, tmp_path)
+        assert daily_answer.get_answer_and_id('2024-08-01', **options) == ['crane', 1138]
+        assert len(stub_server.requests) == 3
+
+    def test_gives_up(self, stub_server, tmp_path):
+        import daily_answer
+        stub_server.responses['/2024-08-01.json'] = [(500, b'')]
+        options = self.options(stub_server, tmp_path)
+        with pytest.raises(daily_answer.FetchError):
+            daily_answer.get_daily('2024-08-01', retries=2, **options)
+        assert len(stub_server.requests) == 3
+        with pytest.raises(daily_answer.FetchError):  # not found isn't retried
+            daily_answer.get_daily('2024-08-02', **options)
+        assert len(stub_server.requests) == 4
+        assert not os.listdir(tmp_path)  # failures aren't cached
+
+    def test_rejects_other_json(self, stub_server, tmp_path):
+        import daily_answer
+        stub_server.responses['/2024-08-01.json'] = [(200, b'{"status": "ERROR"}')]
+        with pytest.raises(daily_answer.FetchError):
+            daily_answer.get_daily('2024-08-01', **self.options(stub_server, tmp_path))
+
+    def test_timeout(self, tmp_path):
+        import daily_answer
+        import socket
+        listener = socket.socket()  # accepts connections but never replies
+        listener.bind(('127.0.0.1', 0))
+        listener.listen()
+        url = f'http://127.0.0.1:{listener.getsockname()[1]}/{{date}}.json'
+        try:
+            with pytest.raises(daily_answer.FetchError):
+                daily_answer.fetch_json('2024-08-01', url, timeout=0.2, retries=1, backoff=0)
+        finally:
+            listener.close()
+
+    def test_prefetch(self, stub_server, tmp_path):
+        import daily_answer
+        stub_server.responses['/2024-08-01.json'] = [self.daily('crane', 1138)]
+        stub_server.responses['/2024-08-03.json'] = [self.daily('slink', 1140)]
+        options = self.options(stub_server, tmp_path)
+        daily_answer.get_daily('2024-08-01', **options)
+        results = daily_answer.prefetch('2024-08-01', '2024-08-03', **options)
+        assert results['2024-08-01'] == 'crane' and results['2024-08-03'] == 'slink'
+        assert isinstance(results['2024-08-02'], daily_answer.FetchError)
+        assert stub_server.requests.count('/2024-08-01.json') == 1
+        assert daily_answer.load_cached('2024-08-03', tmp_path)['solution'] == 'slink'
+
+
+class TestWordSync:
+    words = ['crane', 'slink', 'roate', 'mated', 'sated']
+    answers = ['crane', 'mated']
+
+    @pytest.fixture
+    def files(self, tmp_path):
+        """ Word list files and artifacts built from them, in tmp_path """
+        (tmp_path / 'words.txt').write_text('\n'.join(self.words) + '\n')
+        (tmp_path / 'answers.txt').write_text('\n'.join(self.answers) + '\n')
+        files = {'words_file': str(tmp_path / 'words.txt'),
+                 'answers_file': str(tmp_path / 'answers.txt'),
+                 'meta_file': str(tmp_path / 'sync.json'),
+                 'patterns_file': str(tmp_path / 'patterns.npy'),
+                 'patterns_meta': str(tmp_path / 'patterns.json'),
+                 'words_store': str(tmp_path / 'words.npy'),
+                 'words_meta': str(tmp_path / 'words.json'),
+                 'cache_file': str(tmp_path / 'cache.sqlite')}
+        patterns.build_pattern_matrix(files['words_file'], files['answers_file'],
+                                      files['patterns_file'], files['patterns_meta'])
+        yield files
+        lib.reload_word_data()  # drop anything loaded from tmp_path
+
+    def test_diff_words(self):
+        import word_sync
+        assert word_sync.diff_words(['a', 'b', 'c'], ['c', 'd', 'a']) == (['d'], ['b'])
+
+    def test_unchanged(self, stub_server, files):
+        import word_sync
+        body = ('\n'.join(self.words) + '\n').encode()
+        stub_server.responses['/words.txt'] = [(200, body)]
+        result = word_sync.sync(stub_server.url + '/words.txt', **files)
+        assert not result['changed'] and not result['not_modified']
+
+    def test_not_modified(self, stub_server, files):
+        import word_sync
+        body = ('\n'.join(self.words) + '\n').encode()
+        stub_server.responses['/words.txt'] = [(200, body, {'ETag': '"v1"'}), (304, b'')]
+        url = stub_server.url + '/words.txt'
+        word_sync.sync(url, **files)
+        assert word_sync.sync(url, **files)['not_modified']
+        assert stub_server.headers[1]['If-None-Match'] == '"v1"'
+        # a local edit makes the next request unconditional
+        with open(files['words_file'], 'a') as f:
+            f.write('fuzzy\n')
+        stub_server.responses['/words.txt'] = [(200, body, {'ETag': '"v1"'})]
+        result = word_sync.sync(url, **files)
+        assert 'If-None-Match' not in stub_server.headers[2]
+        assert result['changed'] and result['removed'] == ['fuzzy']
+
+    def test_missing_answers_refused(self, stub_server, files):
+        import word_sync
+        new_words = ['crane', 'roate', 'sated', 'lawns']  # without mated
+        stub_server.responses['/words.txt'] = [(200, '\n'.join(new_words).encode())]
+        with pytest.raises(word_sync.SyncError, match='mated'):
+            word_sync.sync(stub_server.url + '/words.txt', **files)
+        with open(files['words_file']) as f:
+            assert f.read().split() == self.words
+        assert not os.path.exists(files['meta_file'])
+
+    def test_changed(self, stub_server, files):
+        import guess_cache
+        import word_sync
+        cache = guess_cache.GuessCache(
+            files['cache_file'], guess_cache.settings_key(self.words, self.answers))
+        cache.put(self.answers, lib.Feedback(), set(), 'crane', 'exact')
+        new_words = ['crane', 'roate', 'mated', 'sated', 'fuzzy', 'lawns']
+        stub_server.responses['/words.txt'] = [(200, '\n'.join(new_words).encode())]
+
+        check = word_sync.sync(stub_server.url + '/words.txt', apply=False, **files)
+        assert check['added'] == ['fuzzy', 'lawns'] and check['removed'] == ['slink']
+        assert open(files['words_file']).read().split() == self.words
+
+        result = word_sync.sync(stub_server.url + '/words.txt', **files)
+        assert result['changed'] and result['rows_computed'] == 2
+        assert result['cache_entries_deleted'] == 1
+        assert open(files['words_file']).read().split() == new_words
+        matrix = patterns.load_pattern_matrix(files['words_file'], files['answers_file'],
+                                              files['patterns_file'], files['patterns_meta'])
+        assert matrix.matrix.tolist() == \
+            patterns.compute_patterns(new_words, self.answers).tolist()
+        assert not patterns.is_stale(files['words_file'], files['answers_file'],
+                                     files['patterns_file'], files['patterns_meta'])
+
+    def test_rejects_bad_list(self, stub_server, files):
+        import word_sync
+        stub_server.responses['/words.txt'] = [(200, b'<html>not found</html>')]
+        with pytest.raises(word_sync.SyncError):
+            word_sync.sync(stub_server.url + '/words.txt', **files)
+        stub_server.responses['/words.txt'] = [(500, b'')]
+        with pytest.raises(word_sync.SyncError):
+            word_sync.sync(stub_server.url + '/words.txt', **files)
+        assert open(files['words_file']).read().split() == self.words
+
+
 class TestGuessCheck:
     def test_greens(self):
         f = lib.get_guess_feedback('aaaaa', 'aaaaa')
@@ -133,131 +365,298 @@ class TestGuessCheck:
         assert f.yellows == [[], [], ['t'], ['ee'], ['r']]
         assert f.grays == set(['n'])
 
+    def test_yellow_with_other_green(self):
+        f = lib.get_guess_feedback('perce', 'aired')
+        assert f.greens == [None, None, 'r', None, None]
+        assert f.yellows == [[], ['e'], [], [], []]
+        assert f.grays == set(['p', 'c', 'ee'])
+
+
+class TestPatterns:
+    def test_get_pattern(self):
+        assert patterns.get_pattern('aaaaa', 'aaaaa') == patterns.ALL_GREEN
+        assert patterns.get_pattern('fghij', 'abcde') == 0
+        assert patterns.pattern_colours(patterns.get_pattern('enter', 'erect')) == [2, 0, 1, 1, 1]
+        assert patterns.pattern_colours(patterns.get_pattern('aaabb', 'ccaac')) == [1, 0, 2, 0, 0]
+
+    def test_feedback_from_pattern(self):
+        pairs = [('abbbb', 'baaaa'), ('aabbb', 'bbaaa'), ('ababa', 'babab'),
+                 ('bbaaa', 'aaabb'), ('baaaa', 'aaaab'), ('bbfff', 'abcde'),
+                 ('aaabb', 'caacc'), ('aaaaa', 'caaaa'), ('aaabb', 'ccaac'),
+                 ('acaaa', 'aaaab'), ('aaaab', 'ccaaa'), ('clarc', 'crazy'),
+                 ('puppy', 'pippi'), ('dread', 'undid'), ('enter', 'erect'),
+                 ('perce', 'aired')]
+        for guess, answer in pairs:
+            pattern = patterns.get_pattern(guess, answer)
+            assert lib.feedback_from_pattern(guess, pattern) == lib.get_guess_feedback(guess, answer)
+
+    def test_compute_patterns(self):
+        guesses = ['roate', 'eerie', 'sassy', 'llama', 'abbbb']
+        answers = ['aired', 'geese', 'mamma', 'baaaa', 'erect', 'undid']
+        matrix = patterns.compute_patterns(guesses, answers)
+        for i, guess in enumerate(guesses):
+            for j, answer in enumerate(answers):
+                assert matrix[i, j] == patterns.get_pattern(guess, answer)
+
+    def test_matrix_matches_feedback(self):
+        matrix = lib.get_pattern_matrix()
+        random.seed(42)
+        words = random.sample(matrix.words, 20) + ['roate', 'eerie', 'mamma']
+        assert patterns.verify_pattern_matrix(matrix, lib.get_guess_feedback,
+                                              lib.feedback_from_pattern, words) == []
+
+    def test_rebuild_when_stale(self, tmp_path):
+        words, answers = tmp_path / 'words.txt', tmp_path / 'answers.txt'
+        patterns_file, meta = tmp_path / 'patterns.npy', tmp_path / 'patterns.json'
+        words.write_text('roate\nslink\ncrane\n')
+        answers.write_text('crane\n')
+        matrix = patterns.load_pattern_matrix(words, answers, patterns_file, meta)
+        assert matrix.matrix.shape == (3, 1)
+        assert not patterns.is_stale(words, answers, patterns_file, meta)
+
+        answers.write_text('crane\nslink\n')
+        assert patterns.is_stale(words, answers, patterns_file, meta)
+        matrix = patterns.load_pattern_matrix(words, answers, patterns_file, meta)
+        assert matrix.matrix.shape == (3, 2)
+        assert matrix.pattern('slink', 'slink') == patterns.ALL_GREEN
+
+
+    def test_pattern_text(self):
+        assert patterns.pattern_text(patterns.get_pattern('roate', 'mated')) == 'bbyyy'
+        for code in range(patterns.NUM_PATTERNS):
+            assert patterns.parse_pattern(patterns.pattern_text(code)) == code
+        with pytest.raises(ValueError):
+            patterns.parse_pattern('bbzzz')
 
 class TestPossibleAnswer:
+    possible_answer = staticmethod(lib.possible_answer)
+
     def test_empty(self):
         f = lib.Feedback()
-        assert lib.possible_answer(f, 'hello')
+        assert self.possible_answer(f, 'hello')
 
     def test_green_T(self):
         f = lib.Feedback()
         f.greens = ['h', 'e', 'l', 'l', 'o']
-        assert lib.possible_answer(f, 'hello')
+        assert self.possible_answer(f, 'hello')
 
     def test_green_F(self):
         f = lib.Feedback()
         f.greens = ['h', 'e', 'l', 'p', 'o']
-        assert not lib.possible_answer(f, 'hello')
+        assert not self.possible_answer(f, 'hello')
 
     def test_green_half(self):
         f = lib.Feedback()
         f.greens = ['h', None, 'l', None, 'o']
-        assert lib.possible_answer(f, 'hello')
+        assert self.possible_answer(f, 'hello')
 
     def test_yel_used(self):
         f = lib.Feedback()
         f.yellows = [['e'], ['l'], ['o'], ['h'], ['l']]
-        assert lib.possible_answer(f, 'hello')
+        assert self.possible_answer(f, 'hello')
 
     def test_yel_notused(self):
         f = lib.Feedback()
         f.yellows = [['e'], ['l'], ['o'], ['h'], ['l']]
-        assert not lib.possible_answer(f, 'jello')
+        assert not self.possible_answer(f, 'jello')
 
     def test_yel_used_doub(self):
         f = lib.Feedback()
         f.yellows = [['e'], ['ll'], ['o'], ['h'], ['ll']]
-        assert lib.possible_answer(f, 'hello')
+        assert self.possible_answer(f, 'hello')
 
     def test_yel_notused_doub(self):
         f = lib.Feedback()
         f.yellows = [['e'], ['ll'], ['o'], ['h'], ['ll']]
-        assert not lib.possible_answer(f, 'helpo')
+        assert not self.possible_answer(f, 'helpo')
 
     def test_yel_used_triple(self):
         f = lib.Feedback()
         f.yellows = [['rrr'], [], [], ['rr'], []]
-        assert lib.possible_answer(f, 'error')
+        assert self.possible_answer(f, 'error')
 
     def test_yel_notused_triple(self):
         f = lib.Feedback()
         f.yellows = [['rrr'], [], [], ['rr'], []]
-        assert not lib.possible_answer(f, 'order')
+        assert not self.possible_answer(f, 'order')
 
     def test_yel_used_quad(self):
         f = lib.Feedback()
         f.yellows = [[], [], ['oooo'], [], []]
-        assert lib.possible_answer(f, 'oowoo')
+        assert self.possible_answer(f, 'oowoo')
 
     def test_yel_notused_quad(self):
         f = lib.Feedback()
         f.yellows = [[], ['ffff'], [], [], []]
-        assert not lib.possible_answer(f, 'fluff')
+        assert not self.possible_answer(f, 'fluff')
 
     def test_yel_undid(self):
         f = lib.Feedback()
         f.yellows = [['dd'], ['u'], ['n'], ['dd'], []]
-        assert lib.possible_answer(f, 'undid')
+        assert self.possible_answer(f, 'undid')
 
     def test_yel_inplace(self):
         f = lib.Feedback()
         f.yellows = [['h'], ['e'], ['ll'], ['ll'], ['o']]
-        assert not lib.possible_answer(f, 'hello')
+        assert not self.possible_answer(f, 'hello')
 
     def test_gray_used(self):
         f = lib.Feedback()
         f.grays.add('e')
-        assert not lib.possible_answer(f, 'hello')
+        assert not self.possible_answer(f, 'hello')
 
     def test_double_gray_not_used(self):
         f = lib.Feedback()
         f.grays.add('ee')
-        assert lib.possible_answer(f, 'hello')
+        assert self.possible_answer(f, 'hello')
 
     def test_double_gray_used(self):
         f = lib.Feedback()
         f.grays.add('ll')
-        assert not lib.possible_answer(f, 'hello')
+        assert not self.possible_answer(f, 'hello')
 
     def test_quad_gray_not_used(self):
         f = lib.Feedback()
         f.grays.add('pppp')
-        assert lib.possible_answer(f, 'pippy')
+        assert self.possible_answer(f, 'pippy')
 
     def test_quad_gray_used(self):
         f = lib.Feedback()
         f.grays.add('eeee')
-        assert not lib.possible_answer(f, 'eevee')
+        assert not self.possible_answer(f, 'eevee')
 
     def test_gray_notused(self):
         f = lib.Feedback()
         f.grays = set(['b', 'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j',
                        'k', 'l', 'm', 'n', 'o', 'p', 'q', 'r', 's',
                        't', 'u', 'v', 'w', 'x', 'y', 'z'])
-        assert lib.possible_answer(f, 'aaaaa')
+        assert self.possible_answer(f, 'aaaaa')
 
     def test_gray_and_yel(self):
         f = lib.Feedback()
         f.yellows = [['e'], ['ll'], ['h'], ['o'], ['ll']]
         f.grays = set(['ee', 'lll', 'hh', 'oo'])
-        assert lib.possible_answer(f, 'hello')
+        assert self.possible_answer(f, 'hello')
 
     def test_green_yel_gray_hello(self):
         f = lib.Feedback()
         f.greens = [None, None, 'l', None, 'o']
         f.yellows = [['ll'], ['h'], ['e'], ['o'], []]
         f.grays = set(['a', 'i', 's', 't', 'b', 'ee', 'oo'])
-        assert lib.possible_answer(f, 'hello')
+        assert self.possible_answer(f, 'hello')
 
     def test_fight(self):
         f = lib.Feedback()
         f.greens = [None, None, None, None, 't']
         f.yellows = [[], ['h'], [], ['t'], []]
         f.grays = set(['o', 'l', 's', 'f', 'a', 'u', 'r', 'n', 'e', 'w'])
-        assert not lib.possible_answer(f, 'fight')
+        assert not self.possible_answer(f, 'fight')
+
+
+class TestAnswerPool:
+    def test_matches_list(self):
+        words = lib.get_all_words_list()
+        pool = lib.get_answer_pool(words)
+        f1 = lib.get_guess_feedback('roate', 'erect')
+        f2 = lib.get_guess_feedback('enter', 'erect')
+        f2.merge(f1)
+        f3 = lib.get_guess_feedback('sassy', 'mamma')
+        f4 = lib.Feedback()
+        f4.yellows = [['dd'], ['u'], ['n'], ['dd'], []]
+        f4.grays = set(['ddd'])
+        for f in [lib.Feedback(), f1, f2, f3, f4]:
+            possible = lib.get_possible_answers(f, pool)
+            assert isinstance(possible, lib.AnswerPool)
+            assert list(possible) == lib.get_possible_answers(f, words)
+            assert lib.count_possible_answers(f, pool) == len(possible)
+
+    def test_list_behaviour(self):
+        pool = lib.get_answer_pool(['light', 'night', 'sight'])
+        assert len(pool) == 3
+        assert pool[0] == 'light'
+        assert pool[-1] == 'sight'
+        assert 'night' in pool
+        assert 'might' not in pool
+        assert pool == ['light', 'night', 'sight']
+        assert set(pool) == {'light', 'night', 'sight'}
+
+    def test_turns_until_solved(self):
+        answers = ['smile', 'frown', 'catch', 'great', 'throw', 'smash']
+        words = lib.get_all_words_list()
+        turns = lib.turns_until_solved('grope', words, lib.get_answer_pool(answers))
+        assert round(turns, 3) == 2.167
+
+
+class TestWordStore:
+    def test_word_index_round_trip(self):
+        store = lib.get_word_store()
+        words = lib.get_all_words_list()
+        assert store.words == words
+        assert all(store.word(store.word_index(word)) == word for word in words[::500])
+        assert store.words_of(store.indices(['crane', 'aahed'])) == ['crane', 'aahed']
+        assert store.is_answer.sum() == len(lib.get_answer_list())
+        assert store.words_of(store.answer_indices) == lib.get_answer_list()
+
+    def test_rebuilt_when_words_change(self, tmp_path):
+        import word_store
+        words_file = tmp_path / 'words.txt'
+        files = (tmp_path / 'words.npy', tmp_path / 'words.json')
+        words_file.write_text('aahed\ncrane\n')
+        store = word_store.load_word_store(words_file, ['crane'], *files)
+        assert store.words == ['aahed', 'crane'] and list(store.is_answer) == [False, True]
+        words_file.write_text('aahed\ncrane\nslink\n')
+        assert word_store.is_stale(words_file, *files)
+        assert word_store.load_word_store(words_file, ['crane'], *files).words[-1] == 'slink'
+
+    def test_index_pools(self):
+        store = lib.get_word_store()
+        words = lib.get_all_words_list()[::20]
+        answers = lib.get_answer_list()[::20]
+        word_idxs, answer_idxs = store.indices(words), store.indices(answers)
+        assert lib.get_vectorised_guess_scores(word_idxs, answer_idxs) == \
+            lib.get_vectorised_guess_scores(words, answers)
+        tried = {'roate', words[3]}
+        assert store.words_of(lib.remove_possible_answers_and_previous_guesses(
+            word_idxs, answer_idxs, tried)) == \
+            lib.remove_possible_answers_and_previous_guesses(words, answers, tried)
+
+    def test_mixed_pools(self):
+        store = lib.get_word_store()
+        words = lib.get_all_words_list()[::20]
+        answers = lib.get_answer_list()[::20]
+        word_idxs = store.indices(words)
+        assert lib.get_vectorised_guess_scores(word_idxs, answers) == \
+            lib.get_vectorised_guess_scores(words, answers)
+        assert store.words_of(lib.remove_possible_answers_and_previous_guesses(
+            word_idxs, answers, {'roate'})) == \
+            lib.remove_possible_answers_and_previous_guesses(words, answers, {'roate'})
+
+    def test_searches_accept_index_pools(self):
+        store = lib.get_word_store()
+        words = lib.get_all_words_list()
+        answers = lib.get_answer_list()
+        feedback = lib.get_guess_feedback('roate', 'mated')
+        pool = lib.get_possible_answers(feedback, answers)
+        word_idxs, pool_idxs = store.indices(words), store.indices(pool)
+        assert lib.find_best_guess(word_idxs, pool_idxs, feedback, {'roate'}) == \
+            lib.find_best_guess(words, pool, feedback, {'roate'})
+        small = store.indices(answers[:4])
+        assert lib.find_exact_best_guess(word_idxs, small) == \
+            lib.find_exact_best_guess(words, answers[:4])
+        assert lib.turns_until_solved('baghs', word_idxs, small) == \
+            lib.turns_until_solved('baghs', words, answers[:4])
+
+    def test_solve_games_index_pools(self):
+        store = lib.get_word_store()
+        results = lib.solve_games(['mated'], store.indices(lib.get_all_words_list()),
+                                  store.indices(lib.get_answer_list()))
+        assert results['mated']['guesses'] == lib.solve_games(['mated'])['mated']['guesses']
 
 
 class TestMergeFeedback:
+    def merge(self, feedback, new):
+        feedback.merge(new)
+
     def test_merge_to_empty(self):
         new = lib.Feedback()
         new.greens = ['a', None, None, None, None]
@@ -266,7 +665,7 @@ class TestMergeFeedback:
 
         f = lib.Feedback()
 
-        f.merge(new)
+        self.merge(f, new)
         assert f.greens == ['a', None, None, None, None]
         assert f.yellows == [[], ['o'], [], [], []]
         assert f.grays == set(['b'])
@@ -279,7 +678,7 @@ class TestMergeFeedback:
         f.yellows = [[], ['o'], [], [], []]
         f.grays = set(['b'])
 
-        f.merge(new)
+        self.merge(f, new)
         assert f.greens == ['a', None, None, None, None]
         assert f.yellows == [[], ['o'], [], [], []]
         assert f.grays == set(['b'])
@@ -299,7 +698,7 @@ class TestMergeFeedback:
         f.yellows = yellows
         f.grays = grays
 
-        f.merge(new)
+        self.merge(f, new)
         assert f.greens == greens
         assert f.yellows == yellows
         assert f.grays == grays
@@ -311,7 +710,7 @@ class TestMergeFeedback:
         f = lib.Feedback()
         f.greens = ['a', None, 'c', None, 'e']
 
-        f.merge(new)
+        self.merge(f, new)
         assert f.greens == ['a', 'b', 'c', None, 'e']
 
     def test_merge_nonmatching_greens(self):
@@ -322,7 +721,7 @@ class TestMergeFeedback:
         f.greens = ['a', 'b', 'c', 'd', 'e']
 
         with pytest.raises(ValueError):
-            f.merge(new)
+            self.merge(f, new)
 
     def test_merge_yellows(self):
         new = lib.Feedback()
@@ -331,7 +730,7 @@ class TestMergeFeedback:
         f = lib.Feedback()
         f.yellows = [['a'], ['bb'], [], [], ['aaa', 'b', 'f', 'eee']]
 
-        f.merge(new)
+        self.merge(f, new)
         [yel.sort() for yel in f.yellows]
         assert f.yellows == [['a'], ['bb'], [], ['e'], ['aaaa', 'b', 'eee', 'f']]
 
@@ -345,7 +744,7 @@ class TestMergeFeedback:
 #        f.grays = set(['aa'])
 #
 #        with pytest.raises(ValueError):
-#            f.merge(new)
+#            self.merge(f, new)
 
     def test_merge_grays(self):
         new = lib.Feedback()
@@ -354,7 +753,7 @@ class TestMergeFeedback:
         f = lib.Feedback()
         f.grays = set(['a', 'bb', 'd', 'e', 'f'])
 
-        f.merge(new)
+        self.merge(f, new)
         assert f.grays == set(['a', 'bb', 'c', 'd', 'e', 'f'])
 
     def test_merge_lots(self):
@@ -368,13 +767,51 @@ class TestMergeFeedback:
         f.yellows = [['e'], [], ['b'], ['d', 'a'], []]
         f.grays = set(['f', 'g', 'h', 'i', 'j', 'k', 'l', 'm'])
 
-        f.merge(new)
+        self.merge(f, new)
         [yel.sort() for yel in f.yellows]
         assert f.greens == ['a', 'b', None, None, 'e']
         assert f.yellows == [['e'], [], ['b', 'd'], ['a', 'd'], []]
         assert f.grays == set(['f', 'g', 'h', 'i', 'j', 'k', 'l', 'm', 'n', 'o'])
 
 
+class TestConstraintsPossibleAnswer(TestPossibleAnswer):
+    """ TestPossibleAnswer run against the Constraints model """
+    @staticmethod
+    def possible_answer(feedback, word):
+        constraints = lib.Constraints.from_feedback(feedback)
+        assert constraints.filter([word]) == ([word] if constraints.allows(word) else [])
+        return constraints.allows(word)
+
+
+class TestConstraintsMerge(TestMergeFeedback):
+    """ TestMergeFeedback run against the Constraints model """
+    def merge(self, feedback, new):
+        constraints = lib.Constraints.from_feedback(feedback)
+        constraints.merge(lib.Constraints.from_feedback(new))
+        merged = constraints.to_feedback()
+        feedback.greens, feedback.yellows, feedback.grays = \
+            merged.greens, merged.yellows, merged.grays
+
+
+class TestConstraints:
+    def test_round_trip_guess_feedback(self):
+        words = lib.get_all_words_list()
+        rng = random.Random(11)
+        for guess, answer in zip(rng.sample(words, 300), rng.sample(lib.get_answer_list(), 300)):
+            feedback = lib.get_guess_feedback(guess, answer)
+            assert lib.Constraints.from_feedback(feedback).to_feedback() == feedback
+
+    def test_filter_pools(self):
+        store = lib.get_word_store()
+        answers = lib.get_answer_list()
+        feedback = lib.get_guess_feedback('roate', 'mated')
+        feedback.merge(lib.get_guess_feedback('sated', 'mated'))
+        expected = lib.get_possible_answers(feedback, answers)
+        constraints = lib.Constraints.from_feedback(feedback)
+        assert constraints.filter(answers) == expected
+        assert store.words_of(lib.get_possible_answers(feedback, store.indices(answers))) == expected
+        assert lib.count_possible_answers(feedback, store.indices(answers)) == len(expected)
+
 class TestIsSameFeedback:
     def test_empty(self):
         f1 = lib.Feedback()
@@ -419,6 +856,54 @@ class TestIsSameFeedback:
         assert not f2 == f1
 
 
+class TestPackedFeedback:
+    def test_round_trip(self):
+        f = lib.Feedback()
+        f.greens = ['a', None, 'c', 'd', None]
+        f.yellows = [['a'], [], ['c', 'dd'], [], ['e', 'fff', 'a']]
+        f.grays = set(['ppp', 'oo', 'c', 'b', 'a', 'zzzzz'])
+        assert lib.PackedFeedback.from_feedback(f).to_feedback() == f
+
+    def test_same_feedback_same_key(self):
+        f1 = lib.get_guess_feedback('enter', 'erect')
+        f2 = lib.get_guess_feedback('enter', 'erect')
+        f2.yellows = [list(reversed(y)) for y in f2.yellows]
+        p1, p2 = lib.PackedFeedback.from_feedback(f1), lib.PackedFeedback.from_feedback(f2)
+        assert p1 == p2
+        assert hash(p1) == hash(p2)
+        assert len({p1, p2}) == 1
+
+    def test_diff_feedback_diff_key(self):
+        f1 = lib.Feedback()
+        f1.grays = set(['ppp', 'oo', 'c', 'b', 'a'])
+        f2 = lib.Feedback()
+        f2.grays = set(['a', 'b', 'c', 'o', 'ppp'])
+        assert lib.PackedFeedback.from_feedback(f1) != lib.PackedFeedback.from_feedback(f2)
+
+    def test_from_pattern(self):
+        existing = lib.get_guess_feedback('roate', 'erect')
+        f = lib.get_guess_feedback('enter', 'erect')
+        f.merge(existing)
+        pattern = patterns.get_pattern('enter', 'erect')
+        assert (lib.PackedFeedback.from_pattern('enter', pattern, existing)
+                == lib.PackedFeedback.from_feedback(f))
+
+    def test_immutable(self):
+        p = lib.PackedFeedback.from_feedback(lib.Feedback())
+        with pytest.raises(AttributeError):
+            p.key = 1
+        with pytest.raises(AttributeError):
+            p.other = 1
+
+    def test_feedback_counts(self):
+        answers = ['light', 'night', 'sight', 'might', 'fight']
+        counts = lib.get_feedback_counts('lawns', answers)
+        assert sorted(count for _, count in counts) == [1, 1, 1, 2]
+        for f, count in counts:
+            assert count == sum(1 for ans in answers
+                                if lib.get_guess_feedback('lawns', ans) == f)
+
+
 class TestFindSmartGuesses:
     def test_len_3(self):
         guesses = ['aaaaa', 'bbbbb', 'ccccc', 'ddddd', 'eeeee']
@@ -456,6 +941,79 @@ class TestFindSmartGuesses:
         assert smart_guesses[0] == 'soare'
 
 
+    def reference_scores(self, answer_pool, guess_pool):
+        """ CommonLetters scoring as it was before it was vectorised """
+        common_letters = Counter()
+        let_position = [Counter() for _ in range(5)]
+        pos_relevance = 5
+        for ans in answer_pool:
+            for i, let in enumerate(ans):
+                let_position[i][let] += 1
+                common_letters[let] += 1
+        for pos in let_position:
+            if len(pos) == 1:
+                let = next(iter(pos.keys()))
+                common_letters[let] -= pos[let]
+                pos_relevance -= 1
+        guess_scores = Counter()
+        for guess in guess_pool:
+            score = 0
+            for i, guess_let in enumerate(guess):
+                if len(let_position[i]) != 1:
+                    score += let_position[i][guess_let] * pos_relevance
+                if guess_let not in set(guess[0:i]):
+                    score += common_letters[guess_let] * 5
+            guess_scores[guess] = score
+        return guess_scores
+
+    def test_same_ranking_as_reference(self):
+        words = lib.get_all_words_list()
+        rng = random.Random(7)
+        for size in [1, 2, 3, 10, 200]:
+            answers = rng.sample(lib.get_answer_list(), size)
+            reference = self.reference_scores(answers, words)
+            common = lib.CommonLetters(answers)
+            assert common.calc_smart_guess_scores(words) == reference
+            assert common.get_smart_guesses(words, 50) == \
+                [guess for guess, _ in reference.most_common(50)]
+        answers = ['agape', 'agate', 'agave']  # greens
+        assert lib.CommonLetters(answers).get_smart_guesses(words, 20) == \
+            [guess for guess, _ in self.reference_scores(answers, words).most_common(20)]
+
+    def test_child_of_parent(self):
+        answers = lib.get_answer_list()
+        parent = lib.CommonLetters(answers)
+        for subset in [answers[:3000], answers[::2], answers[:5]]:
+            child = parent.child(subset)
+            assert (child.pos_counts == lib.CommonLetters(subset).pos_counts).all()
+            assert child.let_position == lib.CommonLetters(subset).let_position
+
+    def test_cached_by_pool(self):
+        answers = lib.get_answer_list()[:40]
+        common = lib.get_common_letters(answers)
+        assert lib.get_common_letters(list(answers)) is common
+
+    def test_index_pools(self):
+        store = lib.get_word_store()
+        words = lib.get_all_words_list()
+        answers = lib.get_answer_list()[::30]
+        common = lib.CommonLetters(answers)
+        assert lib.CommonLetters(store.indices(answers)).get_smart_guesses(
+            store.indices(words), 30) == common.get_smart_guesses(words, 30)
+
+
+def _sleeping_candidate_turns(guess, answer_pool, existing_feedback, guesses_tried, bound,
+                              deadline_time, slot):
+    """ lib._candidate_turns() where fast takes 2.0 turns and slow runs until stopped """
+    time.sleep(0.2)  # slow starts running before fast returns
+    if guess == 'fast':
+        return 2.0
+    deadline = lib.Deadline(min(deadline_time, time.perf_counter() + 5), lib._search_stops[slot])
+    while not deadline.passed():
+        time.sleep(0.01)
+    raise lib.SearchTimeout()
+
+
 class TestFindExactBestGuess:
     def test_one_answer(self):
         guesses = ['right']
@@ -529,6 +1087,151 @@ class TestFindExactBestGuess:
         guesses = answers
         lib.find_exact_best_guess(guesses, answers)
 
+    def _unpruned_best_guess(self, guesses, answers, monkeypatch):
+        # the search before branch and bound: every candidate in order, and
+        # every nested candidate searched with no bound
+        monkeypatch.setattr(lib, '_selection_bound', lambda *args: math.inf)
+        memo = lib.TranspositionTable()
+        turns = {guess: lib.turns_until_solved(guess, guesses, answers, memo=memo)
+                 for guess in guesses}
+        best_case = (2*len(answers) - 1) / len(answers)
+        for guess in answers:
+            if math.isclose(turns[guess], best_case, abs_tol=0.0001):
+                return guess
+        for guess in guesses:
+            if guess not in answers and turns[guess] == 2.0:
+                return guess
+        return min(turns, key=turns.get)
+
+    @pytest.mark.parametrize('answers', [
+        ['smile', 'frown', 'catch', 'great', 'throw', 'smash'],
+        ['bated', 'dated', 'fated', 'gated', 'hated', 'mated'],
+        ['light', 'night', 'sight', 'might', 'fight', 'tight', 'wight'],
+    ])
+    def test_same_guess_as_unpruned(self, answers, monkeypatch):
+        guesses = sorted(set(answers) | {'lawns', 'fight', 'baghs', 'cgtsa', 'grope'})
+        best_guess = lib.find_exact_best_guess(guesses, answers)
+        assert best_guess == self._unpruned_best_guess(guesses, answers, monkeypatch)
+
+    def test_prunes(self):
+        answers = ['bated', 'dated', 'fated', 'gated', 'hated', 'mated']
+        guesses = lib.get_all_words_list()
+        smart_guesses = lib.filter_guess_pool(guesses, answers, 20)
+        from solver_stats import stats
+        stats.enable()
+        try:
+            lib.find_exact_best_guess(guesses, answers, smart_guesses=smart_guesses)
+            counters = stats.counters
+        finally:
+            stats.disable()
+            stats.reset()
+        assert counters['candidates_pruned'] + counters['subtrees_pruned'] > 0
+
+    @pytest.mark.parametrize('answers', [
+        ['bated', 'dated', 'fated', 'gated', 'hated', 'mated'],
+        ['aaaaa', 'bbbbb', 'ccccc', 'ddddd'],  # early exit at best case
+        ['light', 'night', 'sight', 'might', 'fight', 'tight', 'wight'],
+    ])
+    def test_parallel_same_as_serial(self, answers):
+        words = lib.get_all_words_list()
+        smart_guesses = lib.filter_guess_pool(words, answers, 40)
+        assert lib.find_exact_best_guess(words, answers, smart_guesses=smart_guesses,
+                                         workers=2) == \
+            lib.find_exact_best_guess(words, answers, smart_guesses=smart_guesses)
+
+    def test_parallel_stops_running_candidates(self, monkeypatch):
+        # workers are forked after the patch, so run _sleeping_candidate_turns()
+        monkeypatch.setattr(lib, '_candidate_turns', _sleeping_candidate_turns)
+        pool = lib.ExactSearchPool(2, ['fast', 'slow'])
+        try:
+            start = time.perf_counter()
+            # fast takes 2.0 turns, so slow, already running, can't be selected
+            assert pool.find_best_guess([('fast', False), ('slow', False)], [0, 1],
+                                        ['aaaaa', 'bbbbb'], None, set(), 1.5) == 'fast'
+            assert time.perf_counter() - start < 2
+            assert not pool.executor._pending_work_items  # workers are idle
+        finally:
+            pool.close()
+
+    def test_parallel_deadline(self):
+        words = lib.get_all_words_list()
+        answers = ['bated', 'dated', 'fated', 'gated', 'hated', 'mated']
+        smart_guesses = lib.filter_guess_pool(words, answers, 40)
+        with pytest.raises(lib.SearchTimeout):
+            lib.find_exact_best_guess(words, answers, smart_guesses=smart_guesses,
+                                      deadline=lib.Deadline.after(0), workers=2)
+        # cancelled workers are ready for the next search
+        assert lib.find_exact_best_guess(words, answers[:4], workers=2) == \
+            lib.find_exact_best_guess(words, answers[:4])
+
+    def test_subtree_lower_bound(self):
+        assert lib.subtree_lower_bound(1, 3) == 3
+        assert lib.subtree_lower_bound(4, 1) == 1.75
+
+    def test_bound_exceeded(self):
+        answers = ['aaaaa', 'bbbbb', 'ccccc', 'ddddd']
+        # exactly 2.5 turns, so a bound below that gives up
+        assert lib.turns_until_solved('aaaaa', answers, answers, bound=2.4) == math.inf
+        assert lib.turns_until_solved('aaaaa', answers, answers, bound=2.5) == 2.5
+
+
+class TestTranspositionTable:
+    def test_lru_eviction(self):
+        memo = lib.TranspositionTable(max_size=2)
+        memo.put('a', 1)
+        memo.put('b', 2)
+        assert memo.get('a') == 1
+        memo.put('c', 3)
+        assert memo.get('b') is None
+        assert memo.get('a') == 1
+        assert memo.get('c') == 3
+        assert (memo.hits, memo.misses) == (3, 1)
+        assert len(memo) == 2
+
+    def test_new_guess_pool_clears(self):
+        memo = lib.TranspositionTable()
+        memo.use_guess_pool(['roate'])
+        memo.put('a', 1)
+        memo.use_guess_pool(['roate'])
+        assert memo.get('a') == 1
+        memo.use_guess_pool(['slink'])
+        assert memo.get('a') is None
+
+    def test_same_as_unmemoised(self):
+        guesspool = lib.get_all_words_list()
+        answerpool = ['smile', 'frown', 'catch', 'great', 'throw', 'smash']
+        memo = lib.TranspositionTable()
+        for guess in ['grope', 'poopy', 'smile']:
+            unmemoised = lib.turns_until_solved(guess, guesspool, answerpool, guesses_tried=set(),
+                                                memo=lib.TranspositionTable(max_size=0))
+            memoised = lib.turns_until_solved(guess, guesspool, answerpool, guesses_tried=set(),
+                                              memo=memo)
+            assert memoised == unmemoised
+        assert memo.hits > 0
+
+    def test_shared_table(self):
+        memo = lib.get_shared_table()
+        assert memo is lib.get_shared_table()
+        memo.clear()
+        words = lib.get_all_words_list()
+        answers = ['agape', 'agate', 'agave']
+        first = lib.find_exact_best_guess(words, answers, memo=memo)
+        hits = memo.hits
+        assert lib.find_exact_best_guess(words, answers, memo=memo) == first
+        assert memo.hits > hits
+
+    def test_similar_words(self):
+        # previously took ~ 5-10 min unmemoised
+        ANSWER = 'mated'
+        words = lib.get_all_words_list()
+        f = lib.get_guess_feedback('roate', ANSWER)
+        f.merge(lib.get_guess_feedback('sated', ANSWER))
+        possible_answers = ['bated', 'dated', 'fated',
+                            'gated', 'hated', 'mated']
+        g = lib.find_best_guess(words, possible_answers, f, set(['roate', 'sated']),
+                                exact_cutoff=10)
+        assert g == 'baghs'
+
 
 class TestFindApproximateBestGuess:
     def test_subset_wordpool(self):
@@ -545,6 +1248,171 @@ class TestFindApproximateBestGuess:
         assert best == 'roate'
 
 
+class TestVectorisedGuessScores:
+    def test_partition_scores(self):
+        guesses = ['lawns', 'light', 'fight', 'xxxxx']
+        answers = ['light', 'night', 'sight', 'might', 'fight']
+        scores = dict(lib.get_vectorised_guess_scores(guesses, answers))
+        assert scores['lawns'] == (1 + 1 + 1 + 4) / 5
+        assert scores['light'] == (1 + 16) / 5 - 1
+        assert scores['xxxxx'] == 25 / 5
+        assert len(scores) == 7  # answers not in guesses are scored too
+
+    def test_sorted(self):
+        answers = lib.get_answer_list()[::10]
+        words = lib.get_all_words_list()
+        guess_scores = lib.get_vectorised_guess_scores(words, answers)
+        assert len(guess_scores) == len(words)
+        scores = [score for _, score in guess_scores]
+        assert scores == sorted(scores)
+
+    def test_entire_answer_pool(self):
+        answers = lib.get_answer_list()
+        words = lib.get_all_words_list()
+        assert lib.get_vectorised_guess_scores(words, answers)[0][0] == 'roate'
+
+    def test_find_best_guess(self):
+        answers = lib.get_answer_list()[::10]
+        words = lib.get_all_words_list()
+        best = lib.find_best_guess(words, answers, full_scoring=True)
+        assert best == lib.get_vectorised_guess_scores(words, answers)[0][0]
+
+
+class TestPartitionRepresentatives:
+    answers = ['light', 'night', 'sight', 'fight']
+
+    def test_labels(self):
+        block = np.array([[5, 3, 5, 7], [1, 0, 1, 2], [1, 1, 0, 2]], dtype=np.uint8)
+        labels = lib.get_partition_labels(block).tolist()
+        assert labels[0] == labels[1] == [0, 1, 0, 3]
+        assert labels[2] == [0, 0, 2, 3]
+
+    def test_prefers_answers(self):
+        # zzzzz and xxxxx don't split the pool, nixie and night both split
+        # night from the rest
+        guesses = ['zzzzz', 'nixie', 'xxxxx', 'night']
+        block = lib.get_pattern_block(guesses, self.answers)
+        keep = lib.get_partition_representatives(
+            block, [guess in self.answers for guess in guesses]).tolist()
+        assert keep == [0, 3]
+
+    def test_collapsed_counted(self):
+        from solver_stats import stats
+        words = lib.get_all_words_list()
+        answers = ['bated', 'dated', 'fated', 'gated', 'hated', 'mated']
+        stats.enable()
+        try:
+            lib.find_exact_best_guess(words, answers,
+                                      smart_guesses=lib.filter_guess_pool(words, answers, 40))
+            counters = stats.counters
+        finally:
+            stats.disable()
+            stats.reset()
+        assert counters['candidates_collapsed'] > 0
+
+
+class TestInformativeGuesses:
+    answers = ['light', 'night', 'sight', 'fight']
+
+    def test_letter_index(self):
+        store = lib.get_word_store()
+        index = lib.get_letter_index()
+        with_q = store.words_of(index.with_letter[ord('q') - ord('a')])
+        assert with_q == [word for word in store.words if 'q' in word]
+        ending_x = store.words_of(index.in_position[4][ord('x') - ord('a')])
+        assert ending_x == [word for word in store.words if word[4] == 'x']
+        mask = index.mask([ord('q') - ord('a')], [(4, ord('x') - ord('a'))])
+        assert mask.sum() == len(set(with_q + ending_x))
+
+    def test_skips_uninformative(self):
+        # eight and abbey get the same pattern from every ?ight answer
+        guesses = ['abbey', 'lawns', 'eight', 'night', 'xxxxx']
+        assert lib.get_informative_guesses(guesses, self.answers) == \
+            ['lawns', 'night', 'xxxxx']  # xxxxx isn't in the word store, so is kept
+
+    def test_index_pools(self):
+        store = lib.get_word_store()
+        words = lib.get_all_words_list()
+        answers = lib.get_answer_list()[::300]
+        informative = lib.get_informative_guesses(store.indices(words), store.indices(answers))
+        assert store.words_of(informative) == lib.get_informative_guesses(words, answers)
+
+    def test_only_skips_single_pattern_guesses(self):
+        words = lib.get_all_words_list()
+        rng = random.Random(3)
+        for size in [2, 3, 8, 30]:
+            answers = rng.sample(lib.get_answer_list(), size)
+            informative = set(lib.get_informative_guesses(words, answers))
+            block = lib.get_pattern_block(words, answers)
+            single = (block == block[:, :1]).all(axis=1)
+            for word, one_pattern in zip(words, single.tolist()):
+                assert word in informative or one_pattern
+
+    def test_full_scoring_unchanged(self):
+        words = lib.get_all_words_list()
+        answers = ['bated', 'dated', 'fated', 'gated', 'hated', 'mated', 'baghs']
+        assert lib.search_best_guess(words, answers, full_scoring=True, exact_cutoff=0)[0] \
+            == lib.get_vectorised_guess_scores(words, answers)[0][0]
+
+
+class TestTimeBudget:
+    answers = ['bated', 'dated', 'fated', 'gated', 'hated', 'mated']
+
+    def test_no_budget_levels(self):
+        words = lib.get_all_words_list()
+        answers = lib.get_answer_list()[::100]
+        assert lib.search_best_guess(words, self.answers[:4])[1] == 'exact'
+        assert lib.search_best_guess(words, answers)[1] == 'approximate'
+        assert lib.search_best_guess(words, answers, full_scoring=True)[1] == 'full'
+
+    def test_zero_budget_still_guesses(self):
+        words = lib.get_all_words_list()
+        guess, level = lib.search_best_guess(words, self.answers, time_budget=0)
+        assert level == 'letters' and guess in self.answers
+
+    def test_enough_budget_same_as_exact(self):
+        words = ['bated', 'dated', 'fated', 'gated', 'hated', 'mated', 'baghs', 'fight']
+        guess, level = lib.search_best_guess(words, self.answers, exact_cutoff=10,
+                                             time_budget=60)
+        assert level == 'exact'
+        assert guess == lib.find_best_guess(words, self.answers, exact_cutoff=10)
+
+    def test_stops_at_deadline(self):
+        words = lib.get_all_words_list()
+        start = time.perf_counter()
+        guess, level = lib.search_best_guess(words, self.answers, exact_cutoff=10,
+                                             time_budget=0.05)
+        assert time.perf_counter() - start < 1
+        assert level in lib.SEARCH_LEVELS and level != 'exact'
+        assert guess in words
+
+    def test_budget_caps_full_scoring(self):
+        words = lib.get_all_words_list()
+        answers = lib.get_answer_list()
+        lib.search_best_guess(words, answers, time_budget=0)  # load the word data
+        for budget in [0.005, 0.02]:
+            start = time.perf_counter()
+            guess, level = lib.search_best_guess(words, answers, time_budget=budget)
+            assert time.perf_counter() - start < budget + 0.05
+            assert level in ('letters', 'partial_full') and guess in words
+
+    def test_full_best_guess(self):
+        words = lib.get_all_words_list()
+        answers = lib.get_answer_list()[::20]
+        assert lib.find_full_best_guess(words, answers) == \
+            (lib.get_vectorised_guess_scores(words, answers)[0][0], True)
+        passed = lib.Deadline.after(0)
+        assert lib.find_full_best_guess(words, answers, passed) == (None, False)
+
+    def test_games_record_levels(self):
+        answers = lib.get_answer_list()[::300]
+        results = lib.solve_games(answers, time_budget=0.2)
+        for entry in results.values():
+            assert len(entry['levels']) == entry['num_guesses']
+            assert entry['levels'][0] == 'first_guess'
+            assert set(entry['levels'][1:]) <= set(lib.SEARCH_LEVELS)
+
+
 class TestTurnsUntilSolved:
     def test_guess_right_answer(self):
         answerpool = ['apple']
@@ -700,6 +1568,324 @@ class TestTurnsUntilSolved:
         best_guess = lib.find_best_guess(words, answerpool)
         lib.turns_until_solved(best_guess, words, answerpool)
 
+class TestSolveGames:
+    def play(self, answer, guess_pool, answer_pool):
+        """ The turn loop main.py and get_analytics.py used before solve_games() """
+        feedback = lib.Feedback()
+        guesses = []
+        while not guesses or guesses[-1] != answer:
+            if not guesses:
+                guess = 'roate'
+            else:
+                guess = lib.find_best_guess(guess_pool, answer_pool, feedback, set(guesses))
+            guesses.append(guess)
+            feedback.merge(lib.get_guess_feedback(guess, answer))
+            answer_pool = lib.get_possible_answers(feedback, answer_pool)
+        return guesses
+
+    def test_batch_same_as_one_at_a_time(self):
+        words = lib.get_all_words_list()
+        answers = lib.get_answer_list()[::150]
+        results = lib.solve_games(answers, words, answers)
+        assert list(results) == answers
+        for answer in answers:
+            assert results[answer]['guesses'] == self.play(answer, words, answers)
+            assert results[answer]['num_guesses'] == len(results[answer]['guesses'])
+
+    def test_follows_book(self):
+        words = lib.get_all_words_list()
+        answers = lib.get_answer_list()[::300]
+        root = strategy_book.BookNode('crane')
+        results = lib.solve_games(answers, words, answers, book=root)
+        assert all(entry['guesses'][0] == 'crane' for entry in results.values())
+
+
+class TestAnalytics:
+    def test_parallel_same_as_serial(self, tmp_path):
+        import get_analytics
+        answers = lib.get_answer_list()[::400]
+        get_analytics.run(1, tmp_path / 'serial.jsonl', answers)
+        get_analytics.run(2, tmp_path / 'parallel.jsonl', answers)
+        serial = analytics_log.load_results(tmp_path / 'serial.jsonl')
+        parallel = analytics_log.load_results(tmp_path / 'parallel.jsonl')
+        assert serial.keys() == parallel.keys() == set(answers)
+        for answer in answers:
+            assert serial[answer]['guesses'] == parallel[answer]['guesses']
+
+    def test_resume(self, tmp_path):
+        import get_analytics
+        filename = tmp_path / 'analytics.jsonl'
+        answers = lib.get_answer_list()[:3]
+        assert get_analytics.run(1, filename, answers[:1]) == 1
+        assert get_analytics.run(1, filename, answers) == 2
+        assert analytics_log.solved_answers(filename) == set(answers)
+        with open(filename) as f:
+            assert len(f.readlines()) == 3
+
+    def test_metrics(self, tmp_path):
+        import get_analytics
+        filename = tmp_path / 'analytics.jsonl'
+        get_analytics.run(1, filename, ['mated'], metrics=True)
+        entry = analytics_log.load_results(filename)['mated']
+        assert len(entry['metrics']['turns']) == entry['num_guesses']
+        assert entry['metrics']['turns'][0]['guess'] == 'roate'
+        assert not get_analytics.stats.enabled
+
+
+
+class TestGuessCache:
+    def test_round_trip(self, tmp_path):
+        import guess_cache
+        cache = guess_cache.GuessCache(tmp_path / 'cache.sqlite', 'settings')
+        feedback = lib.get_guess_feedback('roate', 'crane')
+        assert cache.get(['crane', 'crate'], feedback, {'roate'}) is None
+        cache.put(['crane', 'crate'], feedback, {'roate'}, 'crane', 'exact')
+        assert cache.get(['crate', 'crane'], feedback, {'roate'}) == ('crane', 'exact')
+        assert (cache.hits, cache.misses) == (1, 1)
+        other = guess_cache.GuessCache(tmp_path / 'cache.sqlite', 'other settings')
+        assert other.get(['crane', 'crate'], feedback, {'roate'}) is None
+
+    def test_settings_key(self):
+        import guess_cache
+        words, answers = ['crane', 'roate'], ['crane']
+        key = guess_cache.settings_key(words, answers)
+        assert key == guess_cache.settings_key(words, answers, time_budget=None, workers=4)
+        assert key != guess_cache.settings_key(words, answers, exact_cutoff=10)
+        assert key != guess_cache.settings_key(words, ['roate'])
+
+    def test_other_solver_version_misses(self, tmp_path, monkeypatch):
+        import guess_cache
+        words, answers = ['crane', 'crate', 'roate'], ['crane', 'crate']
+        feedback = lib.get_guess_feedback('roate', 'crane')
+        cache = guess_cache.open_cache(words, answers, tmp_path / 'cache.sqlite')
+        cache.put(answers, feedback, {'roate'}, 'crane', 'exact')
+        monkeypatch.setattr(lib, 'SOLVER_VERSION', lib.SOLVER_VERSION + 1)
+        assert guess_cache.settings_key(words, answers) != cache.settings
+        cache = guess_cache.open_cache(words, answers, tmp_path / 'cache.sqlite')
+        assert cache.get(answers, feedback, {'roate'}) is None
+
+    def test_games_same_with_cache(self, tmp_path):
+        import guess_cache
+        words = lib.get_all_words_list()
+        answers = lib.get_answer_list()
+        sample = answers[::200]
+        cache = guess_cache.open_cache(words, answers, tmp_path / 'cache.sqlite')
+        first = lib.solve_games(sample, words, answers, cache=cache)
+        assert cache.hits == 0 and cache.misses > 0
+        # a new run reads every guess from the cache
+        cache = guess_cache.open_cache(words, answers, tmp_path / 'cache.sqlite')
+        second = lib.solve_games(sample, words, answers, cache=cache)
+        assert cache.misses == 0 and cache.hits > 0
+        assert {a: e['guesses'] for a, e in first.items()} == \
+            {a: e['guesses'] for a, e in second.items()}
+
+    def test_parallel_analytics(self, tmp_path, capsys):
+        import get_analytics
+        answers = lib.get_answer_list()[::400]
+        cache_file = tmp_path / 'cache.sqlite'
+        get_analytics.run(2, tmp_path / 'first.jsonl', answers, cache_file=cache_file)
+        get_analytics.run(2, tmp_path / 'second.jsonl', answers, cache_file=cache_file)
+        assert capsys.readouterr().out.splitlines()[-1].endswith(' 0 misses, 100.0% hit rate')
+        first = analytics_log.load_results(tmp_path / 'first.jsonl')
+        second = analytics_log.load_results(tmp_path / 'second.jsonl')
+        assert all(first[a]['guesses'] == second[a]['guesses'] for a in answers)
+
+
+class TestAnalyticsLog:
+    def test_append_and_read(self, tmp_path):
+        filename = tmp_path / 'analytics.jsonl'
+        entry = {'guesses': ['roate', 'crane'], 'num_guesses': 2, 'time': 0.1}
+        with analytics_log.AnalyticsLog(filename) as log:
+            log.append('crane', entry)
+            log.append('slink', {**entry, 'guesses': ['roate', 'slink']})
+        assert list(analytics_log.read_log(filename))[0] == ('crane', entry)
+        assert analytics_log.solved_answers(filename) == {'crane', 'slink'}
+
+    def test_partial_last_line_skipped(self, tmp_path):
+        filename = tmp_path / 'analytics.jsonl'
+        with analytics_log.AnalyticsLog(filename) as log:
+            log.append('crane', {'num_guesses': 2})
+        with open(filename, 'a') as f:
+            f.write('{"answer": "sli')
+        assert analytics_log.load_results(filename) == {'crane': {'num_guesses': 2}}
+
+    def test_append_after_partial_last_line(self, tmp_path):
+        filename = tmp_path / 'analytics.jsonl'
+        with analytics_log.AnalyticsLog(filename) as log:
+            log.append('crane', {'num_guesses': 2})
+        with open(filename, 'a') as f:
+            f.write('{"answer": "sli')
+        with analytics_log.AnalyticsLog(filename) as log:
+            log.append('slink', {'num_guesses': 3})
+        assert analytics_log.load_results(filename) == {'crane': {'num_guesses': 2},
+                                                        'slink': {'num_guesses': 3}}
+
+    def test_compact(self, tmp_path):
+        filename = tmp_path / 'analytics.jsonl'
+        with analytics_log.AnalyticsLog(filename) as log:
+            log.append('crane', {'num_guesses': 3})
+            log.append('crane', {'num_guesses': 2})
+        analytics_log.compact(filename)
+        assert list(analytics_log.read_log(filename)) == [('crane', {'num_guesses': 2})]
+
+    def test_convert(self, tmp_path):
+        filename, analytics_file = tmp_path / 'analytics.jsonl', tmp_path / 'analytics.txt'
+        results = {'crane': {'guesses': ['roate', 'crane'], 'num_guesses': 2, 'time': 0.1},
+                   'slink': {'guesses': ['roate', 'slink'], 'num_guesses': 2, 'time': 0.2}}
+        with open(analytics_file, 'w') as f:
+            json.dump(results, f)
+        analytics_log.import_analytics(analytics_file, filename)
+        assert analytics_log.load_results(filename) == results
+        os.remove(analytics_file)
+        analytics_log.export_analytics(filename, analytics_file)
+        with open(analytics_file) as f:
+            assert json.load(f) == results
+
+
+class TestStrategyBook:
+    def play(self, answer, guess_pool, answer_pool):
+        feedback = lib.Feedback()
+        guesses = ['roate']
+        while guesses[-1] != answer:
+            feedback.merge(lib.get_guess_feedback(guesses[-1], answer))
+            answer_pool = lib.get_possible_answers(feedback, answer_pool)
+            guesses.append(lib.find_best_guess(guess_pool, answer_pool, feedback, set(guesses)))
+        return guesses
+
+    def follow(self, root, answer):
+        node = root
+        guesses = [node.guess]
+        while guesses[-1] != answer:
+            node = node.child(patterns.get_pattern(node.guess, answer))
+            guesses.append(node.guess)
+        return guesses
+
+    def test_book_matches_live_search(self, tmp_path):
+        words = lib.get_all_words_list()
+        answers = lib.get_answer_list()[::150]
+        root = strategy_book.build_book(words, answers)
+        filename = tmp_path / 'book.json.gz'
+        strategy_book.save_book(root, strategy_book.book_key(words, answers), filename)
+        loaded = strategy_book.load_book(words, answers, filename)
+        assert len(loaded) == len(root)
+        for answer in answers:
+            assert self.follow(loaded, answer) == self.play(answer, words, answers)
+
+    def test_stale_book_ignored(self, tmp_path):
+        words = ['abcde', 'aaaaa', 'bbbbb']
+        answers = ['aaaaa', 'bbbbb']
+        filename = tmp_path / 'book.json.gz'
+        root = strategy_book.build_book(words, answers, first_guess='abcde')
+        strategy_book.save_book(root, strategy_book.book_key(words, answers, 'abcde'), filename)
+        assert strategy_book.load_book(words, answers, filename, 'abcde') is not None
+        assert strategy_book.load_book(words, answers + ['ccccc'], filename, 'abcde') is None
+        assert strategy_book.load_book(words, answers, filename) is None
+        assert strategy_book.load_book(words, answers, tmp_path / 'missing.json.gz') is None
+
+    def test_other_solver_version_misses(self, tmp_path, monkeypatch):
+        words = ['abcde', 'aaaaa', 'bbbbb']
+        answers = ['aaaaa', 'bbbbb']
+        filename = tmp_path / 'book.json.gz'
+        root = strategy_book.build_book(words, answers, first_guess='abcde')
+        strategy_book.save_book(root, strategy_book.book_key(words, answers, 'abcde'), filename)
+        monkeypatch.setattr(lib, 'SOLVER_VERSION', lib.SOLVER_VERSION + 1)
+        assert strategy_book.load_book(words, answers, filename, 'abcde') is None
+
+
+class TestEvaluatePolicy:
+    def test_same_as_solve_games(self):
+        import evaluate_policy
+        words = lib.get_all_words_list()
+        answers = lib.get_answer_list()[::150]
+        results = evaluate_policy.evaluate(words, answers)
+        games = lib.solve_games(answers, words, answers)
+        assert results == {answer: entry['guesses'] for answer, entry in games.items()}
+
+    def test_summarise(self):
+        import evaluate_policy
+        results = {'crane': ['roate', 'crane'],
+                   'slink': ['roate', 'slink'],
+                   'mated': ['roate', 'sated', 'baghs', 'mated'],
+                   'hated': ['roate', 'sated']}  # book ran out
+        summary = evaluate_policy.summarise(results)
+        assert summary['mean'] == (2 + 2 + 4) / 3
+        assert summary['worst'] == 4
+        assert summary['histogram'] == {2: 2, 4: 1}
+        assert summary['failed'] == ['hated']
+
+
+@pytest.fixture(scope='class')
+def port():
+    """ Port of a solver service running on localhost for the test class """
+    import asyncio
+    import threading
+    import solver_service
+    service = solver_service.SolverService(workers=2)
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(service.start('127.0.0.1', 0))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield server.sockets[0].getsockname()[1]
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    service.close()
+
+
+class TestSolverService:
+    def request(self, port, method, path, body=None):
+        import solver_service
+        return solver_service.request(method, path, body, port=port)
+
+    def test_guess(self, port):
+        assert self.request(port, 'POST', '/guess', {}) == \
+            (200, {'guess': 'roate', 'possible_answers': 3158})
+        body = {'guesses': ['roate', 'sated'], 'patterns': ['bbyyy', 'bgggg']}
+        assert self.request(port, 'POST', '/guess', body) == \
+            (200, {'guess': 'baghs', 'possible_answers': 6})
+
+    def test_solve(self, port):
+        status, reply = self.request(port, 'POST', '/solve', {'answer': 'mated'})
+        assert status == 200
+        assert reply['guesses'] == ['roate', 'sated', 'baghs', 'famed', 'mated']
+
+    def test_bad_requests(self, port):
+        assert self.request(port, 'POST', '/solve', {'answer': 'zzzzz'})[0] == 400
+        body = {'guesses': ['roate'], 'patterns': ['bbzzz']}
+        assert self.request(port, 'POST', '/guess', body)[0] == 400
+        body = {'guesses': ['roate', 'sated'], 'patterns': ['ggggb', 'ggggb']}
+        assert self.request(port, 'POST', '/guess', body)[0] == 400  # no answers left
+        assert self.request(port, 'GET', '/nothing')[0] == 404
+
+    def test_concurrent_requests(self, port):
+        from concurrent.futures import ThreadPoolExecutor
+        answers = lib.get_answer_list()[::400]
+        with ThreadPoolExecutor(4) as threads:
+            replies = list(threads.map(
+                lambda answer: self.request(port, 'POST', '/solve', {'answer': answer}),
+                answers))
+        for answer, (status, reply) in zip(answers, replies):
+            assert status == 200 and reply['guesses'][-1] == answer
+
+    def test_stats(self, port):
+        self.request(port, 'POST', '/guess', {})
+        status, reply = self.request(port, 'GET', '/stats')
+        latency = reply['latency']['/guess']
+        assert status == 200 and latency['count'] >= 1
+        assert latency['p50'] <= latency['p90'] <= latency['p99'] <= latency['max']
+
+    def test_worker_states_bounded(self, monkeypatch):
+        import solver_service
+        monkeypatch.setattr(solver_service, '_states', None)
+        monkeypatch.setattr(solver_service, '_states_args',
+                            (lib.get_all_words_list(), lib.get_answer_list(), None, 10))
+        sizes = []
+        for answer in lib.get_answer_list()[::300]:
+            assert solver_service._solve(answer)['guesses'][-1] == answer
+            sizes.append(len(solver_service._states.states))
+        assert max(sizes) <= 10 + lib.MAX_GUESSES
+        assert solver_service._best_guess(()) == {'guess': 'roate', 'possible_answers': 3158}
+
+
 class TestIntegration:
     def test_erect_integration(self):
         pass
@@ -709,6 +1895,26 @@ class TestIntegration:
         # assert pa(feedback, answer) == exp
 
 
+class TestBenchmarkSuite:
+    def test_find_regressions(self):
+        baseline = {'a': 1.0, 'b': 1.0}
+        results = {'a': 1.1, 'b': 1.3, 'c': 5.0}
+        assert benchmark_wordle.find_regressions(results, baseline, 20) == [('b', 1.0, 1.3)]
+        assert benchmark_wordle.find_regressions(results, baseline, 50) == []
+
+    def test_compare_fails_on_regression(self, tmp_path):
+        baseline = tmp_path / 'baseline.json'
+        assert benchmark_wordle.main(['save', 'feedback_merge', '--baseline', str(baseline)]) == 0
+        assert 'feedback_merge' in benchmark_wordle.load_baseline(baseline)
+        assert benchmark_wordle.main(['compare', 'feedback_merge', '--baseline', str(baseline),
+                                      '--threshold', '1000']) == 0
+        benchmark_wordle.save_baseline({'feedback_merge': 1e-9}, baseline)
+        assert benchmark_wordle.main(['compare', 'feedback_merge', '--baseline', str(baseline)]) == 1
+
+    def test_baseline_covers_benchmarks(self):
+        assert benchmark_wordle.load_baseline().keys() == benchmark_wordle.BENCHMARKS.keys()
+
+
 class TestPerformance:
     def test_performance_get_guess_feedback(self, benchmark):
         words = lib.get_all_words_list()
@@ -734,6 +1940,19 @@ class TestPerformance:
                     lib.possible_answer(f, word)
         benchmark(benchmark_feedback)
 
+    def test_performance_answer_pool_filter(self, benchmark):
+        pool = lib.get_answer_pool(lib.get_all_words_list())
+        f1, f2, f3, f4 = lib.Feedback(), lib.Feedback(), lib.Feedback(), lib.Feedback()
+        f2.greens = ['r', None, None, None, None]
+        f3.yellows[2] = ['ll']
+        f4.grays = set(['z', 'll', 'o'])
+        feedbacks = [f1, f2, f3, f4]
+
+        def benchmark_filter():
+            for f in feedbacks:
+                lib.get_possible_answers(f, pool)
+        benchmark(benchmark_filter)
+
     def test_performance_merge(self, benchmark):
         f0 = lib.Feedback()
         f1 = lib.get_guess_feedback('azcze', 'abcdd')  # greens
@@ -747,3 +1966,42 @@ class TestPerformance:
                 for fb2 in feedbacks:
                     fb1.merge(fb2)
         benchmark(benchmark_merge)
+
+
+class TestSolverStats:
+    @pytest.fixture
+    def stats(self):
+        from solver_stats import stats
+        stats.enable()
+        yield stats
+        stats.disable()
+        stats.reset()
+
+    def test_counts_when_enabled(self, stats):
+        lib.get_guess_feedback('roate', 'mated')
+        lib.possible_answer(lib.Feedback(), 'mated')
+        assert stats.counters['get_guess_feedback'] == 1
+        assert stats.counters['possible_answer'] == 1
+
+    def test_no_counts_when_disabled(self, stats):
+        stats.disable()
+        lib.get_guess_feedback('roate', 'mated')
+        assert not stats.counters
+
+    def test_turn_metrics(self, stats):
+        answers = ['mated', 'gated', 'hated', 'dated', 'baked']
+        words = lib.get_all_words_list()
+        smart_guesses = lib.filter_guess_pool(words, answers, 10)
+        stats.start_turn()
+        guess = lib.find_exact_best_guess(words, answers, smart_guesses=smart_guesses)
+        stats.end_turn(guess=guess, pool_size=len(answers))
+        turn = stats.turns[0]
+        assert turn['guess'] == guess and turn['time'] > 0
+        assert turn['nodes_expanded'] > 0 and turn['max_depth'] >= 1
+        assert 0 <= turn['memo_hit_rate'] <= 1
+        assert json.loads(stats.to_json())['turns'] == stats.turns
+
+    def test_no_turns_when_disabled(self, stats):
+        stats.disable()
+        lib.solve_games(lib.get_answer_list()[:5])
+        assert stats.turns == []
@@ -0,0 +1,135 @@
+"""
+Compact binary store of words.txt with word <-> index mapping.
+
+The letters of every word are kept as a fixed width (words, 5) uint8 array in
+WORDS_FILE, memory-mapped on load and rebuilt when words.txt changes (recorded
+in WORDS_META like patterns.py). Word i of the store is line i of words.txt and
+row i of the pattern matrix, so a pool can be an integer array of word indices:
+checking membership is a mask lookup and copying it is an array copy.
+
+Index pools are used where pools are scored or filtered as arrays (pattern
+blocks, vectorised and full scoring). The feedback based searches, such as
+lib.find_exact_best_guess() and its recursion, take index pools at their entry
+but convert them to words once and work on words from there.
+
+    python word_store.py       # build (or rebuild if stale)
+"""
+import json
+import logging
+import os
+
+import numpy as np
+
+import patterns
+
+logger = logging.getLogger(__name__)
+
+WORDS_FILE = 'words.npy'
+WORDS_META = 'words.json'
+INDEX_DTYPE = np.int32
+
+
+class WordStore:
+    """
+    The words of words.txt by index, with a mask of those that are answers and
+    the column of each answer in the pattern matrix (-1 for non answers)
+    """
+    def __init__(self, letters, answers):
+        self.letters = letters
+        data = letters.tobytes().decode('ascii')
+        self.words = [data[i:i + 5] for i in range(0, len(data), 5)]
+        self.index = {word: i for i, word in enumerate(self.words)}
+
+        self.answer_column = np.full(len(self.words), -1, dtype=INDEX_DTYPE)
+        self.answer_column[self.indices(answers)] = np.arange(len(answers))
+        self.is_answer = self.answer_column >= 0
+        self.answer_indices = np.flatnonzero(self.is_answer).astype(INDEX_DTYPE)
+
+    def word(self, i) -> str:
+        return self.words[i]
+
+    def word_index(self, word) -> int:
+        """ Index of word, raising KeyError if it isn't in the store """
+        return self.index[word]
+
+    def indices(self, words) -> np.ndarray:
+        """ Pool of word indices for words, in the same order """
+        return np.fromiter((self.index[word] for word in words), dtype=INDEX_DTYPE)
+
+    def words_of(self, indices) -> list:
+        return [self.words[i] for i in indices]
+
+    def mask(self, indices) -> np.ndarray:
+        """ Boolean array over the store, True at indices """
+        mask = np.zeros(len(self.words), dtype=bool)
+        mask[indices] = True
+        return mask
+
+    def __len__(self):
+        return len(self.words)
+
+    def __contains__(self, word):
+        return word in self.index
+
+
+class LetterIndex:
+    """
+    Inverted index of a store's letters: the indices of the words containing
+    each letter (numbered 0-25), and of the words with each letter in each
+    position
+    """
+    def __init__(self, letters):
+        codes = letters.astype(np.intp) - ord('a')
+        self.size = len(codes)
+        self.with_letter = [np.flatnonzero((codes == let).any(axis=1)).astype(INDEX_DTYPE)
+                            for let in range(26)]
+        self.in_position = [[np.flatnonzero(codes[:, pos] == let).astype(INDEX_DTYPE)
+                             for let in range(26)] for pos in range(5)]
+
+    def mask(self, letters=(), positions=()) -> np.ndarray:
+        """
+        Boolean array over the store, True for words with any of letters or
+        any of the (position, letter) pairs of positions
+        """
+        mask = np.zeros(self.size, dtype=bool)
+        for let in letters:
+            mask[self.with_letter[let]] = True
+        for pos, let in positions:
+            mask[self.in_position[pos][let]] = True
+        return mask
+
+
+def build_word_store(words_file, words_store=WORDS_FILE, meta_file=WORDS_META):
+    with open(words_file) as f:
+        words = f.read().split()
+    logger.info(f'building {len(words)} word store...')
+    np.save(words_store, patterns.encode_words(words))
+    with open(meta_file, 'w') as f:
+        json.dump({'hash': patterns.files_hash(words_file), 'words': len(words)}, f)
+
+
+def is_stale(words_file, words_store=WORDS_FILE, meta_file=WORDS_META) -> bool:
+    if not (os.path.exists(words_store) and os.path.exists(meta_file)):
+        return True
+    with open(meta_file) as f:
+        meta = json.load(f)
+    return meta.get('hash') != patterns.files_hash(words_file)
+
+
+def load_word_store(words_file, answers, words_store=WORDS_FILE, meta_file=WORDS_META):
+    """
+    Memory-maps the word store of words_file, rebuilding it first if it is
+    stale. answers are the words marked as possible answers.
+    """
+    if is_stale(words_file, words_store, meta_file):
+        build_word_store(words_file, words_store, meta_file)
+    return WordStore(np.load(words_store, mmap_mode='r'), answers)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    words_file = 'words.txt'
+    if is_stale(words_file):
+        build_word_store(words_file)
+    else:
+        print(f'{WORDS_FILE} is up to date')
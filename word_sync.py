@@ -0,0 +1,178 @@
+"""
+Keeps words.txt in sync with the remote word list (lib.URL).
+
+The list is requested conditionally, with the ETag and Last-Modified of the
+last sync stored in SYNC_META, so an unchanged list costs a 304 and no
+download. SYNC_META also stores the content hash synced, so the request is
+only conditional while words.txt still has that hash.
+
+A downloaded list is compared with words.txt by content hash, and if it
+differs the exact words added and removed are found. A list missing any word
+of answers.txt is refused, as every answer must be a word. Otherwise only what
+depends on the words changed is updated:
+
+- the pattern matrix keeps the rows of words still in the list and computes
+  rows for added words only (patterns.update_pattern_matrix())
+- the word store, a cheap encoding of the list, is rebuilt
+- guess cache entries for the old list are deleted, as a best guess depends on
+  the whole guess pool
+- words parsed in this process are reloaded (lib.reload_word_data())
+
+    python word_sync.py           # sync words.txt with the remote list
+    python word_sync.py --check   # report what would change without applying it
+"""
+import hashlib
+import json
+import logging
+import os
+import sys
+
+import guess_cache
+import lib
+import patterns
+import word_store
+
+logger = logging.getLogger(__name__)
+
+SYNC_META = 'word_sync.json'
+TIMEOUT = 10  # seconds
+
+
+class SyncError(Exception):
+    pass
+
+
+def content_hash(data) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def diff_words(old, new) -> tuple:
+    """ Returns (added, removed) words, each in the order of its list """
+    old_set, new_set = set(old), set(new)
+    return ([word for word in new if word not in old_set],
+            [word for word in old if word not in new_set])
+
+
+def load_meta(meta_file=SYNC_META) -> dict:
+    try:
+        with open(meta_file) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_meta(meta, meta_file=SYNC_META):
+    with open(meta_file, 'w') as f:
+        json.dump(meta, f, indent=2)
+
+
+def fetch(url, meta, timeout=TIMEOUT):
+    """
+    Conditionally requests url, returning (body bytes, or None if not modified,
+    validator headers)
+    """
+    import requests
+
+    headers = {}
+    if meta.get('url') == url:
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+    try:
+        response = requests.get(url, headers=headers, timeout=timeout)
+    except (requests.ConnectionError, requests.Timeout) as e:
+        raise SyncError(f'could not reach {url}: {e}')
+    validators = {'etag': response.headers.get('ETag'),
+                  'last_modified': response.headers.get('Last-Modified')}
+    if response.status_code == 304:
+        return None, validators
+    if response.status_code != 200:
+        raise SyncError(f'{url} returned HTTP {response.status_code}')
+    return response.content, validators
+
+
+def sync(url=lib.URL, words_file=lib.LOCAL_WORDS, answers_file=lib.LOCAL_ANSWERS,
+         meta_file=SYNC_META, patterns_file=patterns.PATTERNS_FILE,
+         patterns_meta=patterns.PATTERNS_META, words_store=word_store.WORDS_FILE,
+         words_meta=word_store.WORDS_META, cache_file=guess_cache.CACHE_FILE,
+         apply=True, timeout=TIMEOUT) -> dict:
+    """
+    Syncs words_file with the list at url and updates what depends on it.
+    With apply=False only reports the changes. Raises SyncError if the list
+    can't be fetched, or isn't 5 letter words including every answer.
+    Returns {"not_modified" (the server answered 304), "changed", "added",
+    "removed", "rows_computed" (pattern matrix rows computed),
+    "cache_entries_deleted"}.
+    """
+    result = {'not_modified': False, 'changed': False, 'added': [], 'removed': [],
+              'rows_computed': 0, 'cache_entries_deleted': 0}
+    meta = load_meta(meta_file)
+    with open(words_file, 'rb') as f:
+        old_data = f.read()
+    old_hash = content_hash(old_data)
+    # a 304 only means words_file is current if it hasn't changed since the last sync
+    data, validators = fetch(url, meta if meta.get('hash') == old_hash else {}, timeout)
+    if data is None:
+        result['not_modified'] = True
+        return result
+
+    new_hash = content_hash(data)
+    if new_hash != old_hash:
+        words = data.decode().split()
+        if not words or any(len(word) != 5 or not word.isalpha() for word in words):
+            raise SyncError(f'{url} is not a list of 5 letter words')
+        in_words = set(words)
+        missing = [answer for answer in lib.get_word_list(answers_file)
+                   if answer not in in_words]
+        if missing:
+            raise SyncError(f'{url} is missing {len(missing)} of {answers_file}: '
+                            f'{missing[:20]}')
+        result['changed'] = True
+        result['added'], result['removed'] = diff_words(old_data.decode().split(), words)
+    if not apply:
+        return result
+
+    if result['changed']:
+        answers = lib.get_word_list(answers_file)
+        old_settings = guess_cache.settings_key(old_data.decode().split(), answers)
+        with open(words_file + '.tmp', 'wb') as f:
+            f.write(data)
+        os.replace(words_file + '.tmp', words_file)
+        result['rows_computed'] = patterns.update_pattern_matrix(
+            old_data, words_file, answers_file, patterns_file, patterns_meta)
+        word_store.build_word_store(words_file, words_store, words_meta)
+        if os.path.exists(cache_file):
+            result['cache_entries_deleted'] = guess_cache.delete_settings(old_settings,
+                                                                          cache_file)
+        lib.reload_word_data()
+        logger.info(f'{words_file}: {len(result["added"])} added, '
+                    f'{len(result["removed"])} removed')
+    save_meta({'url': url, 'hash': new_hash, **validators}, meta_file)
+    return result
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    check = '--check' in argv
+    try:
+        result = sync(apply=not check)
+    except SyncError as e:
+        print(e)
+        return 1
+    if result['not_modified']:
+        print('remote word list not modified since the last sync')
+    elif not result['changed']:
+        print(f'{lib.LOCAL_WORDS} matches the remote word list')
+    else:
+        print(f'{len(result["added"])} added {result["added"][:20]}')
+        print(f'{len(result["removed"])} removed {result["removed"][:20]}')
+        if not check:
+            print(f'{result["rows_computed"]} pattern rows computed, '
+                  f'{result["cache_entries_deleted"]} cached guesses deleted')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())